@@ -0,0 +1,24 @@
+import os
+from fastapi import Depends, HTTPException, status
+
+from . import models
+from .dependencies import require_active_user
+
+# Endpoint operasional (build indeks, dsb.) hanya untuk admin. Model User belum memiliki peran admin
+# (lihat is_superuser di models.User), jadi admin ditentukan lewat daftar email/username dipisah koma.
+# Jika kedua daftar kosong, tidak ada pengguna yang diizinkan.
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
+
+
+def is_admin_user(user: models.User) -> bool:
+    return (user.email or "").lower() in ADMIN_EMAILS or user.username in ADMIN_USERNAMES
+
+
+def require_admin_user(current_user: models.User = Depends(require_active_user)) -> models.User:
+    """
+    Dependensi FastAPI: pengguna aktif yang terdaftar di ADMIN_EMAILS/ADMIN_USERNAMES, selain itu HTTP 403.
+    """
+    if not is_admin_user(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Hanya admin yang dapat mengakses endpoint ini.")
+    return current_user
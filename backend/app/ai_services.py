@@ -1,29 +1,201 @@
 import os
 import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 
 from .schemas import Curriculum, Module, Topic # Pastikan path impor ini benar
-from sentence_transformers import SentenceTransformer # Untuk embedding
-from typing import List, Dict, Any, Optional # Tambahkan Optional
+from typing import List, Dict, Any, Optional, Tuple # Tambahkan Optional
 
 # Muat variabel lingkungan dari .env jika ada (terutama untuk pengembangan lokal)
 load_dotenv()
 
-# Inisialisasi model embedding Sentence Transformer
-# Model ini akan dimuat sekali saat modul diimpor dan digunakan kembali.
-# Ini menghemat waktu pemuatan model pada setiap panggilan fungsi.
+# Model embedding Sentence Transformer dimuat secara lazy (saat pertama kali dibutuhkan) atau di
+# background setelah startup melalui start_embedding_model_warmup(). Impor `sentence_transformers`
+# (dan PyTorch) juga ditunda, sehingga mengimpor modul ini, startup worker, siklus --reload, dan
+# koleksi tes tidak lagi menunggu model dimuat. Model dimuat sekali dan digunakan kembali.
 # Pastikan model 'all-MiniLM-L6-v2' sudah di-cache atau dapat diunduh oleh lingkungan.
 # Dimensi embedding untuk 'all-MiniLM-L6-v2' adalah 384.
-try:
-    embedding_model_name = 'all-MiniLM-L6-v2'
-    embedding_model = SentenceTransformer(embedding_model_name)
-    print(f"Model Sentence Transformer '{embedding_model_name}' berhasil dimuat.")
-except Exception as e:
-    print(f"PERINGATAN PENTING: Gagal memuat model Sentence Transformer '{embedding_model_name}': {e}")
-    print("Fungsi get_embedding tidak akan berfungsi. Pastikan model tersedia atau ada koneksi internet untuk mengunduhnya.")
-    embedding_model = None # Set ke None jika gagal dimuat
+embedding_model_name = 'all-MiniLM-L6-v2'
+embedding_model = None # Diisi oleh load_embedding_model()
+
+# Backend inferensi embedding (untuk node CPU-only):
+# - "torch"      : PyTorch fp32 (default, referensi).
+# - "torch-int8" : PyTorch dengan kuantisasi dinamis int8 pada layer Linear.
+# - "onnx"       : ONNX Runtime dengan model ONNX hasil ekspor (memerlukan sentence-transformers[onnx]).
+# - "onnx-int8"  : ONNX Runtime dengan model ONNX terkuantisasi int8 (EMBEDDING_ONNX_FILE).
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx2.onnx")
+# Jika aktif, backend non-fp32 dibandingkan dengan fp32 saat dimuat dan dibatalkan (kembali ke "torch")
+# jika kesamaan kosinus minimum di bawah EMBEDDING_PARITY_MIN_COSINE.
+EMBEDDING_PARITY_CHECK = os.getenv("EMBEDDING_PARITY_CHECK", "1") == "1"
+EMBEDDING_PARITY_MIN_COSINE = float(os.getenv("EMBEDDING_PARITY_MIN_COSINE", "0.99"))
+EMBEDDING_PARITY_TEXTS = [
+    "test",
+    "python list comprehension",
+    "Belajar Python untuk analisis data",
+    "Cara membuat REST API dengan FastAPI dan PostgreSQL",
+    "Gradient descent adalah algoritma optimisasi yang meminimalkan fungsi loss secara iteratif.",
+    "React hooks: useState dan useEffect untuk mengelola state komponen",
+]
+_embedding_model_lock = threading.Lock()
+_embedding_model_state = "not_loaded" # not_loaded | loading | ready | failed
+_embedding_model_error: Optional[str] = None
+_embedding_model_load_seconds: Optional[float] = None
+_embedding_model_backend: Optional[str] = None # Backend yang benar-benar digunakan setelah dimuat
+_embedding_parity_min_cosine: Optional[float] = None
+_embedding_warmup_thread: Optional[threading.Thread] = None
+_embedding_warmup_lock = threading.Lock() # Terpisah dari _embedding_model_lock agar tidak menunggu pemuatan model
+
+
+class EmbeddingModelNotReadyError(RuntimeError):
+    """
+    Dimunculkan oleh API embedding async ketika model masih dimuat di background.
+    Endpoint sebaiknya mengembalikan HTTP 503.
+    """
+
+
+def build_embedding_model(backend: str = EMBEDDING_BACKEND):
+    """
+    Membuat instance SentenceTransformer untuk backend tertentu (lihat EMBEDDING_BACKENDS).
+    Semua backend memiliki antarmuka encode() yang sama, sehingga get_embedding/get_embeddings
+    tidak perlu tahu backend mana yang dipakai.
+    """
+    from sentence_transformers import SentenceTransformer # Impor berat, ditunda sampai dibutuhkan
+
+    if backend == "torch":
+        return SentenceTransformer(embedding_model_name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+        model = SentenceTransformer(embedding_model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        return SentenceTransformer(embedding_model_name, device="cpu", backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(
+            embedding_model_name, device="cpu", backend="onnx",
+            model_kwargs={"file_name": EMBEDDING_ONNX_FILE}
+        )
+    raise ValueError(f"EMBEDDING_BACKEND tidak dikenal: '{backend}'. Pilih dari: {', '.join(EMBEDDING_BACKENDS)}")
+
+
+def embedding_parity(model, reference_model, texts: List[str] = EMBEDDING_PARITY_TEXTS) -> np.ndarray:
+    """
+    Menghitung kesamaan kosinus per teks antara embedding `model` dan `reference_model` (fp32).
+    """
+    candidate = np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    reference = np.asarray(reference_model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    candidate /= np.linalg.norm(candidate, axis=1, keepdims=True)
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    return np.sum(candidate * reference, axis=1)
+
+
+def load_embedding_model():
+    """
+    Memuat model Sentence Transformer jika belum dimuat (thread-safe, idempoten).
+    Mengembalikan model, atau None jika pemuatan gagal.
+    """
+    global embedding_model, _embedding_model_state, _embedding_model_error, _embedding_model_load_seconds
+    global _embedding_model_backend, _embedding_parity_min_cosine
+    if embedding_model is not None or _embedding_model_state == "failed":
+        return embedding_model
+
+    with _embedding_model_lock:
+        if embedding_model is not None or _embedding_model_state == "failed":
+            return embedding_model
+        _embedding_model_state = "loading"
+        started_at = time.perf_counter()
+        try:
+            model = None
+            backend = EMBEDDING_BACKEND
+            if backend != "torch":
+                try:
+                    model = build_embedding_model(backend)
+                    if EMBEDDING_PARITY_CHECK:
+                        _embedding_parity_min_cosine = float(embedding_parity(model, build_embedding_model("torch")).min())
+                        if _embedding_parity_min_cosine < EMBEDDING_PARITY_MIN_COSINE:
+                            print(f"PERINGATAN: Backend embedding '{backend}' gagal uji paritas (kosinus minimum {_embedding_parity_min_cosine:.4f} < {EMBEDDING_PARITY_MIN_COSINE}). Kembali ke 'torch'.")
+                            model = None
+                except Exception as e:
+                    print(f"PERINGATAN: Gagal memuat backend embedding '{backend}': {e}. Kembali ke 'torch'.")
+                    model = None
+            if model is None:
+                backend = "torch"
+                model = build_embedding_model(backend)
+            embedding_model = model
+            _embedding_model_backend = backend
+            _embedding_model_load_seconds = time.perf_counter() - started_at
+            _embedding_model_state = "ready"
+            print(f"Model Sentence Transformer '{embedding_model_name}' (backend '{backend}') berhasil dimuat dalam {_embedding_model_load_seconds:.1f} detik.")
+        except Exception as e:
+            _embedding_model_state = "failed"
+            _embedding_model_error = str(e)
+            print(f"PERINGATAN PENTING: Gagal memuat model Sentence Transformer '{embedding_model_name}': {e}")
+            print("Fungsi get_embedding tidak akan berfungsi. Pastikan model tersedia atau ada koneksi internet untuk mengunduhnya.")
+            embedding_model = None # Set ke None jika gagal dimuat
+    return embedding_model
+
+
+def is_embedding_model_ready() -> bool:
+    """
+    True jika model embedding sudah dimuat dan siap digunakan.
+    """
+    return embedding_model is not None
+
+
+def start_embedding_model_warmup() -> threading.Thread:
+    """
+    Memuat model embedding di thread background lalu menjalankan embedding uji ("test"),
+    yang juga menghangatkan cache embedding kueri. Aman dipanggil berkali-kali.
+    """
+    global _embedding_warmup_thread
+
+    def warmup():
+        if load_embedding_model() is None:
+            return
+        if get_embedding("test") is None: # Cek sederhana jika embedding service bermasalah
+            print("PERINGATAN PENTING: Fungsi get_embedding mungkin tidak berfungsi dengan benar.")
+
+    with _embedding_warmup_lock:
+        if _embedding_warmup_thread is None:
+            _embedding_warmup_thread = threading.Thread(target=warmup, name="embedding-warmup", daemon=True)
+            _embedding_warmup_thread.start()
+    return _embedding_warmup_thread
+
+
+def embedding_model_status() -> Dict[str, Any]:
+    """
+    Status kesiapan model embedding untuk endpoint readiness.
+    """
+    return {
+        "model": embedding_model_name,
+        "backend": _embedding_model_backend or EMBEDDING_BACKEND,
+        "parity_min_cosine": _embedding_parity_min_cosine,
+        "state": _embedding_model_state,
+        "ready": is_embedding_model_ready(),
+        "load_seconds": _embedding_model_load_seconds,
+        "error": _embedding_model_error,
+    }
+
+EMBEDDING_DIMENSION = 384 # Dimensi output 'all-MiniLM-L6-v2'
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64")) # Ukuran batch default untuk get_embeddings
+# Inferensi embedding dijalankan di thread pool khusus agar tidak memblokir event loop asyncio.
+EMBEDDING_EXECUTOR_WORKERS = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "2"))
+# Jumlah maksimum permintaan yang boleh menunggu di antrean executor sebelum ditolak (HTTP 503).
+EMBEDDING_MAX_QUEUE_SIZE = int(os.getenv("EMBEDDING_MAX_QUEUE_SIZE", "64"))
+# Micro-batching kueri: permintaan embedding yang tiba berdekatan dikumpulkan selama maksimal
+# EMBEDDING_MICROBATCH_MAX_WAIT_MS milidetik atau EMBEDDING_MICROBATCH_MAX_SIZE item, lalu di-encode sekaligus.
+EMBEDDING_MICROBATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MICROBATCH_MAX_WAIT_MS", "5"))
+EMBEDDING_MICROBATCH_MAX_SIZE = int(os.getenv("EMBEDDING_MICROBATCH_MAX_SIZE", "32"))
+# Jumlah maksimum embedding kueri yang di-cache (~1.5 KB per entri sebagai float32 384 dimensi).
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
@@ -47,6 +219,16 @@ GENERATION_CONFIG = {
   "max_output_tokens": 8192, # Sesuaikan sesuai kebutuhan
 }
 
+# Nama model Gemini dan versi prompt untuk generasi kurikulum.
+# Keduanya menjadi bagian dari kunci cache kurikulum: ubah CURRICULUM_PROMPT_VERSION setiap kali
+# prompt di generate_curriculum_from_goal diubah agar hasil lama tidak dipakai lagi.
+CURRICULUM_MODEL_NAME = os.getenv("CURRICULUM_MODEL_NAME", "gemini-1.5-flash-latest")
+CURRICULUM_PROMPT_VERSION = "v1"
+
+# Jumlah maksimum permintaan detail modul (langkah 2) yang dikirim ke Gemini secara bersamaan.
+# Sesuaikan dengan kuota/rate limit API yang tersedia.
+CURRICULUM_MODULE_CONCURRENCY = int(os.getenv("CURRICULUM_MODULE_CONCURRENCY", "4"))
+
 SAFETY_SETTINGS = [
   {
     "category": "HARM_CATEGORY_HARASSMENT",
@@ -87,10 +269,13 @@ def parse_gemini_json_response(response_text: str) -> Dict[str, Any]:
         print(f"Response text was: {response_text}")
         raise ValueError(f"Gagal mem-parse output JSON dari AI: {response_text}") from e
 
-async def generate_curriculum_from_goal(goal: str) -> Curriculum:
+async def generate_curriculum_from_goal(goal: str, max_concurrency: Optional[int] = None) -> Curriculum:
     """
     Menghasilkan struktur kurikulum pembelajaran berdasarkan tujuan (goal) yang diberikan pengguna,
     menggunakan Google Gemini API dengan prompt chaining.
+
+    Detail setiap modul (langkah 2) dihasilkan secara konkuren. `max_concurrency` membatasi
+    jumlah panggilan Gemini yang berjalan bersamaan (default: CURRICULUM_MODULE_CONCURRENCY).
     """
     if not GEMINI_API_KEY:
         # Mengembalikan struktur kosong atau error jika API key tidak ada
@@ -99,7 +284,7 @@ async def generate_curriculum_from_goal(goal: str) -> Curriculum:
         raise ValueError("GEMINI_API_KEY tidak dikonfigurasi. Tidak dapat menghasilkan kurikulum.")
 
     model = genai.GenerativeModel(
-        model_name="gemini-1.5-flash-latest", # Gunakan model yang mendukung output JSON jika memungkinkan
+        model_name=CURRICULUM_MODEL_NAME, # Gunakan model yang mendukung output JSON jika memungkinkan
         generation_config=GENERATION_CONFIG,
         safety_settings=SAFETY_SETTINGS,
         # system_instruction="Anda adalah asisten AI yang ahli dalam merancang kurikulum pembelajaran. Jawab selalu dalam format JSON yang valid."
@@ -149,8 +334,11 @@ async def generate_curriculum_from_goal(goal: str) -> Curriculum:
 
     # Langkah 2: Hasilkan detail untuk setiap modul
     # --------------------------------------------
-    generated_modules: List[Module] = []
-    for module_title in module_titles_str_list:
+    # Panggilan per modul dijalankan secara konkuren (dibatasi oleh semaphore) sehingga
+    # kurikulum dengan 10 modul tidak perlu menunggu 10 round trip LLM secara berurutan.
+    module_semaphore = asyncio.Semaphore(max(1, max_concurrency or CURRICULUM_MODULE_CONCURRENCY))
+
+    async def generate_module_details(module_title: str) -> Optional[Module]:
         prompt_step2 = f"""
         Anda adalah seorang perancang kurikulum ahli.
         Untuk sebuah modul pembelajaran dengan judul "{module_title}", yang merupakan bagian dari kurikulum untuk mencapai tujuan utama "{goal}", hasilkan detail berikut dalam format JSON yang ketat:
@@ -197,8 +385,10 @@ async def generate_curriculum_from_goal(goal: str) -> Curriculum:
             # )
             # response_step2 = await model_for_json.generate_content_async(prompt_step2)
 
-            # Untuk saat ini, kita gunakan model yang sama
-            response_step2 = await model.generate_content_async(prompt_step2)
+            # Untuk saat ini, kita gunakan model yang sama.
+            # Semaphore membatasi jumlah permintaan Gemini yang berjalan bersamaan.
+            async with module_semaphore:
+                response_step2 = await model.generate_content_async(prompt_step2)
 
             print(f"DEBUG: Response Step 2 (untuk modul '{module_title}', text): {response_step2.text}")
 
@@ -207,8 +397,7 @@ async def generate_curriculum_from_goal(goal: str) -> Curriculum:
             # Validasi dengan Pydantic (jika tidak, akan error saat pembuatan instance Module)
             # Pastikan semua field yang dibutuhkan ada dan tipenya benar
             # Pydantic akan melakukan validasi saat membuat instance Module
-            current_module = Module(**module_data_json)
-            generated_modules.append(current_module)
+            return Module(**module_data_json)
 
         except Exception as e:
             print(f"Error pada Langkah 2 (Generasi Detail Modul untuk '{module_title}'): {e}")
@@ -217,9 +406,15 @@ async def generate_curriculum_from_goal(goal: str) -> Curriculum:
             # Untuk sekarang, kita akan mencatat error dan melanjutkan (modul ini tidak akan ditambahkan).
             # Jika ini sering terjadi, prompt atau model mungkin perlu penyesuaian.
             # Atau, tambahkan modul placeholder:
-            # generated_modules.append(Module(title=module_title, description=f"Gagal menghasilkan detail untuk modul ini: {e}", topics=[], learning_objectives=[], keywords=[]))
-            continue # Lanjutkan ke judul modul berikutnya
+            # return Module(title=module_title, description=f"Gagal menghasilkan detail untuk modul ini: {e}", topics=[], learning_objectives=[], keywords=[])
+            return None # Modul ini dilewati, modul lain tetap diproses
 
+    # asyncio.gather mengembalikan hasil sesuai urutan input, jadi urutan modul tetap
+    # sama dengan urutan judul dari langkah 1. Modul yang gagal (None) dilewati.
+    module_results = await asyncio.gather(
+        *(generate_module_details(module_title) for module_title in module_titles_str_list)
+    )
+    generated_modules: List[Module] = [module for module in module_results if module is not None]
 
     # Buat objek Kurikulum akhir
     # Anda mungkin ingin AI menghasilkan judul dan deskripsi kurikulum secara keseluruhan juga.
@@ -264,6 +459,68 @@ async def generate_curriculum_from_goal(goal: str) -> Curriculum:
 #     asyncio.run(main_test())
 
 
+def normalize_query_text(text: str) -> str:
+    """
+    Normalisasi teks kueri untuk kunci cache embedding: huruf kecil dan spasi diringkas.
+    'all-MiniLM-L6-v2' adalah model uncased, jadi huruf kecil tidak mengubah hasil embedding.
+    """
+    return " ".join(text.split()).lower()
+
+
+class EmbeddingCache:
+    """
+    Cache LRU untuk embedding kueri, dengan kunci (nama model, teks ternormalisasi).
+    Vektor disimpan sebagai array NumPy float32 read-only (jauh lebih hemat memori daripada list float Python).
+    """
+
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, normalized_text: str) -> Optional[np.ndarray]:
+        key = (embedding_model_name, normalized_text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def set(self, normalized_text: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        vector = np.array(vector, dtype=np.float32) # Salinan sendiri agar tidak berbagi memori dengan batch
+        vector.flags.writeable = False
+        key = (embedding_model_name, normalized_text)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+query_embedding_cache = EmbeddingCache()
+
+
 def get_embedding(text: str) -> Optional[List[float]]:
     """
     Menghasilkan embedding vektor untuk teks yang diberikan menggunakan model Sentence Transformer.
@@ -275,21 +532,296 @@ def get_embedding(text: str) -> Optional[List[float]]:
         Daftar float yang mewakili embedding vektor (384 dimensi untuk 'all-MiniLM-L6-v2'),
         atau None jika model embedding tidak berhasil dimuat atau teks kosong.
     """
-    if embedding_model is None:
+    model = load_embedding_model() # Dimuat secara lazy jika belum (memblokir sampai selesai)
+    if model is None:
         print("Error: Model embedding tidak tersedia. Tidak dapat menghasilkan embedding.")
         return None
     if not text or not text.strip():
         print("Peringatan: Teks input untuk embedding kosong atau hanya berisi spasi.")
         return None # Atau kembalikan embedding untuk string kosong jika model mendukungnya secara berbeda
 
+    normalized_text = normalize_query_text(text)
+    cached_vector = query_embedding_cache.get(normalized_text)
+    if cached_vector is not None:
+        return cached_vector.tolist()
+
     try:
         # Model SentenceTransformer.encode() mengembalikan array NumPy secara default.
         # Kita perlu mengonversinya ke daftar Python standar untuk kompatibilitas JSON dan pgvector.
-        embedding_vector = embedding_model.encode(text)
+        embedding_vector = model.encode(normalized_text)
+        query_embedding_cache.set(normalized_text, embedding_vector)
         return embedding_vector.tolist() # Konversi numpy.ndarray ke list[float]
     except Exception as e:
         print(f"Error saat menghasilkan embedding untuk teks '{text[:50]}...': {e}")
         return None
+
+def get_embeddings(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> Tuple[np.ndarray, List[bool]]:
+    """
+    Menghasilkan embedding untuk banyak teks sekaligus dengan encoding per batch.
+    Jauh lebih cepat daripada memanggil get_embedding() untuk setiap teks karena model
+    memproses satu batch dalam satu forward pass.
+
+    Args:
+        texts: Daftar teks yang akan di-embed.
+        batch_size: Jumlah teks per panggilan encode().
+
+    Returns:
+        Tuple (embeddings, valid):
+        - embeddings: array NumPy float32 C-contiguous berbentuk (len(texts), 384).
+          Baris untuk teks yang gagal berisi nol.
+        - valid: daftar boolean sepanjang len(texts); False berarti teks tersebut kosong atau
+          gagal di-embed (setara dengan get_embedding() mengembalikan None) dan harus dilewati.
+    """
+    embeddings = np.zeros((len(texts), EMBEDDING_DIMENSION), dtype=np.float32)
+    valid = [False] * len(texts)
+
+    model = load_embedding_model() # Dimuat secara lazy jika belum (memblokir sampai selesai)
+    if model is None:
+        print("Error: Model embedding tidak tersedia. Tidak dapat menghasilkan embedding.")
+        return embeddings, valid
+
+    # Teks kosong dilewati seperti pada get_embedding()
+    indices = [i for i, text in enumerate(texts) if text and text.strip()]
+    if len(indices) < len(texts):
+        print(f"Peringatan: {len(texts) - len(indices)} teks input untuk embedding kosong dan dilewati.")
+
+    batch_size = max(1, batch_size)
+    for start in range(0, len(indices), batch_size):
+        batch_indices = indices[start:start + batch_size]
+        batch_texts = [texts[i] for i in batch_indices]
+        try:
+            embeddings[batch_indices] = model.encode(batch_texts, batch_size=batch_size, convert_to_numpy=True)
+            for i in batch_indices:
+                valid[i] = True
+        except Exception as e:
+            # Jika satu batch gagal, encode ulang per item agar hanya teks yang bermasalah yang dilewati
+            print(f"Error saat menghasilkan embedding untuk batch {start // batch_size + 1}: {e}. Mencoba per item.")
+            for i in batch_indices:
+                try:
+                    embeddings[i] = model.encode(texts[i], convert_to_numpy=True)
+                    valid[i] = True
+                except Exception as item_error:
+                    print(f"Error saat menghasilkan embedding untuk teks '{texts[i][:50]}...': {item_error}")
+
+    return embeddings, valid
+
+
+class EmbeddingQueueFullError(RuntimeError):
+    """
+    Dimunculkan ketika antrean executor embedding penuh. Endpoint sebaiknya mengembalikan HTTP 503.
+    """
+
+
+class EmbeddingExecutor:
+    """
+    Thread pool berbatas untuk inferensi SentenceTransformer, dengan metrik kedalaman antrean
+    dan waktu tunggu. Permintaan baru ditolak dengan EmbeddingQueueFullError jika antrean penuh,
+    sehingga lonjakan trafik tidak membuat latensi tumbuh tanpa batas.
+    """
+
+    def __init__(self, max_workers: int = EMBEDDING_EXECUTOR_WORKERS, max_queue_size: int = EMBEDDING_MAX_QUEUE_SIZE):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(0, max_queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embedding")
+        self._lock = threading.Lock()
+        self._in_flight = 0 # Tugas yang sedang menunggu atau berjalan
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def run(self, func, *args):
+        """
+        Menjalankan `func(*args)` di thread pool dan menunggu hasilnya tanpa memblokir event loop.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue_size:
+                self.rejected += 1
+                raise EmbeddingQueueFullError("Antrean embedding penuh. Silakan coba lagi nanti.")
+            self._in_flight += 1
+        submitted_at = time.perf_counter()
+
+        def task():
+            wait_seconds = time.perf_counter() - submitted_at
+            with self._lock:
+                self._running += 1
+                self.total_wait_seconds += wait_seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Mengembalikan metrik executor: kedalaman antrean, tugas berjalan, dan waktu tunggu.
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": max(0, self._in_flight - self._running),
+                "running": self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": (self.total_wait_seconds / self.completed * 1000) if self.completed else 0.0,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+embedding_executor = EmbeddingExecutor()
+
+
+class EmbeddingMicroBatcher:
+    """
+    Mengumpulkan permintaan embedding kueri dari banyak coroutine dan meng-encode-nya dalam satu
+    batch di embedding_executor, lalu mengirim hasilnya kembali ke masing-masing coroutine.
+
+    Batch dikirim ketika sudah berisi `max_batch_size` item atau setelah `max_wait_ms` sejak item
+    pertama tiba, mana yang lebih dulu. Di bawah beban tinggi, throughput naik karena satu forward pass
+    melayani banyak kueri; di bawah beban rendah latensi tambahan paling lama `max_wait_ms`.
+    """
+
+    def __init__(
+        self,
+        executor: EmbeddingExecutor,
+        max_batch_size: int = EMBEDDING_MICROBATCH_MAX_SIZE,
+        max_wait_ms: float = EMBEDDING_MICROBATCH_MAX_WAIT_MS,
+        max_pending: int = EMBEDDING_MAX_QUEUE_SIZE * EMBEDDING_MICROBATCH_MAX_SIZE
+    ):
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self.max_pending = max(1, max_pending)
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatch_tasks = set() # Referensi ke task batch yang berjalan agar tidak di-garbage-collect
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+
+    def _ensure_collector(self) -> None:
+        # Collector dibuat saat pertama kali dibutuhkan, terikat ke event loop yang sedang berjalan
+        loop = asyncio.get_running_loop()
+        if self._collector is None or self._collector.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._collector = loop.create_task(self._collect())
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """
+        Menunggu embedding untuk satu teks. Mengembalikan None jika teks kosong atau gagal di-embed.
+
+        Raises:
+            EmbeddingQueueFullError: jika terlalu banyak permintaan yang sedang menunggu.
+            EmbeddingModelNotReadyError: jika model embedding masih dimuat.
+        """
+        if not text or not text.strip():
+            print("Peringatan: Teks input untuk embedding kosong atau hanya berisi spasi.")
+            return None
+
+        # Kueri populer dilayani langsung dari cache tanpa masuk antrean
+        normalized_text = normalize_query_text(text)
+        cached_vector = query_embedding_cache.get(normalized_text)
+        if cached_vector is not None:
+            return cached_vector.tolist()
+
+        if not is_embedding_model_ready():
+            if _embedding_model_state == "failed":
+                return None # Sama seperti get_embedding() ketika model tidak tersedia
+            # Jangan biarkan permintaan menunggu pemuatan model; mulai pemuatan di background jika belum
+            start_embedding_model_warmup()
+            raise EmbeddingModelNotReadyError("Model embedding sedang dimuat. Silakan coba lagi sebentar lagi.")
+
+        self._ensure_collector()
+        if self._queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise EmbeddingQueueFullError("Antrean embedding penuh. Silakan coba lagi nanti.")
+
+        future = self._loop.create_future()
+        self._queue.put_nowait((normalized_text, future))
+        return await future
+
+    async def _collect(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                # Tidur sampai item berikutnya masuk atau jendela batch habis (tanpa polling)
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [(text, future) for text, future in batch if not future.done()] # Lewati yang dibatalkan
+            if batch:
+                # Batch dikirim sebagai task terpisah agar batch berikutnya bisa mulai dikumpulkan
+                task = self._loop.create_task(self._dispatch(batch))
+                self._dispatch_tasks.add(task)
+                task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, "asyncio.Future"]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            embeddings, valid = await self.executor.run(get_embeddings, [text for text, _ in batch], self.max_batch_size)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (text, future) in enumerate(batch):
+            if valid[i]:
+                query_embedding_cache.set(text, embeddings[i])
+            if not future.done():
+                future.set_result(embeddings[i].tolist() if valid[i] else None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Mengembalikan metrik micro-batching: jumlah batch, item, dan rata-rata ukuran batch.
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "rejected": self.rejected,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+embedding_batcher = EmbeddingMicroBatcher(embedding_executor)
+
+
+async def get_embedding_async(text: str) -> Optional[List[float]]:
+    """
+    Versi awaitable dari get_embedding() untuk endpoint async. Permintaan yang tiba berdekatan
+    di-encode bersama oleh embedding_batcher di embedding_executor, sehingga event loop
+    (dan stream /chat pengguna lain) tidak terblokir.
+
+    Raises:
+        EmbeddingQueueFullError: jika antrean embedding penuh.
+        EmbeddingModelNotReadyError: jika model embedding masih dimuat.
+    """
+    return await embedding_batcher.embed(text)
 ```
 
 Beberapa catatan penting tentang implementasi ini:
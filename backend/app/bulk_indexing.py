@@ -0,0 +1,277 @@
+"""
+Pipeline bulk indexing: dokumen -> potongan -> embedding per batch -> COPY / INSERT multi-baris.
+
+Potongan dari banyak dokumen dikumpulkan sampai BULK_INDEX_BATCH_CHUNKS, lalu di-embed dalam satu panggilan
+get_embeddings dan ditulis sekaligus. Penulisan batch N berjalan di thread terpisah sementara batch N+1
+di-embed, sehingga CPU (model) dan database bekerja bersamaan. Setiap batch di-commit sendiri, jadi
+kegagalan di tengah tidak membatalkan batch yang sudah tersimpan.
+
+Jalankan dari direktori backend:
+
+    python -m app.bulk_indexing --jsonl dokumen.jsonl --method copy --rebuild-index
+    python -m app.bulk_indexing --synthetic-docs 10000   # benchmark throughput tanpa scraping
+
+Format JSONL: satu objek per baris dengan kunci source_url, title, text_content, content_type (opsional).
+
+Menjalankan ulang load aman: dalam transaksi batch yang pertama kali menulis sebuah dokumen, SourceDocument-nya
+di-upsert (versi naik) dan potongan lama URL tersebut dihapus, sehingga dokumen diganti dan tidak terduplikasi.
+Semua potongan baru di-embed ulang; untuk mengindeks ulang satu URL dengan memakai ulang potongan yang tidak
+berubah, gunakan indexing.index_document.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .ai_services import get_embeddings
+from .chunking import iter_chunks
+from .indexing import copy_chunk_rows, insert_chunk_rows, make_chunk_row
+from .models import ContentType, LearningContent, SourceDocument
+from .search import normalize_source_domain
+
+# Jumlah potongan per batch embedding + penulisan
+BULK_INDEX_BATCH_CHUNKS = int(os.getenv("BULK_INDEX_BATCH_CHUNKS", "512"))
+# "copy" (COPY FROM STDIN, tercepat, tanpa ID) atau "insert" (INSERT multi-baris ... RETURNING id)
+BULK_INDEX_WRITE_METHOD = os.getenv("BULK_INDEX_WRITE_METHOD", "copy")
+BULK_INDEX_WRITE_METHODS = ("copy", "insert")
+
+
+class IndexDocument(NamedTuple):
+    source_url: str
+    title: str
+    text_content: str
+    content_type: ContentType = ContentType.ARTICLE
+
+
+# Potongan beserta nomor urut dokumennya dalam satu run (untuk mengenali dokumen yang terpecah di dua batch)
+ChunkItem = Tuple[int, Dict[str, Any]]
+
+
+def _iter_chunk_rows(documents: Iterable[IndexDocument], report: Dict[str, Any]) -> Iterator[ChunkItem]:
+    """
+    Memecah dokumen secara streaming; dokumen dibaca satu per satu dari iterable.
+    Baris yang dihasilkan belum berisi embedding; document_version diisi saat penulisan (_write_batch).
+    """
+    for document in documents:
+        report["documents"] += 1
+        if not document.text_content or not document.text_content.strip():
+            report["skipped_documents"] += 1
+            continue
+        source_domain = normalize_source_domain(document.source_url)
+        document_number = report["documents"]
+        for i, chunk in enumerate(iter_chunks(document.text_content)):
+            yield document_number, make_chunk_row(document.source_url, source_domain, document.title, document.content_type, chunk, None, i)
+
+
+def _claim_documents(db: Session, first_rows: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Meng-upsert SourceDocument untuk URL yang mulai ditulis di batch ini (versi naik, chunk_count direset) dan
+    menghapus potongan lama URL tersebut, di transaksi batch. Baris SourceDocument terkunci sampai commit, jadi
+    tidak bertabrakan dengan index_document untuk URL yang sama. Mengembalikan URL -> versi baru.
+    content_hash dikosongkan: index_document berikutnya tidak melewati dokumen ini, tetapi tetap memakai ulang
+    potongannya berdasarkan hash potongan.
+    """
+    urls = sorted(first_rows) # Urutan kunci yang sama antar proses
+    statement = pg_insert(SourceDocument).values([
+        {
+            "source_url": url, "title": first_rows[url]["title"], "content_type": first_rows[url]["content_type"],
+            "content_hash": None, "version": 1, "chunk_count": 0,
+        }
+        for url in urls
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[SourceDocument.source_url],
+        set_={
+            "title": statement.excluded.title,
+            "content_type": statement.excluded.content_type,
+            "content_hash": None,
+            "version": SourceDocument.version + 1,
+            "chunk_count": 0,
+        }
+    ).returning(SourceDocument.source_url, SourceDocument.version)
+    versions = {row.source_url: row.version for row in db.execute(statement)}
+    db.execute(
+        delete(LearningContent)
+        .where(LearningContent.source_url.in_(urls))
+        .execution_options(synchronize_session=False)
+    )
+    return versions
+
+
+def _write_batch(db: Session, items: List[ChunkItem], method: str, claimed: Dict[str, Tuple[int, int]]) -> float:
+    """
+    Menulis satu batch dalam satu transaksi. `claimed` (URL -> (nomor dokumen, versi)) hanya dipakai thread
+    penulis: dokumen yang terpecah di beberapa batch diklaim sekali, di batch pertamanya. Jika sebuah URL muncul
+    lagi sebagai dokumen lain dalam run yang sama, kemunculan terakhir menggantikan yang sebelumnya.
+    """
+    started_at = time.perf_counter()
+    last_document: Dict[str, int] = {}
+    for document_number, row in items:
+        last_document[row["source_url"]] = document_number
+    items = [(document_number, row) for document_number, row in items if last_document[row["source_url"]] == document_number]
+    first_rows: Dict[str, Dict[str, Any]] = {}
+    for document_number, row in items:
+        if claimed.get(row["source_url"], (None,))[0] != document_number:
+            first_rows.setdefault(row["source_url"], row)
+    rows = [row for _, row in items]
+    chunk_counts: Dict[str, int] = {}
+    for row in rows:
+        chunk_counts[row["source_url"]] = chunk_counts.get(row["source_url"], 0) + 1
+
+    try:
+        versions = _claim_documents(db, first_rows) if first_rows else {}
+        for row in rows:
+            url = row["source_url"]
+            row["document_version"] = versions[url] if url in versions else claimed[url][1]
+        if method == "copy":
+            copy_chunk_rows(db, rows)
+        else:
+            insert_chunk_rows(db, rows)
+        db.execute(
+            update(SourceDocument.__table__)
+            .where(SourceDocument.__table__.c.source_url == bindparam("b_url"))
+            .values(chunk_count=SourceDocument.__table__.c.chunk_count + bindparam("b_count")),
+            [{"b_url": url, "b_count": count} for url, count in sorted(chunk_counts.items())]
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    claimed.update({url: (last_document[url], version) for url, version in versions.items()})
+    return time.perf_counter() - started_at
+
+
+def bulk_index_documents(
+    db: Session,
+    documents: Iterable[IndexDocument],
+    batch_chunks: int = BULK_INDEX_BATCH_CHUNKS,
+    method: str = BULK_INDEX_WRITE_METHOD,
+    rebuild_index: bool = False
+) -> Dict[str, Any]:
+    """
+    Mengindeks banyak dokumen dan mengembalikan laporan throughput (chunks/s, waktu embedding dan penulisan).
+    `documents` boleh berupa generator; dokumen tidak dimuat semuanya ke memori.
+    Jika `rebuild_index`, indeks ANN dibangun ulang setelah load (lebih cepat daripada memperbarui graf per baris).
+    """
+    if method not in BULK_INDEX_WRITE_METHODS:
+        raise ValueError(f"Metode penulisan tidak dikenal: '{method}'. Pilih dari: {', '.join(BULK_INDEX_WRITE_METHODS)}")
+
+    report: Dict[str, Any] = {
+        "documents": 0, "skipped_documents": 0, "chunks": 0, "failed_chunks": 0, "batches": 0,
+        "embed_seconds": 0.0, "write_seconds": 0.0,
+    }
+    started_at = time.perf_counter()
+    # Satu thread penulis: sesi hanya dipakai oleh thread ini selama penulisan berjalan,
+    # dan thread utama menunggu penulisan sebelumnya selesai sebelum mengirim batch berikutnya.
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-index-writer")
+    pending_write: Optional[Future] = None
+    claimed: Dict[str, Tuple[int, int]] = {} # Hanya diakses thread penulis (lihat _write_batch)
+
+    def flush(items: List[ChunkItem]) -> None:
+        nonlocal pending_write
+        embed_started_at = time.perf_counter()
+        embeddings, valid = get_embeddings([row["text_chunk"] for _, row in items])
+        report["embed_seconds"] += time.perf_counter() - embed_started_at
+        ready_items = []
+        for (document_number, row), embedding, is_valid in zip(items, embeddings, valid):
+            if is_valid:
+                row["embedding"] = embedding
+                ready_items.append((document_number, row))
+        report["failed_chunks"] += len(items) - len(ready_items)
+
+        if not ready_items:
+            return
+        if pending_write is not None:
+            report["write_seconds"] += pending_write.result() # Meneruskan error penulisan sebelumnya
+        pending_write = writer.submit(_write_batch, db, ready_items, method, claimed)
+        report["chunks"] += len(ready_items)
+        report["batches"] += 1
+        elapsed = time.perf_counter() - started_at
+        print(f"Bulk indexing: {report['documents']} dokumen, {report['chunks']} potongan ({report['chunks'] / elapsed:.1f} potongan/detik)")
+
+    try:
+        batch: List[ChunkItem] = []
+        for item in _iter_chunk_rows(documents, report):
+            batch.append(item)
+            if len(batch) >= batch_chunks:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        if pending_write is not None:
+            report["write_seconds"] += pending_write.result()
+    finally:
+        writer.shutdown(wait=True)
+
+    total_seconds = time.perf_counter() - started_at
+    report.update({
+        "method": method,
+        "total_seconds": round(total_seconds, 3),
+        "embed_seconds": round(report["embed_seconds"], 3),
+        "write_seconds": round(report["write_seconds"], 3),
+        "chunks_per_second": round(report["chunks"] / total_seconds, 1) if total_seconds > 0 else 0.0,
+    })
+
+    if rebuild_index and report["chunks"]:
+        from .vector_index import rebuild_vector_index
+        report["vector_index"] = rebuild_vector_index(db)
+    print(f"Bulk indexing selesai: {report['chunks']} potongan dalam {report['total_seconds']:.1f} detik ({report['chunks_per_second']} potongan/detik).")
+    return report
+
+
+def read_jsonl_documents(path: str) -> Iterator[IndexDocument]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            yield IndexDocument(
+                source_url=data["source_url"],
+                title=data.get("title") or data["source_url"],
+                text_content=data.get("text_content") or "",
+                content_type=ContentType(data.get("content_type", ContentType.ARTICLE.value)),
+            )
+
+
+def synthetic_documents(count: int, paragraphs: int = 8) -> Iterator[IndexDocument]:
+    """
+    Dokumen sintetis (~paragraphs x 600 karakter) untuk mengukur throughput tanpa scraping.
+    """
+    paragraph = (
+        "Fungsi adalah blok kode yang dapat digunakan ulang. Dalam Python, fungsi didefinisikan dengan kata kunci def, "
+        "menerima parameter, dan dapat mengembalikan nilai. Dokumen ini membahas parameter default, argumen kata kunci, "
+        "serta praktik terbaik dalam menulis fungsi yang mudah diuji dan dipelihara oleh tim. "
+    ) * 2
+    for i in range(count):
+        yield IndexDocument(
+            source_url=f"https://bulk.example.com/dokumen/{i}",
+            title=f"Dokumen Bulk {i}",
+            text_content="\n\n".join(f"Bagian {p} dokumen {i}. {paragraph}" for p in range(paragraphs)),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk indexing LearningContent MentorAI.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jsonl", help="File JSONL berisi dokumen yang akan diindeks.")
+    source.add_argument("--synthetic-docs", type=int, help="Jumlah dokumen sintetis untuk benchmark.")
+    parser.add_argument("--method", default=BULK_INDEX_WRITE_METHOD, choices=BULK_INDEX_WRITE_METHODS)
+    parser.add_argument("--batch-chunks", type=int, default=BULK_INDEX_BATCH_CHUNKS)
+    parser.add_argument("--rebuild-index", action="store_true", help="Bangun ulang indeks ANN setelah load.")
+    args = parser.parse_args()
+
+    from .database import SessionLocal, create_db_and_tables
+    create_db_and_tables()
+    db = SessionLocal()
+    try:
+        documents = read_jsonl_documents(args.jsonl) if args.jsonl else synthetic_documents(args.synthetic_docs)
+        result = bulk_index_documents(db, documents, args.batch_chunks, args.method, args.rebuild_index)
+        print(json.dumps(result, indent=2, default=str))
+    finally:
+        db.close()
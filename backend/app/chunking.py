@@ -0,0 +1,275 @@
+"""
+Pemecah teks streaming dengan ukuran potongan berbasis token tokenizer model embedding.
+
+Model embedding memotong input pada batas token (all-MiniLM-L6-v2: 256 token termasuk [CLS]/[SEP]),
+sehingga potongan berukuran karakter bisa kehilangan ekornya tanpa terlihat. TextChunker:
+- mengukur potongan dalam token tokenizer model (atau karakter jika CHUNK_SIZE_UNIT=chars);
+- menghasilkan potongan dari generator (iter_chunks), tanpa membangun daftar semua potongan;
+- men-tokenisasi setiap paragraf sekali (dengan offset karakter); jumlah token untuk baris, kata, dan potongan
+  dihitung dari offset tersebut dengan bisect, bukan dengan tokenisasi ulang;
+- merepresentasikan bagian teks sebagai rentang (awal, akhir) pada teks asli, sehingga potongan adalah satu
+  slice teks asli (spasi dan baris baru asli dipertahankan);
+- dipakai ulang: tokenizer dimuat sekali per proses (get_chunker).
+
+Pemisahan bertingkat mengikuti RecursiveCharacterTextSplitter: paragraf (baris kosong), baris, kata, lalu
+potongan paksa per token untuk "kata" yang sangat panjang (misalnya URL atau base64). Overlap diambil dari
+bagian utuh di akhir potongan sebelumnya.
+
+Benchmark terhadap data_ingestion.chunk_text, dari direktori backend:
+
+    python -m app.chunking --doc-mb 20
+"""
+import os
+import re
+import time
+import argparse
+import threading
+import tracemalloc
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, Optional, Sequence, Tuple
+
+CHUNK_SIZE_UNIT = os.getenv("CHUNK_SIZE_UNIT", "tokens") # "tokens" (tokenizer model embedding) atau "chars"
+CHUNK_SIZE_UNITS = ("tokens", "chars")
+# all-MiniLM-L6-v2 memotong input pada 256 token termasuk token khusus; 200 menyisakan ruang aman
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "30"))
+# Dipakai jika CHUNK_SIZE_UNIT=chars atau tokenizer tidak dapat dimuat (sama dengan chunk_text)
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1000"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", "150"))
+CHUNK_TOKENIZER_NAME = os.getenv("CHUNK_TOKENIZER_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+
+_PARAGRAPH_SEPARATOR = re.compile(r"\n[ \t\r\f\v]*\n")
+_LINE = re.compile(r"[^\n]+")
+_WORD = re.compile(r"\S+")
+
+# Bagian teks: (awal, akhir, jumlah token) relatif terhadap teks dokumen
+Piece = Tuple[int, int, int]
+
+
+class TextChunker:
+    """
+    Pemecah teks yang dapat dipakai ulang. `tokenizer` adalah tokenizer HuggingFace "fast"
+    (mendukung return_offsets_mapping); jika None, ukuran dihitung dalam karakter.
+    """
+
+    def __init__(self, max_tokens: int, overlap_tokens: int, tokenizer: Optional[Any] = None):
+        if overlap_tokens >= max_tokens:
+            raise ValueError(f"Overlap ({overlap_tokens}) harus lebih kecil dari ukuran potongan ({max_tokens}).")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer
+
+    @property
+    def unit(self) -> str:
+        return "tokens" if self.tokenizer is not None else "chars"
+
+    def _token_starts(self, text: str) -> Sequence[int]:
+        """
+        Offset karakter awal setiap token pada `text`. Mode karakter memakai range (tanpa alokasi).
+        """
+        if self.tokenizer is None:
+            return range(len(text))
+        encoding = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True,
+            return_attention_mask=False, return_token_type_ids=False, verbose=False
+        )
+        return [start for start, _ in encoding["offset_mapping"]]
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._token_starts(text))
+
+    def _split(self, text: str, start: int, end: int, base: int, token_starts: Sequence[int], level: int) -> Iterator[Piece]:
+        """
+        Memecah rentang [start, end) (relatif terhadap paragraf yang berawal di `base`) menjadi bagian
+        yang masing-masing <= max_tokens: per baris (level 0), per kata (level 1), lalu paksa per token.
+        """
+        lo = bisect_left(token_starts, start)
+        count = bisect_left(token_starts, end, lo) - lo
+        if count <= self.max_tokens:
+            if count:
+                yield (base + start, base + end, count)
+            return
+        if level < 2:
+            pattern = _LINE if level == 0 else _WORD
+            for match in pattern.finditer(text, start, end):
+                yield from self._split(text, match.start(), match.end(), base, token_starts, level + 1)
+            return
+        # Satu "kata" lebih panjang dari max_tokens: potong di batas token
+        hi = lo + count
+        for window_start in range(lo, hi, self.max_tokens):
+            window_end = min(window_start + self.max_tokens, hi)
+            piece_end = token_starts[window_end] if window_end < hi else end
+            yield (base + token_starts[window_start], base + piece_end, window_end - window_start)
+
+    def _iter_pieces(self, text: str) -> Iterator[Piece]:
+        position = 0
+        for separator in _PARAGRAPH_SEPARATOR.finditer(text):
+            yield from self._paragraph_pieces(text, position, separator.start())
+            position = separator.end()
+        yield from self._paragraph_pieces(text, position, len(text))
+
+    def _paragraph_pieces(self, text: str, start: int, end: int) -> Iterator[Piece]:
+        paragraph = text[start:end]
+        stripped = paragraph.strip()
+        if not stripped:
+            return
+        offset = len(paragraph) - len(paragraph.lstrip())
+        yield from self._split(stripped, 0, len(stripped), start + offset, self._token_starts(stripped), 0)
+
+    def _span(self, window: Deque[Piece], total: int, piece: Optional[Piece] = None) -> int:
+        """
+        Ukuran potongan text[window[0].start:end], dengan end = akhir `piece` (jika ada) atau akhir window.
+        Mode karakter memakai panjang rentang, termasuk spasi/baris di antara bagian; mode token memakai
+        jumlah token bagian (`total`), karena spasi di antara bagian tidak menjadi token.
+        """
+        if self.tokenizer is None:
+            return (piece[1] if piece is not None else window[-1][1]) - window[0][0]
+        return total + (piece[2] if piece is not None else 0)
+
+    def iter_chunks(self, text: str) -> Iterator[str]:
+        """
+        Menghasilkan potongan teks (masing-masing <= max_tokens) secara berurutan.
+        """
+        if not text or text.isspace():
+            return
+        window: Deque[Piece] = deque()
+        total = 0
+        for piece in self._iter_pieces(text):
+            if window and self._span(window, total, piece) > self.max_tokens:
+                yield text[window[0][0]:window[-1][1]]
+                # Pertahankan bagian di akhir potongan sebagai overlap, selama muat bersama bagian berikutnya
+                while window and (self._span(window, total) > self.overlap_tokens or self._span(window, total, piece) > self.max_tokens):
+                    total -= window.popleft()[2]
+            window.append(piece)
+            total += piece[2]
+        if window:
+            yield text[window[0][0]:window[-1][1]]
+
+
+def load_tokenizer(name: str = CHUNK_TOKENIZER_NAME) -> Optional[Any]:
+    """
+    Memuat tokenizer "fast" model embedding. Instance terpisah dari milik SentenceTransformer: tokenizer Rust
+    tidak aman dipakai bersamaan dengan pengaturan truncation yang berbeda ("Already borrowed").
+    """
+    try:
+        from transformers import AutoTokenizer # Impor berat, ditunda sampai dibutuhkan
+        tokenizer = AutoTokenizer.from_pretrained(name, use_fast=True)
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("tokenizer tidak mendukung offset mapping")
+        return tokenizer
+    except Exception as e:
+        print(f"PERINGATAN: Gagal memuat tokenizer '{name}' untuk chunking: {e}. Ukuran potongan dihitung dalam karakter.")
+        return None
+
+
+_chunker: Optional[TextChunker] = None
+_chunker_lock = threading.Lock()
+
+
+def get_chunker() -> TextChunker:
+    """
+    Chunker bersama untuk proses ini (tokenizer dimuat sekali, saat pertama dipakai).
+    """
+    global _chunker
+    if _chunker is None:
+        with _chunker_lock:
+            if _chunker is None:
+                if CHUNK_SIZE_UNIT not in CHUNK_SIZE_UNITS:
+                    raise ValueError(f"CHUNK_SIZE_UNIT tidak dikenal: '{CHUNK_SIZE_UNIT}'. Pilih dari: {', '.join(CHUNK_SIZE_UNITS)}")
+                tokenizer = load_tokenizer() if CHUNK_SIZE_UNIT == "tokens" else None
+                if tokenizer is not None:
+                    _chunker = TextChunker(CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, tokenizer)
+                else:
+                    _chunker = TextChunker(CHUNK_MAX_CHARS, CHUNK_OVERLAP_CHARS)
+    return _chunker
+
+
+def iter_chunks(text: str) -> Iterator[str]:
+    """
+    Menghasilkan potongan teks dengan chunker bersama (lihat CHUNK_SIZE_UNIT).
+    """
+    return get_chunker().iter_chunks(text)
+
+
+def synthetic_document(target_bytes: int) -> str:
+    """
+    Dokumen sintetis campuran paragraf pendek, paragraf panjang tanpa baris kosong, daftar, dan URL panjang.
+    """
+    sentence = "Struktur data menentukan bagaimana program menyimpan dan mengakses informasi secara efisien. "
+    blocks = [
+        sentence * 3,
+        (sentence * 6 + "\n") * 8, # Paragraf panjang dengan baris tunggal
+        "\n".join(f"- Langkah {i}: jalankan pengujian dan catat hasilnya." for i in range(12)),
+        "Referensi: https://contoh.example.com/" + "a1b2c3d4" * 150, # "Kata" yang sangat panjang
+    ]
+    parts, size, i = [], 0, 0
+    while size < target_bytes:
+        block = blocks[i % len(blocks)]
+        parts.append(block)
+        size += len(block) + 2
+        i += 1
+    return "\n\n".join(parts)
+
+
+def _measure(fn) -> Dict[str, Any]:
+    # Waktu dan memori diukur pada dua jalankan terpisah: tracemalloc memperlambat kode yang banyak alokasi
+    started_at = time.perf_counter()
+    chunks, characters = fn()
+    seconds = time.perf_counter() - started_at
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"chunks": chunks, "characters": characters, "seconds": round(seconds, 3), "peak_mb": round(peak / 1e6, 1)}
+
+
+def benchmark(doc_mb: float = 20.0) -> Dict[str, Any]:
+    """
+    Membandingkan chunk_text (daftar penuh, ukuran karakter) dengan TextChunker (generator) pada satu dokumen besar.
+    Untuk setiap implementasi juga dihitung token maksimum per potongan dan jumlah potongan yang melebihi
+    batas model (256 token), jika tokenizer tersedia. Memori diukur dengan tracemalloc (di luar dokumen itu sendiri).
+    """
+    text = synthetic_document(int(doc_mb * 1e6))
+    chunker = get_chunker()
+    report: Dict[str, Any] = {"document_mb": round(len(text.encode("utf-8")) / 1e6, 1), "chunker_unit": chunker.unit}
+
+    def run_streaming():
+        chunks = characters = 0
+        for chunk in chunker.iter_chunks(text):
+            chunks += 1
+            characters += len(chunk)
+        return chunks, characters
+    report["streaming"] = _measure(run_streaming)
+
+    try:
+        from .data_ingestion import chunk_text
+        def run_legacy():
+            chunks = chunk_text(text)
+            return len(chunks), sum(len(chunk) for chunk in chunks)
+        report["legacy"] = _measure(run_legacy)
+    except ImportError as e:
+        report["legacy"] = {"error": f"chunk_text tidak tersedia: {e}"}
+
+    if chunker.tokenizer is not None:
+        model_limit = 256 - 2 # Tanpa [CLS]/[SEP]
+        samples = {"streaming": islice(chunker.iter_chunks(text), 2000)}
+        if "error" not in report["legacy"]:
+            samples["legacy"] = islice(chunk_text(text), 2000)
+        for name, chunks in samples.items():
+            counts = [chunker.count_tokens(chunk) for chunk in chunks]
+            report[name].update({"max_tokens": max(counts), "over_model_limit": sum(count > model_limit for count in counts)})
+
+    for name in ("streaming", "legacy"):
+        if "seconds" in report[name] and report[name]["seconds"] > 0:
+            report[name]["mb_per_second"] = round(report["document_mb"] / report[name]["seconds"], 2)
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    parser = argparse.ArgumentParser(description="Benchmark pemecah teks streaming.")
+    parser.add_argument("--doc-mb", type=float, default=20.0, help="Ukuran dokumen sintetis (MB).")
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.doc_mb), indent=2))
@@ -0,0 +1,262 @@
+import os
+import time
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, event, select, update
+from sqlalchemy.orm import Session
+
+from . import gamification_service
+from .database import SessionLocal
+from .models import CounterDelta, CounterTarget, ForumPost, ForumReply, User
+
+# Agregasi write-behind untuk kolom hitungan yang sering diperbarui (upvotes postingan/balasan, XP pengguna).
+# - Transaksi vote hanya menyisipkan baris jurnal counter_deltas (tahan lama, tanpa mengunci baris yang "panas").
+# - Setelah commit, delta dicatat di buffer in-process dan dijumlahkan per (kolom, baris).
+# - Thread flush setiap COUNTER_FLUSH_INTERVAL_MS mengklaim baris jurnalnya dengan DELETE ... RETURNING lalu
+#   menerapkan jumlah delta per baris dengan UPDATE batch dalam transaksi yang sama; flush terakhir saat shutdown.
+# - Karena klaim dilakukan dengan DELETE, setiap delta diterapkan tepat sekali walaupun beberapa proses
+#   (atau pemulihan) berjalan bersamaan. Baris jurnal yang tertinggal karena crash diterapkan oleh
+#   recover_pending() saat startup dan oleh sapuan berkala, hanya untuk baris yang lebih tua dari COUNTER_ORPHAN_SECONDS
+#   (baris yang lebih baru bisa jadi milik buffer worker lain yang masih hidup).
+FORUM_COUNTER_WRITE_BEHIND = os.getenv("FORUM_COUNTER_WRITE_BEHIND", "true").lower() == "true"
+COUNTER_FLUSH_INTERVAL_MS = int(os.getenv("COUNTER_FLUSH_INTERVAL_MS", "250"))
+COUNTER_FLUSH_MAX_ROWS = int(os.getenv("COUNTER_FLUSH_MAX_ROWS", "5000")) # Baris jurnal per transaksi flush
+COUNTER_ORPHAN_SECONDS = int(os.getenv("COUNTER_ORPHAN_SECONDS", "60"))
+
+_COUNTER_COLUMNS = {
+    CounterTarget.POST_UPVOTES: (ForumPost, ForumPost.upvotes),
+    CounterTarget.REPLY_UPVOTES: (ForumReply, ForumReply.upvotes),
+    CounterTarget.USER_XP: (User, User.xp_points),
+}
+
+# Kunci session.info untuk baris jurnal yang menunggu commit transaksi pemanggil
+_SESSION_PENDING_KEY = "pending_counter_deltas"
+
+CounterKey = Tuple[CounterTarget, int]
+
+
+def journal_deltas(db: Session, deltas: Iterable[Tuple[CounterTarget, int, int]]) -> None:
+    """
+    Menyisipkan delta (target, target_id, delta) ke jurnal dalam transaksi pemanggil. Tidak melakukan commit;
+    setelah transaksi di-commit, delta otomatis masuk ke counter_buffer (lihat _track_committed_deltas).
+    """
+    rows = [{"target": target, "target_id": target_id, "delta": delta} for target, target_id, delta in deltas if delta]
+    if not rows:
+        return
+    ids = db.execute(
+        CounterDelta.__table__.insert().returning(CounterDelta.id, sort_by_parameter_order=True),
+        rows
+    ).scalars().all()
+    pending = db.info.setdefault(_SESSION_PENDING_KEY, [])
+    pending.extend((journal_id, row["target"], row["target_id"], row["delta"]) for journal_id, row in zip(ids, rows))
+
+
+@event.listens_for(Session, "after_commit")
+def _track_committed_deltas(session: Session) -> None:
+    pending = session.info.pop(_SESSION_PENDING_KEY, None)
+    if pending:
+        counter_buffer.add(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_deltas(session: Session) -> None:
+    # Baris jurnalnya ikut di-rollback, jadi tidak ada yang perlu diterapkan
+    session.info.pop(_SESSION_PENDING_KEY, None)
+
+
+def _apply_claimed(db: Session, claimed: List[Any]) -> Dict[CounterKey, int]:
+    """
+    Menjumlahkan baris jurnal yang diklaim per (kolom, baris) lalu menerapkannya: satu UPDATE executemany per
+    kolom, diurutkan berdasarkan id agar proses yang flush bersamaan mengunci baris dalam urutan yang sama.
+    """
+    totals: Dict[CounterKey, int] = defaultdict(int)
+    for row in claimed:
+        totals[(CounterTarget(row.target), row.target_id)] += row.delta
+    for target, (model, column) in _COUNTER_COLUMNS.items():
+        params = [
+            {"b_id": target_id, "b_delta": delta}
+            for (row_target, target_id), delta in sorted(totals.items(), key=lambda item: item[0][1])
+            if row_target == target and delta
+        ]
+        if params:
+            db.execute(
+                update(model.__table__)
+                .where(model.__table__.c.id == bindparam("b_id"))
+                .values({column.key: column + bindparam("b_delta")}),
+                params
+            )
+    return totals
+
+
+def _award_badges(db: Session, totals: Dict[CounterKey, int]) -> None:
+    # Pemeriksaan lencana untuk pengguna yang XP-nya bertambah (sebelumnya dilakukan per vote)
+    user_ids = [target_id for (target, target_id), delta in totals.items() if target == CounterTarget.USER_XP and delta > 0]
+    if not user_ids:
+        return
+    for user in db.query(User).filter(User.id.in_(user_ids)).all():
+        gamification_service.check_and_award_new_badges(db=db, user=user)
+
+
+class CounterBuffer:
+    """
+    Buffer in-process untuk delta yang sudah di-commit ke jurnal tetapi belum diterapkan ke kolom hitungan.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, interval_ms: int = COUNTER_FLUSH_INTERVAL_MS):
+        self.session_factory = session_factory
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock() # Satu flush pada satu waktu per proses
+        self._entries: Dict[int, Tuple[CounterKey, int]] = {} # id jurnal -> (kolom, delta), urutan commit
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_orphan_sweep = time.monotonic()
+        self.flushes = 0
+        self.journal_rows_applied = 0
+        self.row_updates = 0
+        self.last_flush_error: Optional[str] = None
+
+    def add(self, entries: Iterable[Tuple[int, CounterTarget, int, int]]) -> None:
+        with self._lock:
+            for journal_id, target, target_id, delta in entries:
+                self._entries[journal_id] = ((target, target_id), delta)
+                self._pending[(target, target_id)] += delta
+
+    def pending_delta(self, target: CounterTarget, target_id: int) -> int:
+        """
+        Delta yang sudah di-commit di proses ini tetapi belum di-flush, untuk respons yang langsung menampilkan hitungan.
+        """
+        with self._lock:
+            return self._pending.get((target, target_id), 0)
+
+    def _claim_and_apply(self, condition) -> int:
+        """
+        Mengklaim (menghapus) baris jurnal yang memenuhi condition dan menerapkan deltanya dalam satu transaksi.
+        Mengembalikan jumlah baris jurnal yang diklaim.
+        """
+        db = self.session_factory()
+        try:
+            claimed = db.execute(
+                delete(CounterDelta)
+                .where(condition)
+                .returning(CounterDelta.target, CounterDelta.target_id, CounterDelta.delta)
+                .execution_options(synchronize_session=False)
+            ).all()
+            totals = _apply_claimed(db, claimed)
+            db.commit()
+            with self._lock:
+                self.journal_rows_applied += len(claimed)
+                self.row_updates += sum(1 for delta in totals.values() if delta)
+        except Exception:
+            db.rollback()
+            db.close()
+            raise
+        try:
+            if totals:
+                _award_badges(db, totals)
+        except Exception as e:
+            # Delta sudah tersimpan; kegagalan lencana tidak boleh membuat delta dicoba ulang
+            db.rollback()
+            print(f"PERINGATAN: Gagal memeriksa lencana setelah flush hitungan: {e}")
+        finally:
+            db.close()
+        return len(claimed)
+
+    def flush(self) -> int:
+        """
+        Menerapkan delta yang di-buffer proses ini. Mengembalikan jumlah baris jurnal yang diproses.
+        Jika gagal, delta tetap di buffer (baris jurnalnya juga tetap ada) dan dicoba lagi pada flush berikutnya.
+        """
+        with self._flush_lock:
+            with self._lock:
+                journal_ids = list(self._entries)[:COUNTER_FLUSH_MAX_ROWS]
+            if not journal_ids:
+                return 0
+            try:
+                self._claim_and_apply(CounterDelta.id.in_(journal_ids))
+            except Exception as e:
+                with self._lock:
+                    self.last_flush_error = str(e)
+                print(f"PERINGATAN: Gagal flush delta hitungan ({len(journal_ids)} baris jurnal): {e}")
+                return 0
+            with self._lock:
+                # Baris yang tidak terklaim di sini sudah diterapkan oleh pemulihan (recover_pending) di proses lain,
+                # jadi semua id yang diproses keluar dari buffer
+                for journal_id in journal_ids:
+                    key, delta = self._entries.pop(journal_id)
+                    self._pending[key] -= delta
+                    if not self._pending[key]:
+                        del self._pending[key]
+                self.flushes += 1
+            return len(journal_ids)
+
+    def recover_pending(self, older_than_seconds: int = 0) -> int:
+        """
+        Menerapkan baris jurnal yang tidak dimiliki buffer mana pun (proses crash sebelum flush).
+        Dipanggil saat startup dan berkala oleh thread flush dengan older_than_seconds=COUNTER_ORPHAN_SECONDS;
+        Aman dijalankan bersamaan dengan flush proses lain: setiap baris hanya dapat diklaim sekali. Namun
+        older_than_seconds=0 juga mengklaim baris milik buffer worker lain yang masih hidup, sehingga
+        current_upvotes di worker itu menghitung delta tersebut dua kali sampai flush berikutnya.
+        """
+        recovered = 0
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_seconds)
+        while True:
+            batch = select(CounterDelta.id)\
+                .where(CounterDelta.created_at <= cutoff)\
+                .order_by(CounterDelta.id)\
+                .limit(COUNTER_FLUSH_MAX_ROWS)
+            claimed = self._claim_and_apply(CounterDelta.id.in_(batch.scalar_subquery()))
+            if not claimed:
+                break
+            recovered += claimed
+        if recovered:
+            print(f"{recovered} baris jurnal delta yang tertinggal telah diterapkan.")
+        return recovered
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Menghentikan thread flush lalu mem-flush sisa delta (dipanggil saat shutdown).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        while self.flush():
+            pass
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_ms / 1000):
+            self.flush()
+            if time.monotonic() - self._last_orphan_sweep >= COUNTER_ORPHAN_SECONDS:
+                self._last_orphan_sweep = time.monotonic()
+                try:
+                    self.recover_pending(older_than_seconds=COUNTER_ORPHAN_SECONDS)
+                except Exception as e:
+                    print(f"PERINGATAN: Gagal menerapkan jurnal delta yang tertinggal: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": FORUM_COUNTER_WRITE_BEHIND,
+                "flush_interval_ms": self.interval_ms,
+                "buffered_journal_rows": len(self._entries),
+                "buffered_counters": len(self._pending),
+                "flushes": self.flushes,
+                "journal_rows_applied": self.journal_rows_applied,
+                "row_updates": self.row_updates,
+                "last_flush_error": self.last_flush_error,
+            }
+
+
+counter_buffer = CounterBuffer()
@@ -0,0 +1,298 @@
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .ai_services import CURRICULUM_MODEL_NAME, CURRICULUM_PROMPT_VERSION
+from .models import CurriculumCacheEntry
+from .schemas import Curriculum
+
+# Cache kurikulum dua tingkat:
+# 1. Tier in-process (LRU + TTL) untuk hit tercepat tanpa akses database.
+# 2. Tier persisten di tabel `curriculum_cache` agar cache tetap ada setelah restart/redeploy
+#    dan dapat dibagi antar worker uvicorn.
+# Cache hit di salah satu tier berarti Gemini tidak dipanggil sama sekali.
+CURRICULUM_CACHE_TTL_SECONDS = int(os.getenv("CURRICULUM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))) # Default 7 hari
+CURRICULUM_CACHE_MEMORY_MAX_ENTRIES = int(os.getenv("CURRICULUM_CACHE_MEMORY_MAX_ENTRIES", "256"))
+CURRICULUM_CACHE_DB_MAX_ENTRIES = int(os.getenv("CURRICULUM_CACHE_DB_MAX_ENTRIES", "5000"))
+# Ambang batas kesamaan kosinus (0-1) agar kurikulum dari tujuan lain dianggap cukup mirip untuk dipakai ulang.
+# Gunakan penghitung semantic_hits/semantic_misses dan log skor terbaik untuk menyetel nilai ini.
+CURRICULUM_SEMANTIC_SIMILARITY_THRESHOLD = float(os.getenv("CURRICULUM_SEMANTIC_SIMILARITY_THRESHOLD", "0.92"))
+
+
+def normalize_goal(goal: str) -> str:
+    """
+    Menormalisasi teks tujuan pembelajaran agar variasi kapitalisasi, spasi, dan tanda baca
+    di akhir kalimat menghasilkan kunci cache yang sama.
+    Contoh: "  Belajar Python   untuk Analisis Data. " -> "belajar python untuk analisis data"
+    """
+    text = unicodedata.normalize("NFKC", goal or "").casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.strip(" .,!?;:")
+
+
+def make_cache_key(
+    goal: str,
+    model_name: str = CURRICULUM_MODEL_NAME,
+    prompt_version: str = CURRICULUM_PROMPT_VERSION
+) -> str:
+    """
+    Membuat kunci cache content-addressed (SHA-256) dari tujuan ternormalisasi, nama model, dan versi prompt.
+    """
+    payload = "\x1f".join([normalize_goal(goal), model_name, prompt_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _MemoryLRUCache:
+    """
+    Cache LRU in-process dengan TTL. Aman digunakan dari beberapa thread
+    (endpoint sinkron FastAPI berjalan di threadpool).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Curriculum]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Curriculum]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            stored_at, curriculum = item
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key) # Tandai sebagai yang paling baru digunakan
+            return curriculum
+
+    def set(self, key: str, curriculum: Curriculum) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), curriculum)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False) # Buang entri yang paling lama tidak digunakan
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CurriculumCache:
+    """
+    Cache kurikulum yang dihasilkan AI, dengan tier memori dan tier database.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = CURRICULUM_CACHE_TTL_SECONDS,
+        memory_max_entries: int = CURRICULUM_CACHE_MEMORY_MAX_ENTRIES,
+        db_max_entries: int = CURRICULUM_CACHE_DB_MAX_ENTRIES,
+        similarity_threshold: float = CURRICULUM_SEMANTIC_SIMILARITY_THRESHOLD
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.db_max_entries = db_max_entries
+        self.similarity_threshold = similarity_threshold
+        self._memory = _MemoryLRUCache(memory_max_entries, ttl_seconds)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.db_evictions = 0
+        self.semantic_hits = 0
+        self.semantic_misses = 0
+
+    def _is_expired(self, created_at: Optional[datetime]) -> bool:
+        if created_at is None:
+            return False
+        if created_at.tzinfo is None: # Beberapa driver mengembalikan datetime naive (asumsikan UTC)
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - created_at > timedelta(seconds=self.ttl_seconds)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, db: Optional[Session], goal: str) -> Optional[Curriculum]:
+        """
+        Mencari kurikulum untuk tujuan yang diberikan, pertama di memori lalu di database.
+        Mengembalikan None jika tidak ada entri yang valid (cache miss).
+        """
+        key = make_cache_key(goal)
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._count("memory_hits")
+            return cached
+
+        if db is not None:
+            try:
+                entry = db.query(CurriculumCacheEntry).filter(CurriculumCacheEntry.cache_key == key).first()
+                if entry is not None:
+                    if self._is_expired(entry.created_at):
+                        db.delete(entry)
+                        db.commit()
+                    else:
+                        curriculum = Curriculum.model_validate_json(entry.curriculum_json)
+                        entry.last_accessed_at = datetime.now(timezone.utc)
+                        entry.hit_count = (entry.hit_count or 0) + 1
+                        db.commit()
+                        self._memory.set(key, curriculum) # Promosikan ke tier memori
+                        self._count("db_hits")
+                        return curriculum
+            except Exception as e:
+                db.rollback()
+                print(f"Peringatan: Gagal membaca cache kurikulum dari database: {e}")
+
+        self._count("misses")
+        return None
+
+    def find_similar(
+        self,
+        db: Optional[Session],
+        goal: str,
+        goal_embedding: Optional[List[float]]
+    ) -> Optional[Curriculum]:
+        """
+        Mencari kurikulum dari tujuan lain yang mirip secara semantik (misalnya "learn FastAPI REST APIs"
+        dan "build REST APIs with FastAPI") menggunakan jarak kosinus pgvector pada kolom goal_embedding.
+
+        Hanya entri dari model dan versi prompt saat ini yang dipertimbangkan (sama seperti kunci exact-match).
+        Mengembalikan kurikulum jika kesamaan kosinus >= similarity_threshold, selain itu None.
+        Hit juga disimpan di tier memori dengan kunci tujuan ini agar permintaan berikutnya langsung hit.
+        """
+        if db is None or goal_embedding is None:
+            return None
+
+        try:
+            expired_before = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+            distance = CurriculumCacheEntry.goal_embedding.cosine_distance(goal_embedding)
+            row = db.query(CurriculumCacheEntry, distance.label("distance"))\
+                    .filter(CurriculumCacheEntry.goal_embedding.isnot(None))\
+                    .filter(CurriculumCacheEntry.model_name == CURRICULUM_MODEL_NAME,
+                            CurriculumCacheEntry.prompt_version == CURRICULUM_PROMPT_VERSION)\
+                    .filter(CurriculumCacheEntry.created_at >= expired_before)\
+                    .order_by(distance)\
+                    .first()
+        except Exception as e:
+            db.rollback()
+            print(f"Peringatan: Gagal mencari kurikulum serupa di cache: {e}")
+            return None
+
+        if row is None:
+            self._count("semantic_misses")
+            return None
+
+        entry, best_distance = row
+        similarity = 1.0 - float(best_distance)
+        print(f"Kurikulum cache terdekat untuk '{goal}': '{entry.normalized_goal}' (kesamaan={similarity:.4f}, ambang={self.similarity_threshold})")
+        if similarity < self.similarity_threshold:
+            self._count("semantic_misses")
+            return None
+
+        try:
+            curriculum = Curriculum.model_validate_json(entry.curriculum_json)
+            entry.last_accessed_at = datetime.now(timezone.utc)
+            entry.hit_count = (entry.hit_count or 0) + 1
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Peringatan: Gagal memuat kurikulum serupa dari cache: {e}")
+            self._count("semantic_misses")
+            return None
+
+        self._memory.set(make_cache_key(goal), curriculum)
+        self._count("semantic_hits")
+        return curriculum
+
+    def set(
+        self,
+        db: Optional[Session],
+        goal: str,
+        curriculum: Curriculum,
+        goal_embedding: Optional[List[float]] = None
+    ) -> None:
+        """
+        Menyimpan kurikulum ke tier memori dan tier database.
+        `goal_embedding` (opsional) disimpan agar tujuan yang mirip dapat menemukan kurikulum ini.
+        Kegagalan menulis ke database hanya dicatat; tidak menggagalkan permintaan.
+        """
+        key = make_cache_key(goal)
+        self._memory.set(key, curriculum)
+
+        if db is None:
+            return
+        try:
+            db.merge(CurriculumCacheEntry(
+                cache_key=key,
+                normalized_goal=normalize_goal(goal),
+                model_name=CURRICULUM_MODEL_NAME,
+                prompt_version=CURRICULUM_PROMPT_VERSION,
+                curriculum_json=curriculum.model_dump_json(),
+                goal_embedding=goal_embedding,
+                created_at=datetime.now(timezone.utc),
+                last_accessed_at=datetime.now(timezone.utc),
+                hit_count=0
+            ))
+            db.commit()
+            self._evict_db_entries(db)
+        except Exception as e:
+            db.rollback()
+            print(f"Peringatan: Gagal menyimpan cache kurikulum ke database: {e}")
+
+    def _evict_db_entries(self, db: Session) -> None:
+        """
+        Menghapus entri yang kedaluwarsa dan, jika tabel melebihi batas, entri yang paling lama tidak diakses (LRU).
+        """
+        expired_before = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        removed = db.query(CurriculumCacheEntry)\
+                    .filter(CurriculumCacheEntry.created_at < expired_before)\
+                    .delete(synchronize_session=False)
+
+        overflow = db.query(CurriculumCacheEntry).count() - self.db_max_entries
+        if overflow > 0:
+            lru_keys = [
+                key for (key,) in db.query(CurriculumCacheEntry.cache_key)
+                                    .order_by(CurriculumCacheEntry.last_accessed_at.asc())
+                                    .limit(overflow)
+                                    .all()
+            ]
+            removed += db.query(CurriculumCacheEntry)\
+                         .filter(CurriculumCacheEntry.cache_key.in_(lru_keys))\
+                         .delete(synchronize_session=False)
+        if removed:
+            db.commit()
+            with self._lock:
+                self.db_evictions += removed
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Mengembalikan penghitung hit/miss/eviction cache, termasuk pencarian semantik.
+        """
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "semantic_hits": self.semantic_hits,
+                "semantic_misses": self.semantic_misses,
+                "semantic_similarity_threshold": self.similarity_threshold,
+                "memory_evictions": self._memory.evictions,
+                "db_evictions": self.db_evictions,
+                "memory_entries": len(self._memory),
+            }
+
+
+# Instance global yang digunakan oleh endpoint /curriculum
+curriculum_cache = CurriculumCache()
@@ -1,22 +1,21 @@
-import os
 import requests
 from bs4 import BeautifulSoup
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from functools import lru_cache
 from typing import List, Dict, Optional, Any
 from dotenv import load_dotenv
 
+from .html_extraction import extract_article # Ekstraktor konten utama satu lintasan
+from .fetcher import ARTICLE_REQUEST_HEADERS # Header permintaan artikel (meniru browser)
+from .resource_discovery import youtube_discovery # Klien YouTube bersama + cache pencarian video
+
 # Muat variabel lingkungan dari .env untuk pengembangan lokal
 load_dotenv()
 
-YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
-YOUTUBE_API_SERVICE_NAME = "youtube"
-YOUTUBE_API_VERSION = "v3"
-
 def fetch_youtube_videos(keywords: List[str], max_results: int = 5) -> List[Dict[str, Any]]:
     """
     Mengambil daftar video YouTube berdasarkan kata kunci.
+    Memakai klien YouTube bersama dan cache TTL per set kata kunci dari resource_discovery.
 
     Args:
         keywords: Daftar string kata kunci untuk pencarian.
@@ -27,49 +26,81 @@ def fetch_youtube_videos(keywords: List[str], max_results: int = 5) -> List[Dict
         (videoId, title, description, channelTitle, videoUrl, thumbnailUrl).
         Mengembalikan daftar kosong jika terjadi error atau tidak ada hasil.
     """
-    if not YOUTUBE_API_KEY:
-        print("Peringatan: YOUTUBE_API_KEY tidak disetel. Tidak dapat mengambil video YouTube.")
-        return []
+    return youtube_discovery.search_videos(keywords, max_results)
 
-    try:
-        youtube = build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=YOUTUBE_API_KEY)
-
-        query = " ".join(keywords) # Gabungkan kata kunci menjadi satu string kueri
-
-        search_response = youtube.search().list(
-            q=query,
-            part="snippet", # Hanya mengambil snippet untuk efisiensi
-            type="video",   # Hanya cari video
-            maxResults=max_results,
-            relevanceLanguage="id", # Opsional: prioritaskan bahasa tertentu
-            # order="viewCount" # Opsional: urutkan berdasarkan jumlah penayangan
-        ).execute()
-
-        videos = []
-        for item in search_response.get("items", []):
-            if item["id"]["kind"] == "youtube#video":
-                video_id = item["id"]["videoId"]
-                videos.append({
-                    "videoId": video_id,
-                    "title": item["snippet"]["title"],
-                    "description": item["snippet"]["description"],
-                    "channelTitle": item["snippet"]["channelTitle"],
-                    "videoUrl": f"https://www.youtube.com/watch?v={video_id}",
-                    "thumbnailUrl": item["snippet"]["thumbnails"]["default"]["url"] # Atau 'medium' atau 'high'
-                })
-        return videos
-
-    except HttpError as e:
-        print(f"Terjadi error HTTP saat mengakses YouTube API: {e}")
-        # Anda mungkin ingin log error ini atau menanganinya secara berbeda
-        return []
-    except Exception as e:
-        print(f"Terjadi error tak terduga saat mengambil video YouTube: {e}")
-        return []
+
+def extract_title(soup: BeautifulSoup) -> Optional[str]:
+    """
+    Mengambil judul halaman dari tag <title>, atau None jika tidak ada.
+    """
+    if soup.title and soup.title.string:
+        return soup.title.string.strip() or None
+    return None
+
+def extract_article_text(soup: BeautifulSoup, url: str = "") -> Optional[str]:
+    """
+    Mengekstrak konten teks utama dari dokumen HTML yang sudah di-parse.
+    Implementasi referensi berbasis BeautifulSoup; jalur produksi memakai html_extraction.extract_article
+    (satu lintasan, hasil setara, diverifikasi dengan `python -m app.html_extraction`).
+
+    Args:
+        soup: Dokumen HTML yang sudah di-parse.
+        url: URL sumber (hanya untuk pesan log).
+
+    Returns:
+        Konten teks bersih dari artikel, atau None jika konten utama tidak ditemukan.
+    """
+    # Strategi 1: Cari tag <article>
+    article_tag = soup.find("article")
+    if article_tag:
+        text_content = article_tag.get_text(separator="\n", strip=True)
+        return "\n".join(line.strip() for line in text_content.splitlines() if line.strip())
+
+
+    # Strategi 2: Cari div dengan paragraf terbanyak (heuristik umum)
+    # Ini bisa sangat tidak akurat dan perlu disesuaikan per situs jika memungkinkan
+    best_candidate = None
+    max_p_count = 0
+
+    for main_content_candidate in soup.find_all(['main', 'div', 'section']): # Tag yang mungkin berisi konten utama
+        # Hindari elemen navigasi dan footer yang umum
+        if main_content_candidate.get('role') in ['navigation', 'banner', 'contentinfo', 'search'] or \
+           main_content_candidate.find(['nav', 'footer', 'header', 'aside']):
+            continue
+
+        p_tags = main_content_candidate.find_all("p", recursive=False) # Hanya paragraf langsung
+        if len(p_tags) > max_p_count:
+            # Pertimbangkan juga panjang teks di dalam p_tags untuk menghindari div dengan banyak <p> kosong
+            text_length = sum(len(p.get_text(strip=True)) for p in p_tags)
+            if text_length > 100: # Ambang batas minimal panjang teks
+                max_p_count = len(p_tags)
+                best_candidate = main_content_candidate
+
+    if best_candidate:
+        # Ekstrak semua teks dari kandidat terbaik, termasuk teks dari child tags lainnya
+        # seperti heading, list, dll., namun fokus pada paragraf.
+        text_elements = best_candidate.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'])
+        if not text_elements: # Jika tidak ada tag spesifik, ambil semua teks dari kandidat
+             text_content = best_candidate.get_text(separator="\n", strip=True)
+        else:
+            text_lines = [el.get_text(strip=True) for el in text_elements]
+            text_content = "\n".join(line for line in text_lines if line)
+
+        return "\n".join(line.strip() for line in text_content.splitlines() if line.strip())
+
+    # Strategi Fallback: Ambil semua teks dari body jika tidak ada yang ditemukan
+    # Ini akan sangat berantakan dan biasanya tidak diinginkan.
+    # body_text = soup.body.get_text(separator="\n", strip=True)
+    # return "\n".join(line.strip() for line in body_text.splitlines() if line.strip())
+
+    print(f"Peringatan: Tidak dapat menemukan konten artikel utama yang jelas untuk URL: {url}")
+    return None # Atau kembalikan semua teks body jika itu lebih baik daripada None
 
 def scrape_article_content(url: str) -> Optional[str]:
     """
     Mengambil dan mengurai konten teks utama dari URL artikel.
+    Untuk banyak URL, atau jika judul juga dibutuhkan, gunakan fetcher.AsyncArticleFetcher
+    (satu permintaan per halaman, connection pool bersama, rate limit per host, cache HTTP).
 
     Args:
         url: URL artikel yang akan di-scrape.
@@ -78,59 +109,10 @@ def scrape_article_content(url: str) -> Optional[str]:
         Konten teks bersih dari artikel, atau None jika terjadi error.
     """
     try:
-        headers = { # Meniru browser untuk menghindari blokir sederhana
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10) # Timeout 10 detik
+        response = requests.get(url, headers=ARTICLE_REQUEST_HEADERS, timeout=10) # Timeout 10 detik
         response.raise_for_status() # Memunculkan error untuk status HTTP 4xx/5xx
 
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Strategi 1: Cari tag <article>
-        article_tag = soup.find("article")
-        if article_tag:
-            text_content = article_tag.get_text(separator="\n", strip=True)
-            return "\n".join(line.strip() for line in text_content.splitlines() if line.strip())
-
-
-        # Strategi 2: Cari div dengan paragraf terbanyak (heuristik umum)
-        # Ini bisa sangat tidak akurat dan perlu disesuaikan per situs jika memungkinkan
-        best_candidate = None
-        max_p_count = 0
-
-        for main_content_candidate in soup.find_all(['main', 'div', 'section']): # Tag yang mungkin berisi konten utama
-            # Hindari elemen navigasi dan footer yang umum
-            if main_content_candidate.get('role') in ['navigation', 'banner', 'contentinfo', 'search'] or \
-               main_content_candidate.find(['nav', 'footer', 'header', 'aside']):
-                continue
-
-            p_tags = main_content_candidate.find_all("p", recursive=False) # Hanya paragraf langsung
-            if len(p_tags) > max_p_count:
-                # Pertimbangkan juga panjang teks di dalam p_tags untuk menghindari div dengan banyak <p> kosong
-                text_length = sum(len(p.get_text(strip=True)) for p in p_tags)
-                if text_length > 100: # Ambang batas minimal panjang teks
-                    max_p_count = len(p_tags)
-                    best_candidate = main_content_candidate
-
-        if best_candidate:
-            # Ekstrak semua teks dari kandidat terbaik, termasuk teks dari child tags lainnya
-            # seperti heading, list, dll., namun fokus pada paragraf.
-            text_elements = best_candidate.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'])
-            if not text_elements: # Jika tidak ada tag spesifik, ambil semua teks dari kandidat
-                 text_content = best_candidate.get_text(separator="\n", strip=True)
-            else:
-                text_lines = [el.get_text(strip=True) for el in text_elements]
-                text_content = "\n".join(line for line in text_lines if line)
-
-            return "\n".join(line.strip() for line in text_content.splitlines() if line.strip())
-
-        # Strategi Fallback: Ambil semua teks dari body jika tidak ada yang ditemukan
-        # Ini akan sangat berantakan dan biasanya tidak diinginkan.
-        # body_text = soup.body.get_text(separator="\n", strip=True)
-        # return "\n".join(line.strip() for line in body_text.splitlines() if line.strip())
-
-        print(f"Peringatan: Tidak dapat menemukan konten artikel utama yang jelas untuk URL: {url}")
-        return None # Atau kembalikan semua teks body jika itu lebih baik daripada None
+        return extract_article(response.content, url).text
 
     except requests.exceptions.RequestException as e:
         print(f"Error saat melakukan permintaan ke URL {url}: {e}")
@@ -139,9 +121,20 @@ def scrape_article_content(url: str) -> Optional[str]:
         print(f"Error tak terduga saat mengurai URL {url}: {e}")
         return None
 
+@lru_cache(maxsize=8)
+def _get_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    # Splitter tidak menyimpan state antar panggilan, jadi aman dipakai ulang
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        # separators=["\n\n", "\n", " ", ""] # Default, bisa disesuaikan
+    )
+
 def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 150) -> List[str]:
     """
-    Memecah teks panjang menjadi potongan-potongan yang lebih kecil.
+    Memecah teks panjang menjadi potongan-potongan yang lebih kecil (ukuran dalam karakter).
+    Pipeline indexing memakai chunking.iter_chunks (generator, ukuran dalam token model embedding).
 
     Args:
         text: Teks yang akan dipecah.
@@ -154,14 +147,7 @@ def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 150) -> L
     if not text or not text.strip():
         return []
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        # separators=["\n\n", "\n", " ", ""] # Default, bisa disesuaikan
-    )
-    chunks = text_splitter.split_text(text)
-    return chunks
+    return _get_text_splitter(chunk_size, chunk_overlap).split_text(text)
 
 # Contoh penggunaan (dapat dihapus atau dikomentari di produksi)
 if __name__ == "__main__":
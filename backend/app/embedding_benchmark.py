@@ -0,0 +1,155 @@
+"""
+Benchmark backend embedding (throughput, memori, dan paritas terhadap PyTorch fp32).
+
+Setiap backend dijalankan di proses terpisah agar pengukuran memori (peak RSS) tidak saling memengaruhi.
+Jalankan dari direktori backend:
+
+    python -m app.embedding_benchmark --backends torch torch-int8 onnx onnx-int8 --num-texts 2000
+"""
+import os
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from queue import Empty
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .ai_services import EMBEDDING_BACKENDS, EMBEDDING_PARITY_MIN_COSINE, EMBEDDING_PARITY_TEXTS, build_embedding_model
+
+# Batas waktu satu backend (memuat model + encode); proses yang melewatinya dihentikan dan dicatat sebagai error
+EMBEDDING_BENCHMARK_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_BENCHMARK_TIMEOUT_SECONDS", "1800"))
+
+
+def build_benchmark_texts(num_texts: int) -> List[str]:
+    """
+    Campuran kueri pendek (seperti /search) dan potongan panjang (seperti index_content).
+    """
+    short_queries = [
+        "python list comprehension",
+        "fastapi dependency injection",
+        "belajar sql join",
+        "react useEffect cleanup",
+    ]
+    long_chunk = (
+        "Dalam analisis data dengan Python, pustaka pandas menyediakan struktur DataFrame yang memudahkan "
+        "pembersihan, transformasi, dan agregasi data tabular. "
+    ) * 6
+    return [short_queries[i % len(short_queries)] if i % 2 == 0 else long_chunk for i in range(num_texts)]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss dalam kilobyte di Linux dan byte di macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_backend(backend: str, texts: List[str], batch_size: int, queue: "multiprocessing.Queue") -> None:
+    try:
+        started_at = time.perf_counter()
+        model = build_embedding_model(backend)
+        load_seconds = time.perf_counter() - started_at
+
+        model.encode(texts[:batch_size], batch_size=batch_size) # Pemanasan
+        started_at = time.perf_counter()
+        model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        encode_seconds = time.perf_counter() - started_at
+
+        single_started_at = time.perf_counter()
+        for text in texts[:100]:
+            model.encode(text) # Latensi kueri tunggal seperti /search
+        single_latency_ms = (time.perf_counter() - single_started_at) / min(100, len(texts)) * 1000
+
+        queue.put({
+            "backend": backend,
+            "load_seconds": load_seconds,
+            "texts_per_second": len(texts) / encode_seconds,
+            "single_query_ms": single_latency_ms,
+            "peak_rss_mb": _peak_rss_mb(),
+            "parity_embeddings": np.asarray(model.encode(EMBEDDING_PARITY_TEXTS, convert_to_numpy=True), dtype=np.float32),
+        })
+    except Exception as e:
+        queue.put({"backend": backend, "error": str(e)})
+
+
+def _collect_result(backend: str, process, queue: "multiprocessing.Queue", timeout_seconds: float) -> Dict[str, Any]:
+    """
+    Menunggu hasil proses benchmark. Jika proses mati tanpa mengirim hasil (crash, segfault, OOM kill)
+    atau melewati timeout_seconds, dikembalikan hasil error alih-alih menunggu selamanya.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while True:
+        try:
+            result = queue.get(timeout=1.0)
+            break
+        except Empty:
+            if process.exitcode is not None:
+                try:
+                    result = queue.get(timeout=1.0) # Hasil yang dikirim tepat sebelum proses keluar
+                    break
+                except Empty:
+                    return {"backend": backend, "error": f"proses berhenti tanpa hasil (exitcode {process.exitcode})"}
+            if time.monotonic() >= deadline:
+                process.terminate()
+                return {"backend": backend, "error": f"timeout setelah {timeout_seconds:.0f} detik"}
+    process.join(timeout=timeout_seconds)
+    if process.exitcode != 0 and "error" not in result:
+        return {"backend": backend, "error": f"proses berhenti tidak normal (exitcode {process.exitcode})"}
+    return result
+
+
+def benchmark_backends(
+    backends: List[str],
+    num_texts: int = 1000,
+    batch_size: int = 64,
+    timeout_seconds: float = EMBEDDING_BENCHMARK_TIMEOUT_SECONDS
+) -> List[Dict[str, Any]]:
+    """
+    Menjalankan benchmark untuk setiap backend dan menghitung kesamaan kosinus minimum terhadap "torch".
+    """
+    texts = build_benchmark_texts(num_texts)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in (["torch"] + [b for b in backends if b != "torch"]): # "torch" selalu diukur sebagai referensi
+        queue = context.Queue()
+        process = context.Process(target=_run_backend, args=(backend, texts, batch_size, queue))
+        process.start()
+        results.append(_collect_result(backend, process, queue, timeout_seconds))
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+    reference = next((r.get("parity_embeddings") for r in results if r["backend"] == "torch"), None)
+    for result in results:
+        embeddings = result.pop("parity_embeddings", None)
+        if reference is not None and embeddings is not None:
+            a = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+            b = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+            result["parity_min_cosine"] = float(np.sum(a * b, axis=1).min())
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark backend embedding MentorAI.")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--num-texts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=EMBEDDING_BENCHMARK_TIMEOUT_SECONDS, help="Batas waktu per backend (detik)")
+    args = parser.parse_args()
+
+    print(f"Benchmark {args.num_texts} teks, batch_size={args.batch_size}")
+    print(f"{'backend':<12} {'muat (s)':>9} {'teks/s':>9} {'kueri (ms)':>11} {'RSS (MB)':>9} {'kosinus min':>12}")
+    for result in benchmark_backends(args.backends, args.num_texts, args.batch_size, args.timeout):
+        if "error" in result:
+            print(f"{result['backend']:<12} ERROR: {result['error']}")
+            continue
+        parity = result.get("parity_min_cosine")
+        parity_text = f"{parity:.4f}" if parity is not None else "-"
+        if parity is not None and parity < EMBEDDING_PARITY_MIN_COSINE:
+            parity_text += " (GAGAL)"
+        print(
+            f"{result['backend']:<12} {result['load_seconds']:>9.1f} {result['texts_per_second']:>9.1f} "
+            f"{result['single_query_ms']:>11.2f} {result['peak_rss_mb']:>9.0f} {parity_text:>12}"
+        )
@@ -0,0 +1,351 @@
+"""
+Fetcher artikel async: connection pool bersama (httpx), konkurensi terbatas, batas sopan per host,
+dan cache HTTP (ETag/If-Modified-Since).
+
+Setiap halaman diambil satu kali; judul dan teks utama diekstrak dari respons yang sama.
+Respons 304 Not Modified memakai judul/teks dari cache tanpa mengunduh atau mem-parse ulang.
+
+Diuji tanpa internet dengan httpx.MockTransport (parameter `transport`): tests/test_fetcher.py.
+"""
+import os
+import time
+import asyncio
+import argparse
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from .html_extraction import extract_article
+
+# Header permintaan artikel: meniru browser untuk menghindari blokir sederhana (juga dipakai data_ingestion)
+ARTICLE_REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "20")) # Ukuran connection pool
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "10")) # Permintaan bersamaan (semua host)
+FETCH_PER_HOST_CONCURRENCY = int(os.getenv("FETCH_PER_HOST_CONCURRENCY", "2")) # Permintaan bersamaan per host
+FETCH_PER_HOST_MIN_INTERVAL_SECONDS = float(os.getenv("FETCH_PER_HOST_MIN_INTERVAL_SECONDS", "0.5")) # Jeda antar permintaan ke host yang sama
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "10"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024))) # Halaman lebih besar dari ini ditolak
+FETCH_CACHE_MEMORY_MAX_ENTRIES = int(os.getenv("FETCH_CACHE_MEMORY_MAX_ENTRIES", "1024"))
+
+
+class FetchResult(NamedTuple):
+    url: str
+    final_url: Optional[str] = None
+    status_code: Optional[int] = None
+    title: Optional[str] = None
+    text: Optional[str] = None # Teks utama artikel; None jika tidak ditemukan
+    not_modified: bool = False # True jika server menjawab 304 dan judul/teks berasal dari cache
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class CachedPage(NamedTuple):
+    final_url: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    title: Optional[str]
+    text: Optional[str]
+
+
+class MemoryFetchCache:
+    """
+    Cache HTTP in-process (LRU). Cocok untuk satu proses atau uji lokal.
+    """
+
+    def __init__(self, max_entries: int = FETCH_CACHE_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._entries.get(url)
+            if page is not None:
+                self._entries.move_to_end(url)
+            return page
+
+    def set(self, url: str, page: CachedPage) -> None:
+        with self._lock:
+            self._entries[url] = page
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, url: str) -> None:
+        pass # Tidak ada metadata waktu validasi di tier memori
+
+
+class DatabaseFetchCache:
+    """
+    Cache HTTP persisten di tabel `fetch_cache`, sehingga crawl ulang setelah restart tetap memakai validator.
+    Metode bersifat sinkron; fetcher memanggilnya lewat asyncio.to_thread.
+    """
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        from .database import SessionLocal
+        from .models import FetchCacheEntry
+        db = SessionLocal()
+        try:
+            entry = db.query(FetchCacheEntry).filter(FetchCacheEntry.url == url).first()
+            if entry is None:
+                return None
+            return CachedPage(entry.final_url, entry.etag, entry.last_modified, entry.title, entry.text_content)
+        finally:
+            db.close()
+
+    def set(self, url: str, page: CachedPage) -> None:
+        from .database import SessionLocal
+        from .models import FetchCacheEntry
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            db.merge(FetchCacheEntry(
+                url=url, final_url=page.final_url, etag=page.etag, last_modified=page.last_modified,
+                title=page.title, text_content=page.text, fetched_at=now, checked_at=now
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Peringatan: Gagal menyimpan cache HTTP untuk {url}: {e}")
+        finally:
+            db.close()
+
+    def touch(self, url: str) -> None:
+        from .database import SessionLocal
+        from .models import FetchCacheEntry
+        db = SessionLocal()
+        try:
+            db.query(FetchCacheEntry).filter(FetchCacheEntry.url == url)\
+              .update({FetchCacheEntry.checked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+
+class HostRateLimiter:
+    """
+    Batas sopan per host: paling banyak `per_host_concurrency` permintaan bersamaan dan
+    jeda minimal `min_interval` detik antara awal dua permintaan ke host yang sama.
+    """
+
+    def __init__(self, per_host_concurrency: int, min_interval: float):
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.min_interval = min_interval
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def acquire(self, host: str) -> AsyncIterator[None]:
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                wait = self._next_start.get(host, 0.0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start[host] = time.monotonic() + self.min_interval
+            yield
+
+
+def parse_article(content: bytes, url: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Mem-parse HTML satu kali dan mengembalikan (judul, teks utama).
+    """
+    article = extract_article(content, url)
+    return article.title, article.text
+
+
+class AsyncArticleFetcher:
+    """
+    Mengambil halaman artikel secara async dengan satu httpx.AsyncClient (keep-alive, connection pool).
+    Klien dan primitif asyncio dibuat saat pertama dipakai, di event loop pemanggil.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[Any] = None,
+        max_connections: int = FETCH_MAX_CONNECTIONS,
+        max_concurrency: int = FETCH_MAX_CONCURRENCY,
+        per_host_concurrency: int = FETCH_PER_HOST_CONCURRENCY,
+        per_host_min_interval: float = FETCH_PER_HOST_MIN_INTERVAL_SECONDS,
+        timeout: float = FETCH_TIMEOUT_SECONDS,
+        max_bytes: int = FETCH_MAX_BYTES,
+        transport: Optional[httpx.AsyncBaseTransport] = None # Misalnya httpx.MockTransport di tes
+    ):
+        self.cache = cache if cache is not None else MemoryFetchCache()
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.transport = transport
+        self._rate_limiter = HostRateLimiter(per_host_concurrency, per_host_min_interval)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.bytes_downloaded = 0
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=ARTICLE_REQUEST_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                transport=self.transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def fetch(self, url: str) -> FetchResult:
+        """
+        Mengambil satu URL. Error jaringan/HTTP dikembalikan di FetchResult.error, bukan sebagai exception,
+        agar fetch_many dapat melanjutkan URL lain.
+        """
+        started_at = time.perf_counter()
+        client = self._ensure_client()
+        cached = await asyncio.to_thread(self.cache.get, url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        host = urlparse(url).hostname or ""
+        try:
+            async with self._semaphore, self._rate_limiter.acquire(host):
+                self.requests += 1
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and cached is not None:
+                        self.not_modified += 1
+                        await asyncio.to_thread(self.cache.touch, url)
+                        return FetchResult(
+                            url, cached.final_url, 304, cached.title, cached.text, True, None, time.perf_counter() - started_at
+                        )
+                    if response.status_code >= 400:
+                        raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+                    content_type = response.headers.get("content-type", "")
+                    if content_type and "html" not in content_type and "xml" not in content_type:
+                        raise ValueError(f"Tipe konten bukan HTML: {content_type}")
+                    content_length = int(response.headers.get("content-length") or 0)
+                    if content_length > self.max_bytes:
+                        raise ValueError(f"Halaman terlalu besar ({content_length} byte)")
+                    body = bytearray()
+                    async for part in response.aiter_bytes():
+                        body.extend(part)
+                        if len(body) > self.max_bytes:
+                            raise ValueError(f"Halaman terlalu besar (> {self.max_bytes} byte)")
+                    self.bytes_downloaded += len(body)
+                    status_code = response.status_code
+                    final_url = str(response.url)
+                    etag = response.headers.get("etag")
+                    last_modified = response.headers.get("last-modified")
+        except (httpx.HTTPError, ValueError) as e:
+            self.errors += 1
+            print(f"Error saat melakukan permintaan ke URL {url}: {e}")
+            return FetchResult(url, error=str(e), elapsed_seconds=time.perf_counter() - started_at)
+
+        # Parsing HTML adalah pekerjaan CPU; dijalankan di thread agar event loop tetap melayani unduhan lain
+        title, text = await asyncio.to_thread(parse_article, bytes(body), url)
+        if etag or last_modified:
+            await asyncio.to_thread(self.cache.set, url, CachedPage(final_url, etag, last_modified, title, text))
+        return FetchResult(url, final_url, status_code, title, text, False, None, time.perf_counter() - started_at)
+
+    async def fetch_many(self, urls: List[str]) -> List[FetchResult]:
+        """
+        Mengambil banyak URL bersamaan (dibatasi max_concurrency dan batas per host). Urutan hasil sama dengan `urls`.
+        """
+        return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "bytes_downloaded": self.bytes_downloaded,
+        }
+
+
+class FetcherThread:
+    """
+    Menjalankan AsyncArticleFetcher di event loop pada thread khusus, agar kode sinkron (misalnya worker
+    ingestion) dapat berbagi satu connection pool dan satu rate limiter per host.
+    """
+
+    def __init__(self, fetcher: AsyncArticleFetcher):
+        self.fetcher = fetcher
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="article-fetcher", daemon=True)
+        self._thread.start()
+
+    def fetch(self, url: str) -> FetchResult:
+        return asyncio.run_coroutine_threadsafe(self.fetcher.fetch(url), self._loop).result()
+
+    def fetch_many(self, urls: List[str]) -> List[FetchResult]:
+        return asyncio.run_coroutine_threadsafe(self.fetcher.fetch_many(urls), self._loop).result()
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.fetcher.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_shared_fetcher: Optional[FetcherThread] = None
+_shared_fetcher_lock = threading.Lock()
+
+
+def get_shared_fetcher() -> FetcherThread:
+    """
+    Fetcher bersama untuk proses ini (dibuat saat pertama dipakai), dengan cache HTTP di database.
+    """
+    global _shared_fetcher
+    with _shared_fetcher_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = FetcherThread(AsyncArticleFetcher(cache=DatabaseFetchCache()))
+        return _shared_fetcher
+
+
+def close_shared_fetcher() -> None:
+    global _shared_fetcher
+    with _shared_fetcher_lock:
+        if _shared_fetcher is not None:
+            _shared_fetcher.close()
+            _shared_fetcher = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetcher artikel async MentorAI.")
+    parser.add_argument("urls", nargs="*", help="URL yang akan diambil (memerlukan akses internet).")
+    args = parser.parse_args()
+
+    async def main() -> None:
+        fetcher = AsyncArticleFetcher()
+        try:
+            for result in await fetcher.fetch_many(args.urls):
+                status = result.error or f"HTTP {result.status_code}, judul='{result.title}', {len(result.text or '')} karakter"
+                print(f"{result.url}: {status}")
+        finally:
+            await fetcher.aclose()
+    asyncio.run(main())
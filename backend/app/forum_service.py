@@ -0,0 +1,300 @@
+"""
+Kueri baca forum: daftar postingan dan balasan dengan paginasi keyset (lihat pagination.py).
+
+Daftar postingan diproyeksikan langsung ke dict respons (kolom postingan + ringkasan penulis lewat JOIN,
+lalu jumlah balasan dalam satu kueri GROUP BY), sehingga satu halaman selalu memerlukan 2 kueri berapa pun
+jumlah postingannya, tanpa lazy-load `post.author` per baris.
+
+Balasan berulir dimuat per halaman balasan tingkat atas: satu kueri recursive CTE mengambil akar halaman
+beserta seluruh turunannya sampai batas kedalaman, lalu pohon dirakit di memori dalam O(n).
+Jumlah kueri dan perakitan thread diuji di tests/test_forum_service.py.
+"""
+import os
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, exists, false, func, literal_column, select, text, tuple_
+from sqlalchemy.orm import Query, Session, joinedload
+
+from . import models
+from .pagination import apply_keyset, decode_cursor, encode_cursor, split_page
+from .index_maintenance import drop_invalid_indexes, run_locked, start_in_background
+
+# Kedalaman pohon balasan yang dimuat per permintaan thread (akar = kedalaman 0)
+FORUM_THREAD_DEFAULT_DEPTH = int(os.getenv("FORUM_THREAD_DEFAULT_DEPTH", "4"))
+FORUM_THREAD_MAX_DEPTH = int(os.getenv("FORUM_THREAD_MAX_DEPTH", "10"))
+
+# Indeks yang dideklarasikan di models.py hanya dibuat oleh create_all untuk tabel baru;
+# tabel forum yang sudah ada mendapatkannya tanpa mengunci tabel (CONCURRENTLY), di thread background saat startup
+# (satu worker, di bawah advisory lock) atau lewat `python -m app.forum_service --ensure-indexes`.
+FORUM_INDEX_DDLS = {
+    "ix_forum_posts_created_at_id":
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forum_posts_created_at_id ON forum_posts (created_at, id)",
+    "ix_forum_replies_post_created_at_id":
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forum_replies_post_created_at_id ON forum_replies (post_id, created_at, id)",
+    "ix_forum_replies_top_level":
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forum_replies_top_level ON forum_replies (post_id, created_at, id) "
+        "WHERE parent_reply_id IS NULL",
+}
+FORUM_INDEX_ENSURE_ON_STARTUP = os.getenv("FORUM_INDEX_ENSURE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+FORUM_INDEX_LOCK_NAME = "forum_index_maintenance"
+
+# Kolom yang dibutuhkan schemas.PostRead; content ikut karena respons daftar menyertakannya
+_POST_LIST_COLUMNS = (
+    models.ForumPost.id,
+    models.ForumPost.author_id,
+    models.ForumPost.title,
+    models.ForumPost.content,
+    models.ForumPost.created_at,
+    models.ForumPost.updated_at,
+    models.ForumPost.upvotes,
+    models.User.username.label("author_username"),
+    models.User.profile_picture_url.label("author_profile_picture_url"),
+)
+
+
+def ensure_forum_indexes(db: Session) -> None:
+    """
+    Memastikan indeks komposit paginasi forum ada (idempoten). Indeks INVALID (build CONCURRENTLY yang gagal)
+    dihapus lalu dibuat ulang. Pemanggil memegang FORUM_INDEX_LOCK_NAME (lihat start_forum_index_maintenance).
+    """
+    drop_invalid_indexes(db, list(FORUM_INDEX_DDLS))
+    # CREATE INDEX CONCURRENTLY tidak bisa dijalankan di dalam transaksi
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in FORUM_INDEX_DDLS.values():
+            conn.execute(text(statement))
+
+
+def start_forum_index_maintenance(session_factory) -> None:
+    """
+    Dipanggil saat startup: ensure_forum_indexes berjalan di thread background oleh satu worker saja.
+    """
+    if not FORUM_INDEX_ENSURE_ON_STARTUP:
+        return
+    start_in_background(session_factory, FORUM_INDEX_LOCK_NAME, ensure_forum_indexes)
+
+
+def _post_list_query(db: Session) -> Query:
+    return db.query(*_POST_LIST_COLUMNS).join(models.User, models.User.id == models.ForumPost.author_id)
+
+
+def _reply_counts(db: Session, post_ids: List[int]) -> Dict[int, int]:
+    if not post_ids:
+        return {}
+    rows = db.query(models.ForumReply.post_id, func.count(models.ForumReply.id))\
+             .filter(models.ForumReply.post_id.in_(post_ids))\
+             .group_by(models.ForumReply.post_id)\
+             .all()
+    return dict(rows)
+
+
+def _to_post_dicts(db: Session, rows: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Mengubah baris proyeksi menjadi dict berbentuk schemas.PostRead, lengkap dengan reply_count.
+    """
+    counts = _reply_counts(db, [row.id for row in rows])
+    return [
+        {
+            "id": row.id,
+            "author_id": row.author_id,
+            "author": {
+                "id": row.author_id,
+                "username": row.author_username,
+                "profile_picture_url": row.author_profile_picture_url,
+            },
+            "title": row.title,
+            "content": row.content,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "upvotes": row.upvotes,
+            "reply_count": counts.get(row.id, 0),
+        }
+        for row in rows
+    ]
+
+
+def list_posts(db: Session, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Halaman postingan terbaru lebih dulu sebagai dict PostRead. Mengembalikan (postingan, cursor halaman
+    berikutnya atau None). Melempar InvalidCursorError untuk cursor yang rusak.
+    """
+    query = apply_keyset(_post_list_query(db), models.ForumPost.created_at, models.ForumPost.id, cursor, limit)
+    rows, next_cursor = split_page(query.all(), limit, key=lambda row: (row.created_at, row.id))
+    return _to_post_dicts(db, rows), next_cursor
+
+
+def list_posts_by_offset(db: Session, skip: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Paginasi OFFSET lama (parameter `skip` yang deprecated), dengan proyeksi yang sama seperti list_posts.
+    """
+    rows = _post_list_query(db)\
+        .order_by(models.ForumPost.created_at.desc(), models.ForumPost.id.desc())\
+        .offset(skip)\
+        .limit(limit)\
+        .all()
+    return _to_post_dicts(db, rows)
+
+
+def list_replies(
+    db: Session,
+    post_id: int,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[models.ForumReply], Optional[str]]:
+    """
+    Halaman balasan sebuah postingan dalam urutan kronologis (terlama lebih dulu, seperti urutan percakapan).
+    Penulis dimuat dengan JOIN di kueri yang sama (ReplyRead.author), bukan lazy-load per balasan.
+    """
+    query = apply_keyset(
+        db.query(models.ForumReply)
+          .options(joinedload(models.ForumReply.author))
+          .filter(models.ForumReply.post_id == post_id),
+        models.ForumReply.created_at, models.ForumReply.id, cursor, limit, descending=False
+    )
+    return split_page(query.all(), limit, key=lambda reply: (reply.created_at, reply.id))
+
+
+def _thread_statement(
+    post_id: int,
+    max_depth: int,
+    limit: int = 1,
+    cursor: Optional[str] = None,
+    root_reply_id: Optional[int] = None
+):
+    """
+    Membangun kueri recursive CTE untuk satu halaman thread:
+    1. thread_roots: maksimal limit+1 balasan tingkat atas setelah cursor (atau satu balasan root_reply_id),
+       diberi peringkat root_rank; akar ke-(limit+1) hanya menandai adanya halaman berikutnya.
+    2. thread: akar (depth 0) ditambah turunannya lewat parent_reply_id selama depth < max_depth,
+       hanya untuk akar dengan root_rank <= limit. CTE hanya membawa id agar working set rekursi kecil.
+    3. Hasil: kolom balasan + penulis, diurutkan (created_at, id) sehingga anak dapat ditempel berurutan.
+    """
+    replies = models.ForumReply.__table__
+    users = models.User.__table__
+
+    if root_reply_id is not None:
+        roots = select(replies.c.id, literal_column("1").label("root_rank"))\
+            .where(replies.c.id == root_reply_id, replies.c.post_id == post_id)
+    else:
+        roots = select(
+            replies.c.id,
+            func.row_number().over(order_by=(replies.c.created_at, replies.c.id)).label("root_rank")
+        ).where(replies.c.post_id == post_id, replies.c.parent_reply_id.is_(None))
+        if cursor:
+            created_at, reply_id = decode_cursor(cursor)
+            roots = roots.where(tuple_(replies.c.created_at, replies.c.id) > tuple_(created_at, reply_id))
+        roots = roots.order_by(replies.c.created_at, replies.c.id).limit(limit + 1)
+    roots = roots.cte("thread_roots")
+
+    tree = select(
+        replies.c.id,
+        literal_column("0").label("depth"),
+        roots.c.root_rank
+    ).join(roots, replies.c.id == roots.c.id).cte("thread", recursive=True)
+    child = replies.alias("child")
+    tree = tree.union_all(
+        select(child.c.id, tree.c.depth + 1, tree.c.root_rank)
+        .join(tree, child.c.parent_reply_id == tree.c.id)
+        .where(tree.c.depth < max_depth, tree.c.root_rank <= limit)
+    )
+
+    grandchild = replies.alias("grandchild")
+    has_hidden_children = case(
+        (tree.c.depth >= max_depth, exists().where(grandchild.c.parent_reply_id == tree.c.id)),
+        else_=false()
+    )
+    return select(
+        replies.c.id,
+        replies.c.parent_reply_id,
+        replies.c.content,
+        replies.c.created_at,
+        replies.c.upvotes,
+        replies.c.author_id,
+        users.c.username.label("author_username"),
+        users.c.profile_picture_url.label("author_profile_picture_url"),
+        tree.c.depth,
+        tree.c.root_rank,
+        has_hidden_children.label("has_more_replies"),
+    ).select_from(tree)\
+     .join(replies, replies.c.id == tree.c.id)\
+     .join(users, users.c.id == replies.c.author_id)\
+     .order_by(replies.c.created_at, replies.c.id)
+
+
+def assemble_thread(rows: List[Any], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Merakit baris hasil _thread_statement menjadi pohon dict berbentuk schemas.ThreadedReplyRead dalam O(n).
+    Baris sudah terurut (created_at, id), jadi urutan child_replies ikut kronologis tanpa sorting tambahan.
+    Mengembalikan (akar halaman ini, cursor halaman berikutnya atau None).
+    """
+    nodes: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        nodes[row.id] = {
+            "id": row.id,
+            "parent_reply_id": row.parent_reply_id,
+            "content": row.content,
+            "created_at": row.created_at,
+            "upvotes": row.upvotes,
+            "author": {
+                "id": row.author_id,
+                "username": row.author_username,
+                "profile_picture_url": row.author_profile_picture_url,
+            },
+            "depth": row.depth,
+            "has_more_replies": bool(row.has_more_replies),
+            "child_replies": [],
+        }
+
+    roots: List[Dict[str, Any]] = []
+    has_next_page = False
+    for row in rows:
+        if row.depth > 0:
+            nodes[row.parent_reply_id]["child_replies"].append(nodes[row.id])
+        elif row.root_rank <= limit:
+            roots.append(nodes[row.id])
+        else:
+            has_next_page = True
+
+    next_cursor = encode_cursor(roots[-1]["created_at"], roots[-1]["id"]) if has_next_page and roots else None
+    return roots, next_cursor
+
+
+def load_thread_page(
+    db: Session,
+    post_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    max_depth: int = FORUM_THREAD_DEFAULT_DEPTH
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Satu halaman thread balasan sebuah postingan: `limit` balasan tingkat atas (terlama lebih dulu) beserta
+    turunannya sampai `max_depth`, dalam satu kueri. Melempar InvalidCursorError untuk cursor yang rusak.
+    """
+    rows = db.execute(_thread_statement(post_id, max_depth, limit=limit, cursor=cursor)).all()
+    return assemble_thread(rows, limit)
+
+
+def load_reply_subtree(
+    db: Session,
+    reply: models.ForumReply,
+    max_depth: int = FORUM_THREAD_DEFAULT_DEPTH
+) -> Dict[str, Any]:
+    """
+    Subtree sebuah balasan (untuk melanjutkan node dengan has_more_replies), dengan balasan itu di kedalaman 0.
+    """
+    rows = db.execute(_thread_statement(reply.post_id, max_depth, root_reply_id=reply.id)).all()
+    roots, _ = assemble_thread(rows, limit=1)
+    return roots[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kueri baca forum.")
+    parser.add_argument("--ensure-indexes", action="store_true", help="Buat indeks forum yang belum ada atau INVALID (langkah deploy).")
+    args = parser.parse_args()
+
+    if args.ensure_indexes:
+        from .database import SessionLocal
+        if not run_locked(SessionLocal, FORUM_INDEX_LOCK_NAME, ensure_forum_indexes):
+            raise SystemExit(1)
+    else:
+        parser.print_help()
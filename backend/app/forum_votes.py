@@ -0,0 +1,177 @@
+"""
+Vote forum berbasis ledger (tabel forum_votes).
+
+Setiap upvote adalah satu baris unik per (pengguna, target), sehingga vote bersifat idempoten: vote ulang
+tidak mengubah apa pun, dan unvote menghapus baris tersebut. Hitungan `upvotes` pada postingan/balasan dan
+XP penulis diubah dengan UPDATE atomik (`kolom = kolom + delta`) dalam transaksi yang sama dengan perubahan
+ledger, hanya jika ledger benar-benar berubah. Dengan begitu vote yang berjalan bersamaan tidak kehilangan
+update (tidak ada read-modify-write di Python) dan hitungan selalu sama dengan jumlah baris ledger.
+
+Jika FORUM_COUNTER_WRITE_BEHIND aktif (default), transaksi vote tidak meng-UPDATE baris postingan/pengguna;
+deltanya dicatat di jurnal counter_deltas dalam transaksi yang sama dan diterapkan secara batch oleh
+counter_buffer (lihat counter_buffer.py), sehingga burst vote pada postingan viral tidak berebut row lock.
+
+ForumVote.user_id memakai ondelete="RESTRICT": pengguna yang masih memiliki vote tidak bisa dihapus langsung,
+vote-nya harus ditarik dulu dengan retract_user_votes agar hitungan dan XP ikut dikurangi.
+
+Uji beban vote bersamaan: tests/test_forum_votes.py.
+"""
+from collections import defaultdict
+from typing import Dict, NamedTuple, Optional, Union
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from . import gamification_service
+from .counter_buffer import FORUM_COUNTER_WRITE_BEHIND, counter_buffer, journal_deltas
+from .models import CounterTarget, ForumPost, ForumReply, ForumVote, User
+
+# XP untuk penulis per upvote yang diterima (dikurangi lagi saat unvote)
+POST_UPVOTE_XP = 5
+REPLY_UPVOTE_XP = 2
+
+
+class VoteResult(NamedTuple):
+    changed: bool # False jika vote/unvote tidak mengubah ledger (sudah vote / belum pernah vote)
+    voted: bool # Status vote pengguna setelah operasi
+    author_id: Optional[int] = None # Penulis target, diisi jika changed
+
+
+def _target(target: Union[ForumPost, ForumReply]):
+    if isinstance(target, ForumPost):
+        return ForumPost, ForumVote.post_id, POST_UPVOTE_XP, CounterTarget.POST_UPVOTES
+    return ForumReply, ForumVote.reply_id, REPLY_UPVOTE_XP, CounterTarget.REPLY_UPVOTES
+
+
+def set_vote(
+    db: Session,
+    user_id: int,
+    target: Union[ForumPost, ForumReply],
+    upvote: bool,
+    write_behind: bool = FORUM_COUNTER_WRITE_BEHIND
+) -> VoteResult:
+    """
+    Menetapkan status vote pengguna pada postingan/balasan (True = upvote, False = unvote).
+    Tidak melakukan commit; pemanggil meng-commit agar ledger dan hitungan (atau jurnal deltanya) tersimpan bersama.
+    """
+    model, vote_column, xp_points, counter_target = _target(target)
+    if upvote:
+        # ON CONFLICT DO NOTHING: vote ganda (termasuk yang bersamaan) tidak menghasilkan baris baru.
+        # Transaksi kedua menunggu yang pertama commit, lalu tidak menyisipkan apa pun.
+        inserted = db.execute(
+            insert(ForumVote)
+            .values(user_id=user_id, **{vote_column.key: target.id})
+            .on_conflict_do_nothing()
+            .returning(ForumVote.id)
+        ).first()
+        if inserted is None:
+            return VoteResult(changed=False, voted=True)
+        delta = 1
+    else:
+        deleted = db.execute(
+            delete(ForumVote)
+            .where(ForumVote.user_id == user_id, vote_column == target.id)
+            .returning(ForumVote.id)
+        ).first()
+        if deleted is None:
+            return VoteResult(changed=False, voted=False)
+        delta = -1
+
+    if write_behind:
+        author_id = target.author_id
+        journal_deltas(db, [
+            (counter_target, target.id, delta),
+            (CounterTarget.USER_XP, author_id, delta * xp_points),
+        ])
+        return VoteResult(changed=True, voted=upvote, author_id=author_id)
+
+    author_id = db.execute(
+        update(model)
+        .where(model.id == target.id)
+        .values(upvotes=model.upvotes + delta)
+        .returning(model.author_id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    gamification_service.increment_xp(db, author_id, delta * xp_points)
+    return VoteResult(changed=True, voted=upvote, author_id=author_id)
+
+
+def has_voted(db: Session, user_id: int, target: Union[ForumPost, ForumReply]) -> bool:
+    vote_column = _target(target)[1]
+    return db.execute(
+        select(ForumVote.id).where(ForumVote.user_id == user_id, vote_column == target.id)
+    ).first() is not None
+
+
+def toggle_vote(
+    db: Session,
+    user_id: int,
+    target: Union[ForumPost, ForumReply],
+    write_behind: bool = FORUM_COUNTER_WRITE_BEHIND
+) -> VoteResult:
+    """
+    Membalik status vote pengguna. Jika dua toggle bersamaan melihat status yang sama, set_vote tetap idempoten.
+    """
+    return set_vote(db, user_id, target, upvote=not has_voted(db, user_id, target), write_behind=write_behind)
+
+
+def retract_user_votes(db: Session, user_id: int, write_behind: bool = FORUM_COUNTER_WRITE_BEHIND) -> int:
+    """
+    Menghapus semua vote pengguna (dipanggil sebelum akun pengguna dihapus) sambil mengurangi upvotes setiap target
+    dan XP penulisnya, lewat jurnal atau UPDATE atomik seperti set_vote. Tidak melakukan commit.
+    Mengembalikan jumlah vote yang dihapus.
+    """
+    removed = db.execute(
+        delete(ForumVote)
+        .where(ForumVote.user_id == user_id)
+        .returning(ForumVote.post_id, ForumVote.reply_id)
+    ).all()
+    xp_deltas: Dict[int, int] = defaultdict(int)
+    counter_deltas = []
+    for model, target_ids, xp_points, counter_target in (
+        (ForumPost, [row.post_id for row in removed if row.post_id is not None], POST_UPVOTE_XP, CounterTarget.POST_UPVOTES),
+        (ForumReply, [row.reply_id for row in removed if row.reply_id is not None], REPLY_UPVOTE_XP, CounterTarget.REPLY_UPVOTES),
+    ):
+        if not target_ids:
+            continue
+        if write_behind:
+            authors = db.execute(select(model.id, model.author_id).where(model.id.in_(target_ids))).all()
+            counter_deltas += [(counter_target, target_id, -1) for target_id, _ in authors]
+        else:
+            authors = db.execute(
+                update(model)
+                .where(model.id.in_(target_ids))
+                .values(upvotes=model.upvotes - 1)
+                .returning(model.id, model.author_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+        for _, author_id in authors:
+            if author_id != user_id: # XP pengguna yang akan dihapus tidak perlu dikurangi
+                xp_deltas[author_id] -= xp_points
+
+    if write_behind:
+        journal_deltas(db, counter_deltas + [(CounterTarget.USER_XP, author_id, delta) for author_id, delta in xp_deltas.items()])
+    else:
+        for author_id, delta in xp_deltas.items():
+            gamification_service.increment_xp(db, author_id, delta)
+    return len(removed)
+
+
+def current_upvotes(target: Union[ForumPost, ForumReply]) -> int:
+    """
+    Hitungan upvotes untuk respons: nilai di database ditambah delta proses ini yang belum di-flush.
+    """
+    return (target.upvotes or 0) + counter_buffer.pending_delta(_target(target)[3], target.id)
+
+
+def award_badges_after_vote(db: Session, result: VoteResult) -> None:
+    """
+    Memeriksa lencana penulis setelah transaksi vote di-commit (XP-nya mungkin melewati ambang lencana).
+    Pada mode write-behind, pemeriksaan dilakukan counter_buffer setelah XP di-flush.
+    """
+    if FORUM_COUNTER_WRITE_BEHIND or not (result.changed and result.voted and result.author_id):
+        return
+    author = db.query(User).filter(User.id == result.author_id).first()
+    if author:
+        gamification_service.check_and_award_new_badges(db=db, user=author)
@@ -1,3 +1,4 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -34,16 +35,16 @@ def add_xp(db: Session, user_id: int, points: int) -> Optional[UserRead]:
         print(f"Error: Pengguna dengan ID {user_id} tidak ditemukan saat mencoba menambahkan XP.")
         return None
 
-    user.xp_points = (user.xp_points or 0) + points
-    print(f"Menambahkan {points} XP ke pengguna {user.username}. Total XP baru: {user.xp_points}.")
-
     # Setelah menambahkan XP, periksa apakah ada lencana baru yang diperoleh
     # new_badges_awarded = check_and_award_new_badges(db=db, user_id=user_id, current_xp=user.xp_points)
     # Jika Anda ingin mengembalikan informasi lencana yang baru diberikan, Anda bisa melakukannya di sini.
 
     try:
+        # UPDATE atomik (bukan baca-ubah-tulis di Python) agar penambahan XP bersamaan tidak saling menimpa
+        increment_xp(db, user_id, points)
         db.commit()
         db.refresh(user)
+        print(f"Menambahkan {points} XP ke pengguna {user.username}. Total XP baru: {user.xp_points}.")
         # Panggil check_and_award_new_badges setelah commit XP berhasil
         check_and_award_new_badges(db=db, user=user)
         return UserRead.from_orm(user) # Kembalikan data pengguna yang diperbarui
@@ -53,6 +54,20 @@ def add_xp(db: Session, user_id: int, points: int) -> Optional[UserRead]:
         return None
 
 
+def increment_xp(db: Session, user_id: int, points: int) -> None:
+    """
+    Menambah (atau mengurangi, jika negatif) XP pengguna secara atomik dengan `xp_points = xp_points + :points`.
+    Tidak melakukan commit, sehingga perubahan ikut transaksi pemanggil (misalnya transaksi vote).
+    Pemeriksaan lencana dilakukan pemanggil setelah commit bila perlu.
+    """
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(xp_points=User.xp_points + points)
+        .execution_options(synchronize_session=False)
+    )
+
+
 def award_badge_if_not_exists(db: Session, user: User, badge_id: int) -> Optional[UserBadge]:
     """
     Memberikan lencana kepada pengguna jika mereka belum memilikinya.
@@ -0,0 +1,396 @@
+"""
+Ekstraksi konten utama HTML dalam satu lintasan (tanpa membangun pohon BeautifulSoup).
+
+Heuristiknya sama dengan data_ingestion.extract_article_text:
+1. teks <article> pertama;
+2. jika tidak ada, <main>/<div>/<section> (urutan dokumen) dengan paragraf <p> langsung terbanyak, bila total
+   teks paragrafnya > 100 karakter, tidak ber-role navigasi, dan tidak berisi nav/footer/header/aside;
+   teksnya adalah p/h1-h6/li di dalamnya (atau seluruh teks jika tidak ada).
+
+Implementasi lama memanggil find()/find_all()/get_text() per kandidat, sehingga waktu tumbuh kuadratik pada
+halaman bertingkat dalam. Di sini tokenizer memanggil handler SAX; setiap elemen yang ditutup melaporkan
+statistiknya (jumlah <p> langsung, panjang teks, elemen terlarang di dalamnya) ke induknya, dan teks disimpan
+sekali dalam daftar string global yang direferensikan kandidat lewat rentang indeks. Total kerja O(n).
+
+Backend tokenizer (HTML_EXTRACTOR_BACKEND):
+- "lxml": libxml2 via lxml (jika terpasang), beberapa kali lebih cepat;
+- "html.parser": pustaka standar, pohonnya identik dengan BeautifulSoup(..., "html.parser");
+- "auto" (default): lxml jika tersedia.
+Hasil tiap backend setara dengan implementasi lama yang memakai parser yang sama. Pada markup rusak
+(misalnya <p> tanpa penutup) libxml2 dan html.parser dapat membentuk pohon berbeda.
+
+Regresi dan benchmark terhadap korpus HTML di app/html_corpus, dari direktori backend:
+
+    python -m app.html_extraction
+"""
+import io
+import os
+import time
+import argparse
+import contextlib
+from html.parser import HTMLParser
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError: # lxml opsional
+    lxml_etree = None
+
+HTML_EXTRACTOR_BACKEND = os.getenv("HTML_EXTRACTOR_BACKEND", "auto") # "auto", "lxml", atau "html.parser"
+HTML_EXTRACTOR_BACKENDS = ("lxml", "html.parser")
+HTML_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "html_corpus")
+
+CANDIDATE_TAGS = frozenset(("main", "div", "section"))
+TEXT_ELEMENT_TAGS = frozenset(("p", "h1", "h2", "h3", "h4", "h5", "h6", "li"))
+BLOCKER_TAGS = frozenset(("nav", "footer", "header", "aside"))
+EXCLUDED_ROLES = frozenset(("navigation", "banner", "contentinfo", "search"))
+# Teks di dalam elemen ini tidak termasuk get_text() BeautifulSoup
+IGNORED_TEXT_TAGS = frozenset(("script", "style", "template"))
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen",
+    "link", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "menuitem", "nextid", "spacer",
+))
+MIN_CANDIDATE_TEXT_LENGTH = 100
+
+
+class ExtractedArticle(NamedTuple):
+    title: Optional[str]
+    text: Optional[str] # None jika konten utama tidak ditemukan
+
+
+class _Element:
+    __slots__ = (
+        "tag", "string_start", "string_end", "text_element_start", "text_element_end",
+        "has_blocker", "direct_p_count", "direct_p_length", "excluded_role", "text_element_index",
+    )
+
+    def __init__(self, tag: str, string_start: int, text_element_start: int):
+        self.tag = tag
+        self.string_start = string_start
+        self.string_end = string_start
+        self.text_element_start = text_element_start
+        self.text_element_end = text_element_start
+        self.has_blocker = False
+        self.direct_p_count = 0
+        self.direct_p_length = 0
+        self.excluded_role = False
+        self.text_element_index = -1
+
+
+class _ContentScorer:
+    """
+    Handler SAX yang menghitung statistik kandidat selama parsing. Antarmukanya (start/end/data/comment/close)
+    mengikuti parser target lxml; _StdlibTokenizer meneruskan event html.parser ke metode yang sama.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = [] # Semua string teks (sudah di-strip, tidak kosong), urutan dokumen
+        self.offsets: List[int] = [0] # offsets[i] = total panjang strings[:i], untuk panjang rentang O(1)
+        self.text_elements: List[List[int]] = [] # [awal, akhir] rentang string per p/h*/li, urutan tag pembuka
+        self.candidates: List[_Element] = [] # main/div/section dalam urutan tag pembuka
+        self.article: Optional[_Element] = None
+        self.title: Optional[str] = None
+        self._stack: List[_Element] = []
+        self._buffer: List[str] = []
+        self._ignored_depth = 0
+        self._in_title = False
+        self._title_seen = False
+        self._title_parts: List[str] = []
+
+    def _flush(self) -> None:
+        # String bersebelahan digabung dulu sebelum di-strip, seperti NavigableString BeautifulSoup
+        if self._buffer:
+            text = "".join(self._buffer).strip()
+            self._buffer = []
+            if text and not self._ignored_depth:
+                self.strings.append(text)
+                self.offsets.append(self.offsets[-1] + len(text))
+
+    def start(self, tag: str, attrib: Any) -> None:
+        self._flush()
+        tag = tag.lower()
+        element = _Element(tag, len(self.strings), len(self.text_elements))
+        if tag in CANDIDATE_TAGS:
+            element.excluded_role = attrib.get("role") in EXCLUDED_ROLES
+            self.candidates.append(element)
+        elif tag in TEXT_ELEMENT_TAGS:
+            element.text_element_index = len(self.text_elements)
+            self.text_elements.append([element.string_start, element.string_start])
+        elif tag == "article" and self.article is None:
+            self.article = element
+        elif tag in IGNORED_TEXT_TAGS:
+            self._ignored_depth += 1
+        elif tag == "title" and not self._title_seen:
+            self._in_title = self._title_seen = True
+        self._stack.append(element)
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        tag = tag.lower()
+        # Tag penutup tanpa pasangan diabaikan; jika ada, semua elemen di atasnya ikut ditutup
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth].tag == tag:
+                break
+        else:
+            return
+        while len(self._stack) > depth:
+            self._close(self._stack.pop())
+
+    def _close(self, element: _Element) -> None:
+        element.string_end = len(self.strings)
+        element.text_element_end = len(self.text_elements)
+        if element.text_element_index >= 0:
+            self.text_elements[element.text_element_index][1] = element.string_end
+        if element.tag in IGNORED_TEXT_TAGS:
+            self._ignored_depth -= 1
+        elif element.tag == "title" and self._in_title:
+            self._in_title = False
+            self.title = "".join(self._title_parts).strip() or None
+        if self._stack:
+            parent = self._stack[-1]
+            if element.has_blocker or element.tag in BLOCKER_TAGS:
+                parent.has_blocker = True
+            if element.tag == "p":
+                parent.direct_p_count += 1
+                parent.direct_p_length += self.offsets[element.string_end] - self.offsets[element.string_start]
+
+    def data(self, text: str) -> None:
+        self._buffer.append(text)
+        if self._in_title:
+            self._title_parts.append(text)
+
+    def comment(self, text: str) -> None:
+        self._flush()
+
+    def cdata(self, text: str) -> None:
+        self._flush()
+        self._buffer.append(text)
+        self._flush()
+
+    def close(self) -> "_ContentScorer":
+        self._flush()
+        while self._stack:
+            self._close(self._stack.pop())
+        return self
+
+    def _lines(self, start: int, end: int) -> List[str]:
+        # get_text(separator="\n", strip=True) lalu pembersihan baris
+        return [line.strip() for text in self.strings[start:end] for line in text.splitlines() if line.strip()]
+
+    def main_text(self) -> Optional[str]:
+        if self.article is not None:
+            return "\n".join(self._lines(self.article.string_start, self.article.string_end))
+
+        best = None
+        max_p_count = 0
+        for candidate in self.candidates:
+            if candidate.excluded_role or candidate.has_blocker:
+                continue
+            if candidate.direct_p_count > max_p_count and candidate.direct_p_length > MIN_CANDIDATE_TEXT_LENGTH:
+                max_p_count = candidate.direct_p_count
+                best = candidate
+        if best is None:
+            return None
+
+        if best.text_element_start == best.text_element_end:
+            return "\n".join(self._lines(best.string_start, best.string_end))
+        lines = []
+        for start, end in self.text_elements[best.text_element_start:best.text_element_end]:
+            text = "".join(self.strings[start:end]) # get_text(strip=True) per elemen
+            lines.extend(line.strip() for line in text.splitlines() if line.strip())
+        return "\n".join(lines)
+
+
+class _StdlibTokenizer(HTMLParser):
+    """
+    Meneruskan event html.parser ke _ContentScorer. Elemen void (br, img, ...) langsung ditutup,
+    seperti pohon BeautifulSoup(..., "html.parser").
+    """
+
+    def __init__(self, scorer: _ContentScorer):
+        super().__init__(convert_charrefs=True)
+        self.scorer = scorer
+
+    def handle_starttag(self, tag, attrs):
+        self.scorer.start(tag, dict(attrs))
+        if tag in VOID_TAGS:
+            self.scorer.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.scorer.start(tag, dict(attrs))
+        self.scorer.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            self.scorer._flush()
+            return
+        self.scorer.end(tag)
+
+    def handle_data(self, data):
+        self.scorer.data(data)
+
+    def handle_comment(self, data):
+        self.scorer.comment(data)
+
+    def handle_decl(self, decl):
+        self.scorer._flush()
+
+    def handle_pi(self, data):
+        self.scorer._flush()
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self.scorer.cdata(data[len("CDATA["):])
+        else:
+            self.scorer._flush()
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    backend = backend or HTML_EXTRACTOR_BACKEND
+    if backend == "auto":
+        return "lxml" if lxml_etree is not None else "html.parser"
+    if backend not in HTML_EXTRACTOR_BACKENDS:
+        raise ValueError(f"Backend ekstraktor HTML tidak dikenal: '{backend}'. Pilih dari: auto, {', '.join(HTML_EXTRACTOR_BACKENDS)}")
+    if backend == "lxml" and lxml_etree is None:
+        raise ValueError("Backend 'lxml' membutuhkan paket lxml (pip install lxml).")
+    return backend
+
+
+def _decode(content: bytes) -> str:
+    from bs4.dammit import UnicodeDammit # Deteksi encoding yang sama dengan BeautifulSoup (meta charset, BOM)
+    return UnicodeDammit(content, is_html=True).unicode_markup or ""
+
+
+def _score(content: Union[bytes, str], backend: str) -> _ContentScorer:
+    scorer = _ContentScorer()
+    if backend == "lxml":
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+            parser = lxml_etree.HTMLParser(target=scorer, encoding="utf-8")
+        else:
+            parser = lxml_etree.HTMLParser(target=scorer)
+        if content.strip():
+            parser.feed(content)
+            parser.close()
+        return scorer.close()
+
+    tokenizer = _StdlibTokenizer(scorer)
+    tokenizer.feed(content if isinstance(content, str) else _decode(content))
+    tokenizer.close()
+    return scorer.close()
+
+
+def extract_article(content: Union[bytes, str], url: str = "", backend: Optional[str] = None) -> ExtractedArticle:
+    """
+    Mengekstrak judul (<title> pertama) dan teks utama dari HTML mentah dalam satu lintasan.
+
+    Args:
+        content: HTML mentah (bytes dari respons HTTP, atau str).
+        url: URL sumber (hanya untuk pesan log).
+        backend: "lxml", "html.parser", atau None untuk HTML_EXTRACTOR_BACKEND.
+
+    Returns:
+        ExtractedArticle(title, text); text None jika konten utama tidak ditemukan.
+    """
+    scorer = _score(content, resolve_backend(backend))
+    text = scorer.main_text()
+    if text is None:
+        print(f"Peringatan: Tidak dapat menemukan konten artikel utama yang jelas untuk URL: {url}")
+    return ExtractedArticle(scorer.title, text)
+
+
+def load_corpus(corpus_dir: str = HTML_CORPUS_DIR) -> Dict[str, bytes]:
+    corpus = {}
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".html"):
+            with open(os.path.join(corpus_dir, name), "rb") as f:
+                corpus[name] = f.read()
+    return corpus
+
+
+def nested_page(depth: int, paragraphs_per_level: int = 3) -> bytes:
+    """
+    Halaman sintetis dengan <div> bertingkat sedalam `depth`: kasus terburuk implementasi lama.
+    """
+    paragraph = "<p>Paragraf konten pada tingkat {level} yang membahas struktur data dan algoritma secara rinci.</p>"
+    opening = "".join(
+        f"<div class='level-{level}'>" + paragraph.format(level=level) * paragraphs_per_level for level in range(depth)
+    )
+    return f"<html><head><title>Halaman Bertingkat</title></head><body>{opening}{'</div>' * depth}</body></html>".encode("utf-8")
+
+
+def _legacy_extract(content: bytes, parser: str) -> ExtractedArticle:
+    from bs4 import BeautifulSoup
+    from .data_ingestion import extract_article_text, extract_title
+    soup = BeautifulSoup(content, parser)
+    return ExtractedArticle(extract_title(soup), extract_article_text(soup))
+
+
+def _time_call(fn, repeat: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started_at) / repeat
+
+
+def run_regression_and_benchmark(repeat: int = 20, nested_depth: int = 300) -> Dict[str, Any]:
+    """
+    Membandingkan hasil setiap backend dengan implementasi lama (BeautifulSoup, parser yang sama)
+    pada korpus, lalu mengukur waktu ekstraksi per halaman.
+    """
+    backends = [backend for backend in HTML_EXTRACTOR_BACKENDS if backend != "lxml" or lxml_etree is not None]
+    pages = load_corpus()
+    pages[f"sintetis_bertingkat_{nested_depth}.html"] = nested_page(nested_depth)
+
+    mismatches = []
+    timings: Dict[str, Dict[str, float]] = {}
+    # Peringatan "konten tidak ditemukan" dari kedua implementasi tidak relevan di sini
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, content in pages.items():
+            _compare_page(name, content, backends, repeat, mismatches, timings)
+    return {"pages": len(pages), "backends": backends, "mismatches": mismatches, "timings": timings}
+
+
+def _compare_page(
+    name: str,
+    content: bytes,
+    backends: List[str],
+    repeat: int,
+    mismatches: List[str],
+    timings: Dict[str, Dict[str, float]]
+) -> None:
+    legacy_seconds = None
+    timings[name] = {}
+    for backend in backends:
+        expected = _legacy_extract(content, backend)
+        actual = extract_article(content, backend=backend)
+        if actual != expected:
+            mismatches.append(f"{name} [{backend}]")
+        page_repeat = max(1, repeat // 10) if name.startswith("sintetis") else repeat
+        legacy_time = _time_call(lambda: _legacy_extract(content, backend), page_repeat)
+        new_time = _time_call(lambda: extract_article(content, backend=backend), page_repeat)
+        if backend == "html.parser":
+            legacy_seconds = legacy_time # Dasar pembanding: implementasi produksi lama
+        timings[name][f"legacy_{backend}_ms"] = legacy_time * 1000
+        timings[name][f"single_pass_{backend}_ms"] = new_time * 1000
+    timings[name]["speedup_best"] = legacy_seconds / min(
+        timings[name][f"single_pass_{backend}_ms"] / 1000 for backend in backends
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regresi dan benchmark ekstraktor HTML satu lintasan.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--nested-depth", type=int, default=300, help="Kedalaman halaman sintetis bertingkat.")
+    args = parser.parse_args()
+
+    report = run_regression_and_benchmark(args.repeat, args.nested_depth)
+    columns = [f"{kind}_{backend}_ms" for backend in report["backends"] for kind in ("legacy", "single_pass")]
+    print(f"{'halaman':<34}" + "".join(f"{column:>28}" for column in columns) + f"{'percepatan':>12}")
+    for name, timing in report["timings"].items():
+        print(f"{name:<34}" + "".join(f"{timing[column]:>28.2f}" for column in columns) + f"{timing['speedup_best']:>11.1f}x")
+    if report["mismatches"]:
+        print(f"TIDAK SETARA: {', '.join(report['mismatches'])}")
+        raise SystemExit(1)
+    print(f"Hasil ekstraksi setara dengan implementasi lama untuk {report['pages']} halaman ({', '.join(report['backends'])}).")
@@ -0,0 +1,97 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Utilitas pemeliharaan indeks Postgres yang dipakai bersama (vector_index, forum_service):
+# - advisory lock agar hanya satu worker uvicorn yang menjalankan DDL, worker lain melewatinya;
+# - deteksi indeks INVALID (sisa CREATE INDEX CONCURRENTLY yang gagal/terputus). `IF NOT EXISTS` melewati indeks
+#   seperti itu selamanya, jadi indeksnya harus di-DROP lalu dibuat ulang;
+# - menjalankan pemeliharaan di thread background agar startup tidak menunggu build indeks.
+
+
+class IndexMaintenanceBusyError(RuntimeError):
+    """
+    Pemeliharaan indeks yang sama sedang berjalan di worker/proses lain.
+    """
+
+
+@contextmanager
+def advisory_lock(bind: Engine, name: str) -> Iterator[bool]:
+    """
+    Mencoba mengambil advisory lock tingkat sesi Postgres untuk `name` tanpa menunggu.
+    Menghasilkan True jika lock didapat (dilepas saat keluar), False jika dipegang sesi lain.
+    """
+    conn = bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        acquired = bool(conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}).scalar())
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+    finally:
+        conn.close()
+
+
+def invalid_index_names(db: Session, names: Sequence[str]) -> List[str]:
+    """
+    Nama indeks dari `names` yang ada tetapi tidak valid (pg_index.indisvalid = false).
+    """
+    rows = db.execute(
+        text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = ANY(:names) AND NOT i.indisvalid"
+        ),
+        {"names": list(names)}
+    ).all()
+    return [row.relname for row in rows]
+
+
+def drop_invalid_indexes(db: Session, names: Sequence[str]) -> List[str]:
+    """
+    Menghapus indeks INVALID dari `names` agar dapat dibuat ulang. Mengembalikan nama yang dihapus.
+    """
+    invalid = invalid_index_names(db, names)
+    db.rollback() # Akhiri transaksi baca sebelum DDL CONCURRENTLY
+    if invalid:
+        with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for name in invalid:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        print(f"Indeks INVALID dihapus untuk dibuat ulang: {', '.join(invalid)}")
+    return invalid
+
+
+def run_locked(session_factory: Callable[[], Session], lock_name: str, task: Callable[[Session], None]) -> bool:
+    """
+    Menjalankan task(db) di bawah advisory lock `lock_name`. Mengembalikan False (tanpa menjalankan task)
+    jika worker lain sedang memegang lock.
+    """
+    db = session_factory()
+    try:
+        with advisory_lock(db.get_bind(), lock_name) as acquired:
+            if not acquired:
+                print(f"Pemeliharaan indeks '{lock_name}' dilewati: sedang dijalankan worker lain.")
+                return False
+            task(db)
+            return True
+    finally:
+        db.close()
+
+
+def start_in_background(session_factory: Callable[[], Session], lock_name: str, task: Callable[[Session], None]) -> threading.Thread:
+    """
+    Menjalankan run_locked di thread daemon; error dicetak, tidak menghentikan aplikasi.
+    """
+    def _run() -> None:
+        try:
+            run_locked(session_factory, lock_name, task)
+        except Exception as e:
+            print(f"PERINGATAN: Pemeliharaan indeks '{lock_name}' gagal: {e}")
+
+    thread = threading.Thread(target=_run, name=f"index-maintenance-{lock_name}", daemon=True)
+    thread.start()
+    return thread
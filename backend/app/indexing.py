@@ -1,11 +1,315 @@
+import io
+import hashlib
+from collections import defaultdict
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Set
 
-from .data_ingestion import chunk_text # Fungsi dari langkah 2.2 (seharusnya dari data_ingestion.py)
-from .ai_services import get_embedding
-from .models import LearningContent, ContentType # Impor model DB dan Enum
+import numpy as np
+
+from .chunking import iter_chunks # Pemecah teks streaming berbasis token model embedding
+from .ai_services import EMBEDDING_DIMENSION, get_embeddings
+from .models import LearningContent, ContentType, SourceDocument # Impor model DB dan Enum
+from .search import normalize_source_domain
 from .database import get_db # Untuk penggunaan di masa depan jika ini menjadi endpoint
 
+# Kolom yang ditulis untuk setiap potongan (urutan juga dipakai untuk COPY)
+CHUNK_COLUMNS = (
+    "title", "source_url", "source_domain", "content_type", "text_chunk",
+    "content_hash", "chunk_index", "document_version", "embedding",
+)
+
+
+def chunk_content_hash(text: str) -> str:
+    """
+    SHA-256 (hex) dari teks UTF-8. Sama dengan `encode(sha256(convert_to(text, 'UTF8')), 'hex')` di Postgres.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_chunk_row(
+    source_url: str,
+    source_domain: Optional[str],
+    title: str,
+    content_type: ContentType,
+    text_chunk: str,
+    embedding: Optional[np.ndarray],
+    chunk_index: Optional[int] = None,
+    document_version: Optional[int] = None
+) -> Dict[str, Any]:
+    return {
+        "title": title,
+        "source_url": source_url,
+        "source_domain": source_domain,
+        "content_type": content_type,
+        "text_chunk": text_chunk,
+        "content_hash": chunk_content_hash(text_chunk),
+        "chunk_index": chunk_index,
+        "document_version": document_version,
+        "embedding": embedding,
+    }
+
+
+def insert_chunk_rows(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Menyimpan potongan dengan satu pernyataan `INSERT ... VALUES (...), (...) RETURNING id`.
+    Mengembalikan ID sesuai urutan `rows`. Commit diserahkan ke pemanggil.
+    """
+    if not rows:
+        return []
+    result = db.execute(insert(LearningContent).values(rows).returning(LearningContent.id))
+    return [row.id for row in result]
+
+
+# Format teks pgvector: [0.1,0.2,...]; satu format string untuk seluruh vektor (lebih cepat daripada per elemen)
+_VECTOR_LITERAL_FORMAT = "[" + ",".join(["%.8g"] * EMBEDDING_DIMENSION) + "]"
+
+
+def _vector_literal(embedding: np.ndarray) -> str:
+    return _VECTOR_LITERAL_FORMAT % tuple(np.asarray(embedding, dtype=np.float32).tolist())
+
+
+def _copy_csv_value(value: Any) -> str:
+    """
+    Satu sel CSV untuk COPY: None menjadi sel kosong tanpa tanda kutip (NULL), string selalu diberi tanda kutip
+    sehingga string kosong tetap '' seperti pada jalur INSERT.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, int):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_chunk_rows(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Menyimpan potongan dengan `COPY learning_content (...) FROM STDIN` (CSV) melalui koneksi psycopg2 sesi ini.
+    Lebih cepat daripada INSERT untuk bulk load, tetapi tidak mengembalikan ID.
+    Nilai NULL dan string kosong tersimpan sama seperti insert_chunk_rows.
+    Berjalan di transaksi sesi; commit diserahkan ke pemanggil.
+    """
+    if not rows:
+        return 0
+    buffer = io.StringIO()
+    for row in rows:
+        content_type = row["content_type"]
+        buffer.write(",".join(_copy_csv_value(value) for value in (
+            row["title"],
+            row["source_url"],
+            row["source_domain"],
+            content_type.value if isinstance(content_type, ContentType) else content_type,
+            row["text_chunk"],
+            row["content_hash"],
+            row["chunk_index"],
+            row["document_version"],
+            _vector_literal(row["embedding"]),
+        )))
+        buffer.write("\n")
+    buffer.seek(0)
+    # FORMAT csv: sel kosong tanpa tanda kutip dibaca sebagai NULL, "" sebagai string kosong
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {LearningContent.__tablename__} ({', '.join(CHUNK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+class IndexResult(NamedTuple):
+    contents: List[LearningContent] # Potongan dokumen saat ini, terurut; tidak terikat ke sesi, tanpa embedding
+    version: int # SourceDocument.version setelah pengindeksan
+    inserted: int # Potongan baru yang ditulis
+    kept: int # Potongan yang tidak berubah (tidak di-embed ulang)
+    deleted: int # Potongan lama yang hilang dari dokumen dan dihapus
+    reused_embeddings: int # Potongan baru yang memakai embedding potongan identik yang sudah tersimpan
+    failed: int # Potongan yang gagal di-embed dan dilewati
+    unchanged: bool # True jika isi dan judul dokumen sama persis dengan pengindeksan terakhir
+
+
+def _lock_source_document(db: Session, source_url: str, title: str, content_type: ContentType) -> SourceDocument:
+    """
+    Mengambil (atau membuat) SourceDocument untuk URL dan menguncinya (SELECT ... FOR UPDATE) sampai commit,
+    sehingga dua pengindeksan URL yang sama tidak berjalan bersamaan dan menulis potongan ganda.
+    populate_existing: objek yang sudah dibaca tanpa kunci di sesi ini diperbarui dengan nilai terkini.
+    """
+    db.execute(
+        pg_insert(SourceDocument)
+        .values(source_url=source_url, title=title, content_type=content_type, version=0, chunk_count=0)
+        .on_conflict_do_nothing(index_elements=[SourceDocument.source_url])
+    )
+    return db.query(SourceDocument).filter(SourceDocument.source_url == source_url)\
+             .with_for_update().populate_existing().one()
+
+
+def _transient_content(content_id: int, row: Dict[str, Any]) -> LearningContent:
+    return LearningContent(id=content_id, **{key: value for key, value in row.items() if key != "embedding"})
+
+
+def _is_unchanged(document: Optional[SourceDocument], document_hash: str, title: str, content_type: ContentType) -> bool:
+    return document is not None and document.content_hash == document_hash \
+        and document.title == title and document.content_type == content_type
+
+
+class _PreparedChunks(NamedTuple):
+    chunk_rows: List[Dict[str, Any]] # Tanpa document_version (diisi setelah dokumen dikunci)
+    embeddings_by_hash: Dict[str, Any]
+    embedded_hashes: Set[str] # Hash yang baru di-embed (sisanya memakai ulang embedding tersimpan)
+
+
+def _prepare_chunks(db: Session, source_url: str, title: str, text_content: str, content_type: ContentType) -> _PreparedChunks:
+    """
+    Memotong teks, menghitung hash potongan, dan menyiapkan embedding setiap hash: dipakai ulang dari baris
+    tersimpan (sumber mana pun, termasuk URL ini) atau di-embed dalam satu panggilan get_embeddings.
+    Berjalan tanpa kunci SourceDocument; transaksi baca di-commit sebelum embedding agar tidak ditahan terbuka.
+    """
+    source_domain = normalize_source_domain(source_url) # Untuk filter domain di /search
+    chunk_rows = [
+        make_chunk_row(source_url, source_domain, title, content_type, chunk, None, i)
+        for i, chunk in enumerate(iter_chunks(text_content))
+    ]
+    texts_by_hash = {row["content_hash"]: row["text_chunk"] for row in chunk_rows}
+    embeddings_by_hash: Dict[str, Any] = {}
+    if texts_by_hash:
+        embeddings_by_hash = {
+            content_hash: embedding for content_hash, embedding in
+            db.query(LearningContent.content_hash, LearningContent.embedding)
+              .filter(LearningContent.content_hash.in_(texts_by_hash))
+              .distinct(LearningContent.content_hash)
+              .all()
+        }
+    db.commit()
+
+    to_embed = [(content_hash, text) for content_hash, text in texts_by_hash.items() if content_hash not in embeddings_by_hash]
+    embedded_hashes: Set[str] = set()
+    if to_embed:
+        chunk_embeddings, valid_embeddings = get_embeddings([text for _, text in to_embed])
+        for (content_hash, _), embedding, is_valid in zip(to_embed, chunk_embeddings, valid_embeddings):
+            if is_valid:
+                embeddings_by_hash[content_hash] = embedding
+                embedded_hashes.add(content_hash)
+    return _PreparedChunks(chunk_rows, embeddings_by_hash, embedded_hashes)
+
+
+def index_document(
+    db: Session,
+    source_url: str,
+    title: str,
+    text_content: str,
+    content_type: ContentType
+) -> IndexResult:
+    """
+    Mengindeks (atau mengindeks ulang) satu dokumen secara inkremental:
+    1. Jika hash seluruh teks dan judul sama dengan pengindeksan terakhir, tidak ada yang ditulis.
+    2. Setiap potongan diidentifikasi dengan SHA-256 teksnya. Potongan yang sudah ada untuk URL ini dipertahankan
+       (hanya urutan/versinya diperbarui), potongan yang hilang dihapus, dan hanya potongan baru yang ditulis.
+    3. Potongan baru yang teksnya identik dengan potongan lain yang sudah tersimpan (dari sumber mana pun)
+       memakai ulang embedding tersebut; sisanya di-embed dalam satu panggilan get_embeddings.
+    Pemotongan dan embedding dilakukan sebelum SourceDocument dikunci; kunci (FOR UPDATE) hanya dipegang
+    selama mencocokkan potongan dan menulis, sehingga pengindeksan ulang URL yang sama tidak saling menunggu
+    selama embedding. Semua perubahan untuk dokumen ini di-commit dalam satu transaksi.
+    """
+    document_hash = chunk_content_hash(text_content)
+
+    # Langkah 1 (tanpa kunci): potong teks dan siapkan embedding, kecuali dokumen jelas tidak berubah
+    prepared = None
+    current = db.query(SourceDocument).filter(SourceDocument.source_url == source_url).first()
+    if not _is_unchanged(current, document_hash, title, content_type):
+        prepared = _prepare_chunks(db, source_url, title, text_content, content_type)
+
+    document = _lock_source_document(db, source_url, title, content_type)
+    if _is_unchanged(document, document_hash, title, content_type):
+        rows = db.query(LearningContent.id, LearningContent.text_chunk, LearningContent.chunk_index)\
+                 .filter(LearningContent.source_url == source_url)\
+                 .order_by(LearningContent.chunk_index)\
+                 .all()
+        db.commit() # Melepas kunci
+        source_domain = normalize_source_domain(source_url)
+        contents = [
+            _transient_content(row.id, make_chunk_row(source_url, source_domain, title, content_type, row.text_chunk, None, row.chunk_index, document.version))
+            for row in rows
+        ]
+        print(f"Konten '{title}' ({source_url}) tidak berubah sejak versi {document.version}. Tidak ada yang diindeks ulang.")
+        return IndexResult(contents, document.version, 0, len(contents), 0, 0, 0, True)
+    if prepared is None:
+        # Dokumen berubah di antara pemeriksaan tanpa kunci dan penguncian (jarang): lepas kunci selama embedding
+        db.commit()
+        prepared = _prepare_chunks(db, source_url, title, text_content, content_type)
+        document = _lock_source_document(db, source_url, title, content_type)
+
+    version = document.version + 1
+    chunk_rows = prepared.chunk_rows
+    for row in chunk_rows:
+        row["document_version"] = version
+
+    # Langkah 2 (dengan kunci): cocokkan dengan potongan yang sudah ada untuk URL ini berdasarkan hash
+    existing_by_hash: Dict[str, List[int]] = defaultdict(list)
+    for content_id, content_hash in db.query(LearningContent.id, LearningContent.content_hash)\
+                                      .filter(LearningContent.source_url == source_url)\
+                                      .order_by(LearningContent.chunk_index, LearningContent.id):
+        existing_by_hash[content_hash].append(content_id)
+
+    kept_ids: Dict[int, int] = {} # Posisi potongan -> ID baris yang dipertahankan
+    new_positions = []
+    for i, row in enumerate(chunk_rows):
+        matches = existing_by_hash.get(row["content_hash"])
+        if matches:
+            kept_ids[i] = matches.pop(0)
+        else:
+            new_positions.append(i)
+    stale_ids = [content_id for ids in existing_by_hash.values() for content_id in ids]
+
+    rows_to_insert = []
+    failed = 0
+    reused = 0
+    for i in new_positions:
+        row = chunk_rows[i]
+        embedding = prepared.embeddings_by_hash.get(row["content_hash"])
+        if embedding is None:
+            print(f"Peringatan: Gagal menghasilkan embedding untuk potongan {i+1} dari '{title}'. Potongan dilewati.")
+            failed += 1
+            continue
+        if row["content_hash"] not in prepared.embedded_hashes:
+            reused += 1
+        row["embedding"] = embedding
+        rows_to_insert.append((i, row))
+
+    # Langkah 3: Tulis perubahan dalam satu transaksi: hapus potongan lama, perbarui yang dipertahankan,
+    # dan sisipkan yang baru dengan satu INSERT multi-baris ... RETURNING id
+    try:
+        if stale_ids:
+            db.query(LearningContent).filter(LearningContent.id.in_(stale_ids)).delete(synchronize_session=False)
+        if kept_ids:
+            db.bulk_update_mappings(LearningContent, [
+                {"id": content_id, "chunk_index": i, "document_version": version, "title": title, "content_type": content_type}
+                for i, content_id in kept_ids.items()
+            ])
+        inserted_ids = insert_chunk_rows(db, [row for _, row in rows_to_insert])
+        document.title = title
+        document.content_type = content_type
+        document.version = version
+        document.chunk_count = len(kept_ids) + len(inserted_ids)
+        # Jika ada potongan yang gagal, hash dokumen tidak disimpan agar pengindeksan berikutnya mencoba lagi
+        document.content_hash = document_hash if failed == 0 else None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error saat melakukan commit ke database untuk '{title}': {e}")
+        raise
+
+    ids_by_position = dict(kept_ids)
+    ids_by_position.update({i: content_id for (i, _), content_id in zip(rows_to_insert, inserted_ids)})
+    contents = [_transient_content(ids_by_position[i], chunk_rows[i]) for i in sorted(ids_by_position)]
+    print(
+        f"Berhasil mengindeks '{title}' ({source_url}) versi {version}: {len(inserted_ids)} potongan baru "
+        f"({reused} embedding dipakai ulang), {len(kept_ids)} tidak berubah, {len(stale_ids)} dihapus."
+    )
+    return IndexResult(contents, version, len(inserted_ids), len(kept_ids), len(stale_ids), reused, failed, False)
+
+
 def index_content(
     db: Session,
     source_url: str,
@@ -16,6 +320,8 @@ def index_content(
     """
     Memproses teks konten, memecahnya menjadi potongan, menghasilkan embedding,
     dan menyimpan setiap potongan beserta embeddingnya ke database.
+    Pengindeksan ulang URL yang sama bersifat inkremental (lihat index_document).
+    Untuk load awal banyak dokumen sekaligus, gunakan bulk_indexing.bulk_index_documents.
 
     Args:
         db: Sesi database SQLAlchemy.
@@ -25,56 +331,19 @@ def index_content(
         content_type: Jenis konten (dari enum ContentType).
 
     Returns:
-        Daftar objek LearningContent yang telah disimpan ke database.
-        Mengembalikan daftar kosong jika teks konten kosong atau terjadi error embedding.
+        Daftar objek LearningContent dokumen ini yang tersimpan di database.
+        Mengembalikan daftar kosong jika teks konten kosong atau terjadi error database.
     """
     if not text_content or not text_content.strip():
         print(f"Peringatan: Konten teks untuk '{title}' ({source_url}) kosong. Tidak ada yang diindeks.")
         return []
 
-    # Langkah 1: Potong teks menggunakan fungsi dari data_ingestion.py
-    # Parameter chunk_size dan chunk_overlap default akan digunakan (1000, 150)
-    text_chunks = chunk_text(text_content)
-
-    if not text_chunks:
-        print(f"Peringatan: Tidak ada potongan teks yang dihasilkan untuk '{title}' ({source_url}).")
-        return []
-
-    indexed_contents: List[LearningContent] = []
-    for i, chunk in enumerate(text_chunks):
-        # Langkah 2: Hasilkan embedding untuk setiap potongan
-        embedding_vector = get_embedding(chunk)
-
-        if embedding_vector is None:
-            print(f"Peringatan: Gagal menghasilkan embedding untuk potongan {i+1} dari '{title}'. Potongan dilewati.")
-            continue # Lewati potongan ini jika embedding gagal
-
-        # Langkah 3: Simpan potongan dan embeddingnya ke tabel learning_content
-        db_content = LearningContent(
-            title=title,
-            source_url=source_url,
-            content_type=content_type,
-            text_chunk=chunk,
-            embedding=embedding_vector
-            # Anda bisa menambahkan chunk_sequence=i jika kolom itu ada di model
-        )
-        db.add(db_content)
-        indexed_contents.append(db_content)
-        print(f"Potongan {i+1} dari '{title}' disiapkan untuk diindeks.")
-
     try:
-        db.commit()
-        for content in indexed_contents:
-            db.refresh(content) # Refresh untuk mendapatkan ID yang dihasilkan DB, dll.
-        print(f"Berhasil mengindeks {len(indexed_contents)} potongan untuk '{title}' ({source_url}).")
-    except Exception as e:
-        db.rollback()
-        print(f"Error saat melakukan commit ke database untuk '{title}': {e}")
+        return index_document(db, source_url, title, text_content, content_type).contents
+    except Exception:
         # Mengembalikan daftar kosong karena tidak ada yang berhasil disimpan
         return []
 
-    return indexed_contents
-
 # Contoh penggunaan dasar (untuk pengujian atau pemanggilan dari skrip lain):
 # if __name__ == "__main__":
 #     from .database import SessionLocal, create_db_and_tables
@@ -0,0 +1,418 @@
+import os
+import json
+import uuid
+import socket
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import ContentType, IngestionJob, IngestionJobStatus
+
+# Antrean job ingestion berbasis tabel Postgres `ingestion_jobs`.
+# - Endpoint hanya menyisipkan job lalu langsung mengembalikan job_id.
+# - Worker (thread di proses aplikasi) mengklaim job dengan SELECT ... FOR UPDATE SKIP LOCKED,
+#   sehingga beberapa worker dan beberapa proses uvicorn dapat berbagi antrean yang sama.
+# - Job yang gagal dicoba ulang dengan backoff eksponensial sampai max_attempts.
+# - Selama job berjalan, thread heartbeat memperbarui heartbeat_at setiap INGESTION_HEARTBEAT_SECONDS.
+# - Job "running" yang heartbeat-nya berhenti (proses mati) dikembalikan ke antrean, atau ditandai gagal
+#   jika percobaannya sudah habis.
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2")) # 0 untuk menonaktifkan worker di proses ini
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+INGESTION_RETRY_BASE_SECONDS = float(os.getenv("INGESTION_RETRY_BASE_SECONDS", "10"))
+INGESTION_POLL_INTERVAL_SECONDS = float(os.getenv("INGESTION_POLL_INTERVAL_SECONDS", "2"))
+INGESTION_STALE_JOB_SECONDS = int(os.getenv("INGESTION_STALE_JOB_SECONDS", "600"))
+# Harus jauh lebih kecil dari INGESTION_STALE_JOB_SECONDS
+INGESTION_HEARTBEAT_SECONDS = float(os.getenv("INGESTION_HEARTBEAT_SECONDS", "30"))
+# Jumlah job per INSERT multi-baris saat bulk submit
+INGESTION_BULK_INSERT_BATCH = int(os.getenv("INGESTION_BULK_INSERT_BATCH", "1000"))
+
+ProgressCallback = Callable[[str, int], None]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_to_dict(job: IngestionJob) -> Dict[str, Any]:
+    """
+    Mengubah IngestionJob menjadi dict yang sesuai dengan schemas.IngestionJobRead.
+    """
+    return {
+        "id": job.id,
+        "batch_id": job.batch_id,
+        "url": job.url,
+        "title": job.title,
+        "content_type": job.content_type.value if job.content_type else None,
+        "status": job.status.value if job.status else None,
+        "stage": job.stage,
+        "progress": job.progress or 0,
+        "attempts": job.attempts or 0,
+        "max_attempts": job.max_attempts,
+        "error": job.error,
+        "result": json.loads(job.result_json) if job.result_json else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def submit_job(db: Session, url: str, title: Optional[str], content_type: ContentType) -> IngestionJob:
+    """
+    Menambahkan satu job ke antrean dan membangunkan worker lokal.
+    """
+    job = IngestionJob(
+        id=str(uuid.uuid4()),
+        url=url,
+        title=title,
+        content_type=content_type,
+        status=IngestionJobStatus.QUEUED,
+        progress=0,
+        attempts=0,
+        max_attempts=INGESTION_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    db.commit()
+    ingestion_worker_pool.notify()
+    return job
+
+
+def submit_bulk_jobs(db: Session, urls: List[str], content_type: ContentType) -> Dict[str, Any]:
+    """
+    Mengantrekan banyak URL sebagai satu batch dengan INSERT multi-baris (tanpa objek ORM per job).
+    URL duplikat di dalam permintaan hanya diantrekan sekali.
+    """
+    batch_id = str(uuid.uuid4())
+    unique_urls = list(dict.fromkeys(urls))
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "batch_id": batch_id,
+            "url": url,
+            "content_type": content_type,
+            "status": IngestionJobStatus.QUEUED,
+            "progress": 0,
+            "attempts": 0,
+            "max_attempts": INGESTION_MAX_ATTEMPTS,
+        }
+        for url in unique_urls
+    ]
+    for start in range(0, len(rows), INGESTION_BULK_INSERT_BATCH):
+        db.execute(insert(IngestionJob).values(rows[start:start + INGESTION_BULK_INSERT_BATCH]))
+    db.commit()
+    ingestion_worker_pool.notify()
+    return {"batch_id": batch_id, "job_count": len(rows)}
+
+
+def get_job(db: Session, job_id: str) -> Optional[IngestionJob]:
+    return db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+
+
+def get_batch_summary(db: Session, batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Jumlah job per status dan rata-rata progress untuk satu batch, dihitung dengan satu kueri agregat.
+    """
+    rows = db.query(IngestionJob.status, func.count(IngestionJob.id), func.coalesce(func.sum(IngestionJob.progress), 0))\
+             .filter(IngestionJob.batch_id == batch_id)\
+             .group_by(IngestionJob.status)\
+             .all()
+    if not rows:
+        return None
+    counts = {status.value: 0 for status in IngestionJobStatus}
+    total = 0
+    progress_sum = 0
+    for status, count, status_progress in rows:
+        counts[status.value] = count
+        total += count
+        progress_sum += int(status_progress)
+    return {"batch_id": batch_id, "total": total, "counts": counts, "progress": round(progress_sum / total, 1)}
+
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[IngestionJob]:
+    """
+    Mengklaim satu job yang siap dijalankan secara atomik. SKIP LOCKED membuat worker lain
+    langsung melewati job yang sedang diklaim, tanpa saling menunggu.
+    """
+    job = db.query(IngestionJob)\
+            .filter(IngestionJob.status == IngestionJobStatus.QUEUED)\
+            .filter(IngestionJob.next_attempt_at <= func.now())\
+            .order_by(IngestionJob.next_attempt_at, IngestionJob.created_at)\
+            .with_for_update(skip_locked=True)\
+            .first()
+    if job is None:
+        db.rollback()
+        return None
+    now = _utcnow()
+    job.status = IngestionJobStatus.RUNNING
+    job.attempts = (job.attempts or 0) + 1
+    job.worker_id = worker_id
+    job.stage = "starting"
+    job.progress = 0
+    job.started_at = now
+    job.heartbeat_at = now
+    db.commit()
+    return job
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """
+    Mengembalikan job "running" yang heartbeat-nya lebih lama dari INGESTION_STALE_JOB_SECONDS ke antrean
+    (misalnya karena proses worker mati saat deploy). Job yang percobaannya sudah mencapai max_attempts
+    ditandai FAILED, sehingga job yang selalu membuat worker mati tidak diulang tanpa batas.
+    Mengembalikan jumlah job yang dikembalikan ke antrean.
+    """
+    stale_before = _utcnow() - timedelta(seconds=INGESTION_STALE_JOB_SECONDS)
+    failed = db.query(IngestionJob)\
+               .filter(IngestionJob.status == IngestionJobStatus.RUNNING)\
+               .filter(IngestionJob.heartbeat_at < stale_before)\
+               .filter(IngestionJob.attempts >= IngestionJob.max_attempts)\
+               .update({
+                   IngestionJob.status: IngestionJobStatus.FAILED,
+                   IngestionJob.stage: "failed",
+                   IngestionJob.worker_id: None,
+                   IngestionJob.error: "Worker berhenti mengirim heartbeat pada percobaan terakhir.",
+                   IngestionJob.finished_at: func.now(),
+               }, synchronize_session=False)
+    count = db.query(IngestionJob)\
+              .filter(IngestionJob.status == IngestionJobStatus.RUNNING)\
+              .filter(IngestionJob.heartbeat_at < stale_before)\
+              .filter(IngestionJob.attempts < IngestionJob.max_attempts)\
+              .update({
+                  IngestionJob.status: IngestionJobStatus.QUEUED,
+                  IngestionJob.stage: None,
+                  IngestionJob.worker_id: None,
+                  IngestionJob.next_attempt_at: func.now(),
+              }, synchronize_session=False)
+    db.commit()
+    if failed:
+        print(f"{failed} job ingestion yang macet ditandai gagal (percobaan habis).")
+    if count:
+        print(f"{count} job ingestion yang macet dikembalikan ke antrean.")
+    return count
+
+
+def _update_progress(job_id: str, stage: str, progress: int) -> None:
+    # Sesi terpisah agar progress terlihat oleh klien segera, tanpa menunggu transaksi pengindeksan selesai
+    db = SessionLocal()
+    try:
+        db.query(IngestionJob).filter(IngestionJob.id == job_id).update({
+            IngestionJob.stage: stage,
+            IngestionJob.progress: progress,
+            IngestionJob.heartbeat_at: _utcnow(),
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _send_heartbeat(job_id: str, worker_id: str) -> None:
+    # Hanya selama job masih dipegang worker ini (bukan setelah dikembalikan ke antrean oleh requeue_stale_jobs)
+    db = SessionLocal()
+    try:
+        db.query(IngestionJob)\
+          .filter(IngestionJob.id == job_id)\
+          .filter(IngestionJob.status == IngestionJobStatus.RUNNING)\
+          .filter(IngestionJob.worker_id == worker_id)\
+          .update({IngestionJob.heartbeat_at: _utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+class _JobHeartbeat:
+    """
+    Thread yang mengirim heartbeat selama job berjalan, termasuk di tahap panjang tanpa laporan progress
+    (misalnya embedding dokumen besar di index_document).
+    """
+
+    def __init__(self, job_id: str, worker_id: str, interval: float = INGESTION_HEARTBEAT_SECONDS):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"ingestion-heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self) -> "_JobHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                _send_heartbeat(self.job_id, self.worker_id)
+            except Exception as e:
+                print(f"PERINGATAN: Gagal mengirim heartbeat job ingestion {self.job_id}: {e}")
+
+
+def run_ingestion(
+    db: Session,
+    url: str,
+    title: Optional[str],
+    content_type: ContentType,
+    on_progress: ProgressCallback
+) -> Dict[str, Any]:
+    """
+    Pipeline ingestion satu URL: ambil konten dan judul, lalu index_document (inkremental).
+    Mengembalikan ringkasan hasil. Exception diteruskan agar job dicoba ulang.
+    """
+    # Impor lokal: fetcher memuat dependensi scraping yang berat
+    from .fetcher import get_shared_fetcher
+    from .indexing import index_document
+
+    if content_type != ContentType.ARTICLE:
+        raise ValueError(f"Tipe konten '{content_type.value}' saat ini tidak didukung untuk pengindeksan otomatis dari URL.")
+
+    on_progress("fetching", 10)
+    # Satu permintaan HTTP untuk judul dan teks; pool koneksi dan batas per host dipakai bersama semua worker
+    fetched = get_shared_fetcher().fetch(url)
+    if not fetched.ok or not fetched.text:
+        raise RuntimeError(f"Gagal mengambil atau memproses konten artikel dari URL: {url}" + (f" ({fetched.error})" if fetched.error else ""))
+
+    article_title = title or fetched.title or "Artikel Tidak Berjudul"
+
+    on_progress("indexing", 40)
+    result = index_document(db, url, article_title, fetched.text, content_type)
+    return {
+        "title": article_title,
+        "indexed_chunks": len(result.contents),
+        "first_chunk_id": result.contents[0].id if result.contents else None,
+        "document_version": result.version,
+        "inserted_chunks": result.inserted,
+        "unchanged_chunks": result.kept,
+        "deleted_chunks": result.deleted,
+        "reused_embeddings": result.reused_embeddings,
+        "failed_chunks": result.failed,
+        "unchanged": result.unchanged,
+        "not_modified": fetched.not_modified,
+    }
+
+
+def process_job(db: Session, job: IngestionJob) -> None:
+    """
+    Menjalankan job yang sudah diklaim dan mencatat hasil, atau menjadwalkan retry dengan backoff eksponensial.
+    """
+    job_id = job.id
+    try:
+        with _JobHeartbeat(job_id, job.worker_id):
+            result = run_ingestion(db, job.url, job.title, job.content_type, lambda stage, progress: _update_progress(job_id, stage, progress))
+        job = get_job(db, job_id)
+        job.status = IngestionJobStatus.SUCCEEDED
+        job.stage = "done"
+        job.progress = 100
+        job.error = None
+        job.result_json = json.dumps(result)
+        job.finished_at = _utcnow()
+        db.commit()
+        print(f"Job ingestion {job_id} selesai: {job.url}")
+    except Exception as e:
+        db.rollback()
+        job = get_job(db, job_id)
+        job.error = str(e)[:2000]
+        job.worker_id = None
+        if job.attempts < job.max_attempts:
+            delay = INGESTION_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1))
+            job.status = IngestionJobStatus.QUEUED
+            job.stage = "retry_scheduled"
+            job.next_attempt_at = _utcnow() + timedelta(seconds=delay)
+            print(f"Job ingestion {job_id} gagal (percobaan {job.attempts}/{job.max_attempts}), dicoba lagi dalam {delay:.0f} detik: {e}")
+        else:
+            job.status = IngestionJobStatus.FAILED
+            job.stage = "failed"
+            job.finished_at = _utcnow()
+            print(f"Job ingestion {job_id} gagal permanen setelah {job.attempts} percobaan: {e}")
+        db.commit()
+
+
+class IngestionWorkerPool:
+    """
+    Sekumpulan thread worker yang memproses job dari tabel ingestion_jobs.
+    Worker tidur sampai INGESTION_POLL_INTERVAL_SECONDS atau sampai notify() dipanggil oleh submit di proses ini.
+    """
+
+    def __init__(self, num_workers: int = INGESTION_WORKERS):
+        self.num_workers = num_workers
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._last_stale_check = time.monotonic()
+        self.processed = 0
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._threads or self.num_workers <= 0:
+            return
+        db = SessionLocal()
+        try:
+            requeue_stale_jobs(db)
+        except Exception as e:
+            print(f"PERINGATAN: Gagal memeriksa job ingestion yang macet: {e}")
+        finally:
+            db.close()
+        self._stop.clear()
+        for i in range(self.num_workers):
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{i}"
+            thread = threading.Thread(target=self._run, args=(worker_id,), name=f"ingestion-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"{self.num_workers} worker ingestion dimulai.")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Meminta worker berhenti setelah job yang sedang berjalan. Job yang belum selesai saat timeout
+        akan dikembalikan ke antrean oleh requeue_stale_jobs.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _run(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job = claim_next_job(db, worker_id)
+                if job is not None:
+                    process_job(db, job)
+                    with self._lock:
+                        self.processed += 1
+                    continue # Langsung ambil job berikutnya
+                self._maybe_requeue_stale_jobs(db)
+            except Exception as e:
+                print(f"Error di worker ingestion {worker_id}: {e}")
+            finally:
+                db.close()
+            self._wakeup.wait(INGESTION_POLL_INTERVAL_SECONDS)
+            self._wakeup.clear()
+
+    def _maybe_requeue_stale_jobs(self, db: Session) -> None:
+        # Saat antrean kosong, salah satu worker memeriksa job macet secara berkala
+        with self._lock:
+            if time.monotonic() - self._last_stale_check < INGESTION_STALE_JOB_SECONDS / 2:
+                return
+            self._last_stale_check = time.monotonic()
+        requeue_stale_jobs(db)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            processed = self.processed
+        return {
+            "workers": self.num_workers,
+            "alive_workers": sum(1 for thread in self._threads if thread.is_alive()),
+            "processed_in_process": processed,
+        }
+
+
+# Instance global yang dimulai saat startup aplikasi
+ingestion_worker_pool = IngestionWorkerPool()
@@ -1,18 +1,33 @@
 import os # Ditambahkan untuk pemeriksaan getenv di startup
+import asyncio
 from fastapi import FastAPI, HTTPException, Body, Depends, Query as FastAPIQuery
-from typing import List, Optional
+from fastapi.responses import JSONResponse
+from typing import List, Optional, Literal
 from sqlalchemy.orm import Session
 
 from .schemas import ( # Mengimpor model Pydantic
     Curriculum, CurriculumGoalRequest,
     SearchResponse, SearchResultItem
 )
-from .ai_services import generate_curriculum_from_goal, get_embedding # Mengimpor layanan AI
-from .database import create_db_and_tables, get_db # Untuk DB setup dan session
+from .ai_services import ( # Mengimpor layanan AI
+    generate_curriculum_from_goal, get_embedding_async,
+    embedding_executor, embedding_batcher, query_embedding_cache, EmbeddingQueueFullError,
+    start_embedding_model_warmup, embedding_model_status, is_embedding_model_ready, EmbeddingModelNotReadyError
+)
+from .curriculum_cache import curriculum_cache, normalize_goal # Cache kurikulum (memori + database)
+from . import search as content_search # Kueri pencarian vektor dan hybrid
+from . import vector_index # Manajemen indeks ANN pgvector (HNSW/IVFFlat)
+from . import memory_index # Indeks vektor in-memory (snapshot NumPy) sebagai alternatif pgvector
+from .database import create_db_and_tables, get_db, SessionLocal # Untuk DB setup dan session
 from .models import LearningContent, ContentType as ContentTypeEnum # Model database dan Enum
-from pydantic import HttpUrl # Untuk validasi URL di IndexUrlRequest
-import requests # Untuk mengambil judul di endpoint indeks
-from bs4 import BeautifulSoup # Untuk parsing HTML judul di endpoint indeks
+from pydantic import BaseModel # Untuk validasi body request
+from . import ingestion_jobs # Antrean job ingestion konten (worker background)
+from . import fetcher # Fetcher artikel async bersama (dipakai worker ingestion)
+from . import forum_service # Indeks paginasi forum
+from .counter_buffer import COUNTER_ORPHAN_SECONDS, FORUM_COUNTER_WRITE_BEHIND, counter_buffer # Write-behind upvotes/XP dari vote forum
+from .resource_discovery import CURRICULUM_ATTACH_VIDEOS, youtube_discovery # Video YouTube per modul
+from .index_maintenance import IndexMaintenanceBusyError # Build indeks lain sedang berjalan (HTTP 409)
+from .admin_auth import require_admin_user # Endpoint operasional khusus admin
 
 
 # Panggil create_db_and_tables() di sini atau gunakan event handler startup.
@@ -41,10 +56,49 @@ def on_startup():
     print("Aplikasi FastAPI memulai...")
     create_db_and_tables()
     print("Pemeriksaan/pembuatan tabel database selesai.")
-    # Anda bisa menambahkan inisialisasi lain di sini jika perlu
-    # Misalnya, memastikan model embedding dimuat (meskipun ai_services.py sudah melakukannya saat impor)
-    if get_embedding("test") is None and os.getenv("GEMINI_API_KEY"): # Cek sederhana jika embedding service bermasalah
-        print("PERINGATAN PENTING: Fungsi get_embedding mungkin tidak berfungsi dengan benar.")
+    # Kolom LearningContent yang lebih baru (filter /search, re-indexing inkremental) pada tabel lama
+    db = SessionLocal()
+    try:
+        vector_index.ensure_learning_content_columns(db)
+    except Exception as e:
+        print(f"PERINGATAN: Gagal memastikan kolom learning_content: {e}")
+    finally:
+        db.close()
+    # Indeks ANN untuk LearningContent.embedding (agar /search tidak melakukan sequential scan) dan indeks filter
+    # dibangun di thread background oleh satu worker saja (advisory lock); indeks INVALID dibuat ulang
+    vector_index.start_index_maintenance(SessionLocal)
+    # Indeks komposit (created_at, id) untuk paginasi keyset forum pada tabel yang sudah ada, juga di background
+    forum_service.start_forum_index_maintenance(SessionLocal)
+    # Model embedding dimuat di background agar startup tidak menunggu pemuatan model.
+    # Warm-up juga menjalankan get_embedding("test") yang menghangatkan cache embedding kueri.
+    # Endpoint yang tidak memerlukan embedding langsung dapat digunakan; cek GET /health/embedding.
+    start_embedding_model_warmup()
+    # Jika SEARCH_BACKEND="memory", /search dilayani dari snapshot embedding di MEMORY_INDEX_PATH
+    memory_index.load_memory_index_if_enabled()
+    # Worker yang memproses job /index-content di background
+    ingestion_jobs.ingestion_worker_pool.start()
+    # Delta upvotes/XP dari vote forum: terapkan jurnal yang tertinggal (crash sebelumnya), lalu flush berkala.
+    # Hanya baris yang lebih tua dari COUNTER_ORPHAN_SECONDS: baris yang lebih baru mungkin masih milik buffer
+    # worker lain yang sedang berjalan (deploy bergulir / beberapa worker) dan akan di-flush olehnya.
+    if FORUM_COUNTER_WRITE_BEHIND:
+        try:
+            counter_buffer.recover_pending(older_than_seconds=COUNTER_ORPHAN_SECONDS)
+        except Exception as e:
+            print(f"PERINGATAN: Gagal menerapkan jurnal delta hitungan: {e}")
+        counter_buffer.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """
+    Fungsi yang dijalankan saat aplikasi FastAPI berhenti.
+    Menghentikan worker ingestion, fetcher artikel bersama, dan thread pool embedding,
+    serta mem-flush delta upvotes/XP yang masih di-buffer.
+    """
+    counter_buffer.stop()
+    ingestion_jobs.ingestion_worker_pool.stop()
+    fetcher.close_shared_fetcher()
+    embedding_executor.shutdown()
 
 
 @app.get("/", tags=["General"])
@@ -56,9 +110,19 @@ async def root():
     """
     return {"message": "MentorAI Backend is running"}
 
+
+@app.get("/health/embedding", tags=["General"])
+async def embedding_readiness():
+    """
+    Endpoint readiness untuk model embedding.
+    Mengembalikan 200 jika model sudah siap, atau 503 selama model masih dimuat (atau gagal dimuat).
+    """
+    return JSONResponse(status_code=200 if is_embedding_model_ready() else 503, content=embedding_model_status())
+
 @app.post("/curriculum", response_model=Curriculum, tags=["Curriculum Generation"])
 async def create_curriculum_endpoint(
-    request_body: CurriculumGoalRequest = Body(..., description="Tujuan pembelajaran pengguna untuk menghasilkan kurikulum.")
+    request_body: CurriculumGoalRequest = Body(..., description="Tujuan pembelajaran pengguna untuk menghasilkan kurikulum."),
+    db: Session = Depends(get_db)
 ):
     """
     Membuat dan mengembalikan kurikulum pembelajaran yang dipersonalisasi berdasarkan tujuan (goal) yang diberikan pengguna.
@@ -68,16 +132,44 @@ async def create_curriculum_endpoint(
     2.  Untuk setiap modul, menghasilkan detail seperti tujuan pembelajaran, topik, deskripsi, dan kata kunci.
 
     Outputnya adalah objek Kurikulum terstruktur yang siap digunakan oleh frontend atau layanan lain.
+
+    Kurikulum yang sudah pernah dihasilkan untuk tujuan yang sama (setelah normalisasi huruf besar/kecil
+    dan spasi) diambil dari cache tanpa memanggil Gemini. Jika tidak ada yang sama persis, kurikulum
+    dari tujuan yang mirip secara semantik (kesamaan kosinus di atas ambang batas) akan dipakai ulang.
+
+    Setiap modul dilengkapi video YouTube berdasarkan kata kuncinya (pencarian bersamaan, di-cache per set
+    kata kunci). Video tidak disimpan di cache kurikulum, sehingga mengikuti TTL cache video sendiri.
     """
     try:
         print(f"Menerima permintaan kurikulum untuk tujuan: {request_body.goal}")
+        # Operasi cache memakai Session sinkron (kueri Postgres saat cache memori miss), jadi dijalankan
+        # di thread agar tidak memblokir event loop. Sesi dipakai bergantian, tidak pernah bersamaan.
+        cached_curriculum = await asyncio.to_thread(curriculum_cache.get, db, request_body.goal)
+        if cached_curriculum is not None:
+            print(f"Cache hit kurikulum untuk tujuan: {request_body.goal}")
+            return await _with_videos(cached_curriculum)
+
+        # Embedding tujuan dipakai untuk mencari tujuan serupa dan disimpan bersama kurikulum baru.
+        # Jika antrean embedding penuh, pencarian semantik dilewati dan kurikulum dihasilkan seperti biasa.
+        try:
+            goal_embedding = await get_embedding_async(normalize_goal(request_body.goal))
+        except (EmbeddingQueueFullError, EmbeddingModelNotReadyError):
+            goal_embedding = None
+        similar_curriculum = await asyncio.to_thread(curriculum_cache.find_similar, db, request_body.goal, goal_embedding)
+        if similar_curriculum is not None:
+            print(f"Cache hit semantik kurikulum untuk tujuan: {request_body.goal}")
+            return await _with_videos(similar_curriculum)
+
         curriculum_result = await generate_curriculum_from_goal(request_body.goal)
         if not curriculum_result.modules:
             # Ini bisa terjadi jika AI tidak dapat menghasilkan modul yang valid atau terjadi error parsial
             # Pertimbangkan apakah akan mengembalikan 200 dengan modul kosong atau error tertentu.
             # Untuk saat ini, kita kembalikan apa yang dihasilkan, bahkan jika modul kosong.
             print(f"PERINGATAN: Kurikulum yang dihasilkan untuk '{request_body.goal}' tidak memiliki modul.")
-        return curriculum_result
+        else:
+            # Hanya kurikulum yang berhasil (memiliki modul) yang disimpan ke cache
+            await asyncio.to_thread(curriculum_cache.set, db, request_body.goal, curriculum_result, goal_embedding=goal_embedding)
+        return await _with_videos(curriculum_result)
     except ValueError as ve:
         # Error yang diketahui, seperti GEMINI_API_KEY tidak ada atau parsing JSON gagal
         print(f"ValueError saat membuat kurikulum: {ve}")
@@ -92,10 +184,59 @@ async def create_curriculum_endpoint(
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan internal server yang tidak terduga: {e}")
 
 
+async def _with_videos(curriculum: Curriculum) -> Curriculum:
+    if not CURRICULUM_ATTACH_VIDEOS:
+        return curriculum
+    return await youtube_discovery.attach_videos(curriculum)
+
+
+@app.get("/curriculum/video-stats", tags=["Curriculum Generation"])
+async def curriculum_video_stats_endpoint():
+    """
+    Mengembalikan penghitung penemuan video YouTube (panggilan API, cache hit, pencarian yang digabung, error).
+    """
+    return youtube_discovery.stats()
+
+
+@app.get("/forum/counter-stats", tags=["Forum"])
+async def forum_counter_stats_endpoint():
+    """
+    Mengembalikan penghitung buffer write-behind vote forum (baris jurnal yang di-buffer, flush, UPDATE baris).
+    """
+    return counter_buffer.stats()
+
+
+@app.get("/curriculum/cache-stats", tags=["Curriculum Generation"])
+async def curriculum_cache_stats_endpoint():
+    """
+    Mengembalikan penghitung cache kurikulum (hit memori/database, hit/miss semantik, eviction).
+    Berguna untuk menyetel CURRICULUM_SEMANTIC_SIMILARITY_THRESHOLD.
+    """
+    return curriculum_cache.stats()
+
+
+@app.get("/embedding/stats", tags=["Search"])
+async def embedding_stats_endpoint():
+    """
+    Mengembalikan metrik executor embedding (kedalaman antrean, waktu tunggu, permintaan yang ditolak)
+    dan metrik micro-batching serta cache embedding kueri.
+    """
+    return {
+        "executor": embedding_executor.stats(),
+        "micro_batching": embedding_batcher.stats(),
+        "query_cache": query_embedding_cache.stats(),
+    }
+
+
 @app.get("/search", response_model=SearchResponse, tags=["Search"])
 async def search_learning_content(
     query: str = FastAPIQuery(..., min_length=3, max_length=200, description="Kueri pencarian pengguna."),
     top_k: int = FastAPIQuery(10, ge=1, le=50, description="Jumlah hasil teratas yang akan dikembalikan."),
+    mode: Literal["vector", "hybrid"] = FastAPIQuery("vector", description="'vector' (semantik murni) atau 'hybrid' (vektor + full-text dengan Reciprocal Rank Fusion)."),
+    recall: Literal["fast", "balanced", "accurate"] = FastAPIQuery("balanced", description="Trade-off recall/latensi indeks ANN (ef_search untuk HNSW, probes untuk IVFFlat)."),
+    content_type: Optional[ContentTypeEnum] = FastAPIQuery(None, description="Hanya kembalikan konten dengan tipe ini (misalnya 'article' atau 'youtube_transcript')."),
+    source_domain: Optional[str] = FastAPIQuery(None, max_length=255, description="Hanya kembalikan konten dari domain ini (misalnya 'docs.python.org'); 'www.' diabaikan."),
+    title_prefix: Optional[str] = FastAPIQuery(None, min_length=1, max_length=200, description="Hanya kembalikan konten yang judulnya diawali teks ini (peka huruf besar/kecil)."),
     db: Session = Depends(get_db)
 ):
     """
@@ -104,137 +245,165 @@ async def search_learning_content(
     Endpoint ini akan:
     1. Menghasilkan embedding vektor untuk kueri pencarian pengguna.
     2. Mencari di database untuk potongan konten yang memiliki embedding paling mirip
-       (menggunakan kesamaan kosinus) dengan embedding kueri.
-    3. Mengembalikan daftar potongan konten yang paling relevan.
+       (menggunakan kesamaan kosinus) dengan embedding kueri. Pada mode `hybrid`, kandidat vektor
+       digabung dengan kandidat full-text Postgres melalui Reciprocal Rank Fusion dalam satu kueri SQL.
+       Filter `content_type`, `source_domain`, dan `title_prefix` diterapkan di dalam kueri yang sama.
+    3. Mengembalikan daftar potongan konten yang paling relevan beserta skor kesamaannya.
     """
-    print(f"Menerima permintaan pencarian untuk kueri: '{query}' dengan top_k={top_k}")
+    print(f"Menerima permintaan pencarian untuk kueri: '{query}' dengan top_k={top_k}, mode={mode}")
+    filters = content_search.SearchFilters(content_type=content_type, source_domain=source_domain, title_prefix=title_prefix)
+    use_memory_index = memory_index.SEARCH_BACKEND == "memory"
+    if use_memory_index and mode == "hybrid":
+        raise HTTPException(status_code=400, detail="Mode 'hybrid' memerlukan SEARCH_BACKEND=pgvector (full-text Postgres).")
 
-    query_embedding = get_embedding(query)
+    try:
+        # Inferensi embedding dijalankan di thread pool agar tidak memblokir event loop
+        query_embedding = await get_embedding_async(query)
+    except EmbeddingQueueFullError as e:
+        print(f"Antrean embedding penuh, menolak kueri: '{query}'")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except EmbeddingModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     if query_embedding is None:
         print(f"Gagal menghasilkan embedding untuk kueri: '{query}'")
         raise HTTPException(status_code=500, detail="Gagal memproses kueri pencarian (embedding error).")
 
     try:
-        # Melakukan pencarian kesamaan kosinus.
-        # Operator <=> menghitung jarak kosinus. Semakin kecil jaraknya, semakin mirip.
-        # Untuk kesamaan kosinus (di mana nilai yang lebih tinggi lebih baik), Anda mungkin perlu 1 - jarak,
-        # atau menggunakan operator lain jika pgvector mendukungnya secara langsung (misalnya, inner product #>).
-        # pgvector: L2 distance (<->), inner product (<#>), cosine distance (<=>).
-        # Cosine distance = 1 - cosine similarity. Jadi, order by ASC pada cosine distance adalah benar.
-
-        # Opsi 1: Menggunakan cosine_distance (jarak, lebih kecil lebih baik)
-        # results = db.query(LearningContent).order_by(LearningContent.embedding.cosine_distance(query_embedding)).limit(top_k).all()
-
-        # Opsi 2: Menggunakan max_inner_product (produk dalam, lebih besar lebih baik untuk vektor ternormalisasi)
-        # Jika embedding Anda ternormalisasi, produk dalam negatif setara dengan jarak kosinus.
-        # results = db.query(LearningContent).order_by(LearningContent.embedding.max_inner_product(query_embedding).desc()).limit(top_k).all()
-
-        # Kita akan tetap menggunakan cosine_distance karena lebih intuitif (jarak lebih kecil = lebih mirip)
-        # dan umum digunakan.
-
-        similar_contents = db.query(LearningContent)\
-                             .order_by(LearningContent.embedding.cosine_distance(query_embedding))\
-                             .limit(top_k)\
-                             .all()
-
-        # Jika Anda ingin skor kesamaan (0 hingga 1, di mana 1 adalah kesamaan sempurna):
-        # from sqlalchemy import func, literal_column
-        # similar_contents_with_score = db.query(
-        #     LearningContent,
-        #     (1 - LearningContent.embedding.cosine_distance(query_embedding)).label("similarity_score")
-        # ).order_by(literal_column("similarity_score").desc()).limit(top_k).all()
-        # Kemudian Anda perlu menyesuaikan SearchResultItem untuk menyertakan similarity_score
-        # dan memproses tuple (LearningContent, score)
-
-        print(f"Ditemukan {len(similar_contents)} hasil pencarian untuk kueri '{query}'.")
-
-        # Konversi hasil SQLAlchemy ke model Pydantic SearchResultItem
-        # Perhatikan bahwa LearningContent.content_type adalah enum, perlu dikonversi ke str jika belum.
-        # Model Pydantic dengan orm_mode=True akan mencoba menangani ini.
-        search_results = [
-            SearchResultItem.from_orm(content) for content in similar_contents
-        ]
-
-        return SearchResponse(query=query, results=search_results)
-
+        if use_memory_index:
+            # Pencarian eksak di snapshot in-memory, tanpa kueri ke Postgres; lihat app/memory_index.py.
+            # Pemindaian NumPy dijalankan di thread agar tidak memblokir event loop
+            search_hits = await asyncio.to_thread(memory_index.memory_vector_index.search, query_embedding, top_k, filters)
+        else:
+            # Operator <=> pgvector menghitung jarak kosinus (1 - kesamaan kosinus); lihat app/search.py.
+            search_hits = content_search.search_learning_content(
+                db, query, query_embedding, top_k, mode=mode, recall=recall, filters=filters
+            )
+
+        print(f"Ditemukan {len(search_hits)} hasil pencarian untuk kueri '{query}'.")
+
+        # Konversi hasil SQLAlchemy ke model Pydantic SearchResultItem, lengkap dengan skor
+        search_results = []
+        for content, similarity_score, score in search_hits:
+            item = SearchResultItem.from_orm(content)
+            item.similarity_score = similarity_score
+            item.score = score
+            search_results.append(item)
+
+        return SearchResponse(query=query, mode=mode, results=search_results)
+
+    except memory_index.MemoryIndexNotLoadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error saat melakukan pencarian di database: {e}")
         # Log error lebih detail di sini di produksi
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan saat melakukan pencarian: {e}")
 
+# --- Endpoint Manajemen Indeks Vektor ---
+class VectorIndexRebuildRequest(BaseModel):
+    index_type: Optional[Literal["hnsw", "ivfflat"]] = None # Default: VECTOR_INDEX_TYPE
+
+@app.get("/vector-index", tags=["Indexing (Testing)"], summary="Status indeks ANN embedding")
+def get_vector_index_info(db: Session = Depends(get_db)):
+    """
+    Melaporkan indeks ANN pada LearningContent.embedding: tipe, definisi, ukuran, jumlah baris, dan waktu build terakhir.
+    """
+    return vector_index.vector_index_info(db)
+
+@app.post("/vector-index/rebuild", tags=["Indexing (Testing)"], summary="Bangun ulang indeks ANN embedding")
+def rebuild_vector_index_endpoint(
+    request: Optional[VectorIndexRebuildRequest] = None,
+    db: Session = Depends(get_db),
+    admin_user = Depends(require_admin_user) # Hanya admin (ADMIN_EMAILS/ADMIN_USERNAMES)
+):
+    """
+    Membangun ulang (atau mengganti tipe) indeks ANN, misalnya setelah bulk load.
+    HNSW di-REINDEX secara CONCURRENTLY; IVFFlat dibuat ulang agar jumlah list sesuai dengan data.
+    Mengembalikan 409 jika build indeks lain (startup, CLI, rebuild) sedang berjalan.
+    """
+    try:
+        return vector_index.rebuild_vector_index(db, request.index_type if request else None)
+    except IndexMaintenanceBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        print(f"Error saat membangun ulang indeks vektor: {e}")
+        raise HTTPException(status_code=500, detail=f"Gagal membangun ulang indeks vektor: {e}")
+
+@app.get("/memory-index", tags=["Indexing (Testing)"], summary="Status indeks vektor in-memory")
+def get_memory_index_info():
+    """
+    Melaporkan snapshot indeks in-memory yang dimuat: jumlah baris, ukuran matriks, dan latensi pencarian rata-rata.
+    """
+    return {"search_backend": memory_index.SEARCH_BACKEND, **memory_index.memory_vector_index.stats()}
+
+@app.post("/memory-index/export", tags=["Indexing (Testing)"], summary="Ekspor snapshot indeks in-memory dari database")
+def export_memory_index(
+    db: Session = Depends(get_db),
+    admin_user = Depends(require_admin_user) # Hanya admin: memindai seluruh tabel dan mengganti snapshot aktif
+):
+    """
+    Mengekspor embedding LearningContent ke MEMORY_INDEX_PATH lalu memuat ulang snapshot di proses ini.
+    Replika lain memuat snapshot baru saat restart.
+    """
+    try:
+        memory_index.export_snapshot(db, memory_index.MEMORY_INDEX_PATH)
+        memory_index.memory_vector_index.load(memory_index.MEMORY_INDEX_PATH)
+        return memory_index.memory_vector_index.stats()
+    except Exception as e:
+        print(f"Error saat mengekspor indeks in-memory: {e}")
+        raise HTTPException(status_code=500, detail=f"Gagal mengekspor indeks in-memory: {e}")
+
 # --- Endpoint Pengindeksan untuk Pengujian ---
-from .data_ingestion import scrape_article_content # Untuk mengambil konten artikel
-from .indexing import index_content # Fungsi pengindeksan utama
-from .models import ContentType # Enum untuk tipe konten
-from pydantic import BaseModel, HttpUrl
-
-class IndexUrlRequest(BaseModel):
-    url: HttpUrl
-    title: Optional[str] = None # Judul bisa opsional, mungkin diambil dari artikel
-    content_type: ContentType = ContentType.ARTICLE # Default ke artikel
-
-@app.post("/index-content", tags=["Indexing (Testing)"], summary="Indeks konten dari URL")
-async def index_content_from_url_endpoint(
+from .schemas import (
+    IndexUrlRequest, BulkIndexRequest, IngestionJobRead, IngestionJobSubmitted,
+    IngestionBatchSubmitted, IngestionBatchRead
+)
+
+@app.post("/index-content", response_model=IngestionJobSubmitted, status_code=202, tags=["Indexing (Testing)"], summary="Antrekan pengindeksan konten dari URL")
+def index_content_from_url_endpoint(
     request: IndexUrlRequest,
     db: Session = Depends(get_db)
 ):
     """
-    **Endpoint Pengujian:** Mengambil konten dari URL yang diberikan,
-    memprosesnya, dan mengindeksnya ke dalam database untuk pencarian semantik.
+    **Endpoint Pengujian:** Mengantrekan pengindeksan konten dari URL yang diberikan dan langsung
+    mengembalikan job_id. Worker background akan:
+
+    - Mengambil teks dan judul dari URL.
+    - Memanggil `index_document` untuk memotong teks, membuat embedding, dan menyimpan ke DB.
+      Mengindeks ulang URL yang sama hanya meng-embed potongan yang berubah dan menghapus potongan yang hilang.
 
-    - Menggunakan `scrape_article_content` untuk mengambil teks dari URL.
-    - Memanggil `index_content` untuk memotong teks, membuat embedding, dan menyimpan ke DB.
+    Pantau status dan progress di `GET /index-content/jobs/{job_id}`.
     """
     print(f"Menerima permintaan pengindeksan untuk URL: {request.url} dengan tipe: {request.content_type}")
-
-    scraped_text = None
-    article_title = request.title
-
-    if request.content_type == ContentType.ARTICLE:
-        scraped_text = scrape_article_content(str(request.url))
-        if not scraped_text:
-            raise HTTPException(status_code=400, detail=f"Gagal mengambil atau memproses konten artikel dari URL: {request.url}")
-        if not article_title: # Coba ambil judul dari tag <title> jika tidak disediakan
-            try:
-                response = requests.get(str(request.url), timeout=5)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, "html.parser")
-                if soup.title and soup.title.string:
-                    article_title = soup.title.string.strip()
-            except Exception:
-                pass # Biarkan kosong jika gagal
-            if not article_title: # Jika masih kosong
-                 article_title = "Artikel Tidak Berjudul" # Default
-    # Tambahkan logika lain di sini jika ada tipe konten lain yang perlu di-scrape berbeda
-    # Misalnya, untuk YOUTUBE_TRANSCRIPT, Anda perlu mengambil transkrip, bukan meng-scrape halaman.
-    else:
+    if request.content_type != ContentTypeEnum.ARTICLE:
+        # Tambahkan logika lain di ingestion_jobs.run_ingestion jika ada tipe konten lain yang perlu di-scrape berbeda
         raise HTTPException(status_code=400, detail=f"Tipe konten '{request.content_type}' saat ini tidak didukung untuk pengindeksan otomatis dari URL.")
 
-    if not scraped_text: # Seharusnya sudah ditangani, tapi sebagai penjaga
-        raise HTTPException(status_code=500, detail="Gagal mendapatkan konten teks untuk diindeks.")
+    job = ingestion_jobs.submit_job(db, str(request.url), request.title, request.content_type)
+    return IngestionJobSubmitted(job_id=job.id, status=job.status.value, status_url=f"/index-content/jobs/{job.id}")
 
-    try:
-        indexed_items = index_content(
-            db=db,
-            source_url=str(request.url),
-            title=article_title if article_title else "Konten Tidak Berjudul",
-            text_content=scraped_text,
-            content_type=request.content_type
-        )
-        if not indexed_items:
-            return {"message": "Konten berhasil diproses tetapi tidak ada potongan yang diindeks (mungkin teks kosong atau error embedding).", "url": str(request.url), "title": article_title, "indexed_chunks": 0}
-
-        return {
-            "message": "Konten berhasil diindeks.",
-            "url": str(request.url),
-            "title": article_title,
-            "indexed_chunks": len(indexed_items),
-            "first_chunk_id": indexed_items[0].id if indexed_items else None
-        }
-    except Exception as e:
-        print(f"Error selama proses pengindeksan untuk URL {request.url}: {e}")
-        db.rollback() # Pastikan rollback jika terjadi error di sini
-        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan saat pengindeksan konten: {str(e)}")
+@app.post("/index-content/bulk", response_model=IngestionBatchSubmitted, status_code=202, tags=["Indexing (Testing)"], summary="Antrekan pengindeksan banyak URL")
+def bulk_index_content_endpoint(request: BulkIndexRequest, db: Session = Depends(get_db)):
+    """
+    Mengantrekan hingga 10.000 URL sebagai satu batch. Pantau ringkasannya di `GET /index-content/batches/{batch_id}`.
+    """
+    if request.content_type != ContentTypeEnum.ARTICLE:
+        raise HTTPException(status_code=400, detail=f"Tipe konten '{request.content_type}' saat ini tidak didukung untuk pengindeksan otomatis dari URL.")
+    submitted = ingestion_jobs.submit_bulk_jobs(db, [str(url) for url in request.urls], request.content_type)
+    return IngestionBatchSubmitted(**submitted, status_url=f"/index-content/batches/{submitted['batch_id']}")
+
+@app.get("/index-content/jobs/{job_id}", response_model=IngestionJobRead, tags=["Indexing (Testing)"], summary="Status job pengindeksan")
+def get_index_job_status(job_id: str, db: Session = Depends(get_db)):
+    job = ingestion_jobs.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan.")
+    return IngestionJobRead(**ingestion_jobs.job_to_dict(job))
+
+@app.get("/index-content/batches/{batch_id}", response_model=IngestionBatchRead, tags=["Indexing (Testing)"], summary="Ringkasan status batch pengindeksan")
+def get_index_batch_status(batch_id: str, db: Session = Depends(get_db)):
+    summary = ingestion_jobs.get_batch_summary(db, batch_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Batch tidak ditemukan.")
+    return IngestionBatchRead(**summary)
 
 
 # Anda dapat menambahkan router lain di sini jika aplikasi berkembang
@@ -0,0 +1,447 @@
+"""
+Indeks vektor in-memory berbasis NumPy sebagai alternatif pgvector untuk /search.
+
+Embedding seluruh LearningContent diekspor dari database ke snapshot di disk:
+
+    <MEMORY_INDEX_PATH>/
+        embeddings.npy   matriks float32 (n, 384), sudah dinormalisasi L2 (dibuka dengan memory map)
+        content.jsonl    metadata per baris (id, title, source_url, source_domain, content_type, text_chunk)
+        manifest.json    jumlah baris, dimensi, model embedding, waktu ekspor
+
+Kesamaan kosinus dihitung sebagai perkalian matriks (embeddings @ query) per blok, dan top-k dipilih
+dengan argpartition. Pencarian ini eksak (tanpa ANN), cocok untuk mesin dev, replika baca tanpa Postgres,
+dan sebagai acuan recall untuk indeks HNSW/IVFFlat.
+
+Jalankan dari direktori backend:
+
+    python -m app.memory_index export --path ./data/memory_index
+    python -m app.memory_index benchmark --path ./data/memory_index --queries 200 --top-k 10
+    python -m app.memory_index benchmark --synthetic-rows 100000   # tanpa database
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .ai_services import EMBEDDING_DIMENSION, embedding_model_name
+from .models import LearningContent, ContentType
+from .search import SearchFilters, SearchHit
+
+# "pgvector" (default) atau "memory". Dengan "memory", /search mode vector dilayani dari snapshot tanpa kueri Postgres.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "pgvector")
+MEMORY_INDEX_PATH = os.getenv("MEMORY_INDEX_PATH", "./data/memory_index")
+# Jumlah baris per blok perkalian matriks; membatasi memori sementara untuk skor (blok x 4 byte)
+MEMORY_INDEX_BLOCK_ROWS = int(os.getenv("MEMORY_INDEX_BLOCK_ROWS", "65536"))
+# Jumlah baris yang dibaca dari database per batch saat ekspor
+MEMORY_INDEX_EXPORT_BATCH_SIZE = int(os.getenv("MEMORY_INDEX_EXPORT_BATCH_SIZE", "2000"))
+
+_EMBEDDINGS_FILE = "embeddings.npy"
+_CONTENT_FILE = "content.jsonl"
+_MANIFEST_FILE = "manifest.json"
+
+
+class MemoryIndexNotLoadedError(RuntimeError):
+    """Snapshot indeks in-memory belum dimuat (atau tidak ditemukan)."""
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def export_snapshot(db: Session, path: str = MEMORY_INDEX_PATH, batch_size: int = MEMORY_INDEX_EXPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Mengekspor embedding dan metadata LearningContent ke snapshot di `path`.
+    Baris dibaca per batch (keyset pada id) dan ditulis langsung ke file memmap, sehingga memori tetap kecil.
+    Snapshot ditulis ke direktori sementara lalu di-rename, agar pembaca tidak pernah melihat snapshot setengah jadi.
+    """
+    started_at = time.perf_counter()
+    row_count = db.query(LearningContent.id).count()
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    embeddings = np.lib.format.open_memmap(
+        os.path.join(tmp_path, _EMBEDDINGS_FILE), mode="w+", dtype=np.float32, shape=(row_count, EMBEDDING_DIMENSION)
+    )
+    written = 0
+    last_id = 0
+    with open(os.path.join(tmp_path, _CONTENT_FILE), "w", encoding="utf-8") as content_file:
+        while written < row_count:
+            rows = db.query(LearningContent)\
+                     .filter(LearningContent.id > last_id)\
+                     .order_by(LearningContent.id)\
+                     .limit(min(batch_size, row_count - written))\
+                     .all()
+            if not rows:
+                break # Baris terhapus selama ekspor
+            batch = np.asarray([row.embedding for row in rows], dtype=np.float32)
+            embeddings[written:written + len(rows)] = _normalize_rows(batch)
+            for row in rows:
+                content_file.write(json.dumps({
+                    "id": row.id,
+                    "title": row.title,
+                    "source_url": row.source_url,
+                    "source_domain": row.source_domain,
+                    "content_type": row.content_type.value if row.content_type is not None else None,
+                    "text_chunk": row.text_chunk,
+                }, ensure_ascii=False) + "\n")
+            written += len(rows)
+            last_id = rows[-1].id
+            db.expunge_all() # Lepaskan objek dari sesi agar memori tidak bertambah selama ekspor
+    embeddings.flush()
+    del embeddings
+
+    if written < row_count: # Potong matriks jika ada baris yang terhapus selama ekspor
+        full = np.load(os.path.join(tmp_path, _EMBEDDINGS_FILE), mmap_mode="r")
+        np.save(os.path.join(tmp_path, _EMBEDDINGS_FILE), np.array(full[:written]))
+        del full
+
+    manifest = {
+        "rows": written,
+        "dimension": EMBEDDING_DIMENSION,
+        "embedding_model": embedding_model_name,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "export_seconds": round(time.perf_counter() - started_at, 3),
+    }
+    with open(os.path.join(tmp_path, _MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    print(f"Snapshot indeks in-memory diekspor ke {path}: {written} baris dalam {manifest['export_seconds']:.1f} detik.")
+    return manifest
+
+
+class MemoryVectorIndex:
+    """
+    Indeks kesamaan kosinus eksak di atas matriks float32 yang di-memory-map.
+    Pencarian bersifat read-only sehingga aman dipanggil dari banyak thread; reload mengganti snapshot secara atomik.
+    """
+
+    def __init__(self, block_rows: int = MEMORY_INDEX_BLOCK_ROWS):
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self.queries = 0
+        self.total_search_seconds = 0.0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self, path: str = MEMORY_INDEX_PATH) -> Dict[str, Any]:
+        """
+        Memuat snapshot dari `path`. Matriks embedding tidak dibaca ke RAM; halaman dimuat oleh OS sesuai kebutuhan.
+        """
+        with open(os.path.join(path, _MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        embeddings = np.load(os.path.join(path, _EMBEDDINGS_FILE), mmap_mode="r")
+        if embeddings.ndim != 2 or embeddings.shape[1] != EMBEDDING_DIMENSION:
+            raise ValueError(f"Dimensi snapshot {embeddings.shape} tidak cocok dengan EMBEDDING_DIMENSION={EMBEDDING_DIMENSION}.")
+        if manifest.get("embedding_model") != embedding_model_name:
+            print(f"Peringatan: Snapshot dibuat dengan model '{manifest.get('embedding_model')}', model aktif '{embedding_model_name}'.")
+
+        with open(os.path.join(path, _CONTENT_FILE), encoding="utf-8") as f:
+            contents = [json.loads(line) for line in f]
+        if len(contents) != embeddings.shape[0]:
+            raise ValueError(f"Snapshot rusak: {len(contents)} metadata untuk {embeddings.shape[0]} embedding.")
+
+        snapshot = {
+            "path": path,
+            "manifest": manifest,
+            "embeddings": embeddings,
+            "contents": contents,
+            # Kolom filter sebagai array NumPy agar mask dapat dihitung secara vektor
+            "content_types": np.array([c["content_type"] or "" for c in contents], dtype=object),
+            "source_domains": np.array([c["source_domain"] or "" for c in contents], dtype=object),
+            "titles": np.array([c["title"] or "" for c in contents], dtype=object),
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        print(f"Indeks in-memory dimuat dari {path}: {embeddings.shape[0]} baris.")
+        return manifest
+
+    def _filter_mask(self, snapshot: Dict[str, Any], filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        if filters is None or filters.is_empty:
+            return None
+        mask = np.ones(len(snapshot["contents"]), dtype=bool)
+        if filters.content_type is not None:
+            mask &= snapshot["content_types"] == filters.content_type.value
+        if filters.source_domain is not None:
+            mask &= snapshot["source_domains"] == filters.source_domain
+        if filters.title_prefix is not None:
+            mask &= np.fromiter(
+                (title.startswith(filters.title_prefix) for title in snapshot["titles"]), dtype=bool, count=len(mask)
+            )
+        return mask
+
+    def search_ids(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters] = None
+    ) -> List[tuple]:
+        """
+        Mengembalikan daftar (posisi baris, kesamaan kosinus) untuk top_k hasil, terurut menurun.
+        Skor dihitung per blok; setiap blok menyumbang paling banyak top_k kandidat (argpartition),
+        lalu kandidat digabung dan diurutkan.
+        """
+        return self._search_snapshot(self._current_snapshot(), query_embedding, top_k, filters)
+
+    def _current_snapshot(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise MemoryIndexNotLoadedError("Indeks in-memory belum dimuat. Ekspor snapshot terlebih dahulu.")
+        return snapshot
+
+    def _search_snapshot(
+        self,
+        snapshot: Dict[str, Any],
+        query_embedding: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters]
+    ) -> List[tuple]:
+        # Posisi yang dikembalikan hanya berlaku untuk `snapshot` ini (load() dapat mengganti snapshot kapan saja)
+        started_at = time.perf_counter()
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm > 0:
+            query = query / query_norm
+
+        embeddings = snapshot["embeddings"]
+        mask = self._filter_mask(snapshot, filters)
+        candidate_positions: List[np.ndarray] = []
+        candidate_scores: List[np.ndarray] = []
+        for start in range(0, embeddings.shape[0], self.block_rows):
+            end = min(start + self.block_rows, embeddings.shape[0])
+            scores = embeddings[start:end] @ query
+            if mask is not None:
+                block_mask = mask[start:end]
+                if not block_mask.any():
+                    continue
+                scores = np.where(block_mask, scores, -np.inf)
+            k = min(top_k, scores.shape[0])
+            top = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(scores.shape[0])
+            candidate_positions.append(top + start)
+            candidate_scores.append(scores[top])
+
+        results = []
+        if candidate_positions:
+            positions = np.concatenate(candidate_positions)
+            scores = np.concatenate(candidate_scores)
+            order = np.argsort(-scores, kind="stable")[:top_k]
+            results = [(int(positions[i]), float(scores[i])) for i in order if np.isfinite(scores[i])]
+
+        elapsed = time.perf_counter() - started_at
+        with self._lock:
+            self.queries += 1
+            self.total_search_seconds += elapsed
+        return results
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters] = None
+    ) -> List[SearchHit]:
+        """
+        Sama dengan search.vector_search, tetapi dilayani dari snapshot. Objek LearningContent yang dikembalikan
+        tidak terikat ke sesi database (hanya untuk dikonversi ke SearchResultItem).
+        Operasi CPU-bound (perkalian matriks); dari handler async panggil lewat asyncio.to_thread.
+        """
+        # Snapshot diambil sekali agar posisi hasil dan metadata berasal dari snapshot yang sama
+        snapshot = self._current_snapshot()
+        contents = snapshot["contents"]
+        hits = []
+        for position, similarity in self._search_snapshot(snapshot, query_embedding, top_k, filters):
+            data = contents[position]
+            content = LearningContent(
+                id=data["id"],
+                title=data["title"],
+                source_url=data["source_url"],
+                source_domain=data["source_domain"],
+                content_type=ContentType(data["content_type"]) if data["content_type"] else None,
+                text_chunk=data["text_chunk"],
+            )
+            hits.append((content, similarity, similarity))
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        with self._lock:
+            queries = self.queries
+            total_seconds = self.total_search_seconds
+        return {
+            "loaded": snapshot is not None,
+            "path": snapshot["path"] if snapshot else None,
+            "manifest": snapshot["manifest"] if snapshot else None,
+            "matrix_mb": round(snapshot["embeddings"].nbytes / (1024 * 1024), 2) if snapshot else 0,
+            "queries": queries,
+            "avg_search_ms": round(total_seconds / queries * 1000, 3) if queries else None,
+        }
+
+
+# Instance global yang digunakan oleh /search jika SEARCH_BACKEND="memory"
+memory_vector_index = MemoryVectorIndex()
+
+
+def load_memory_index_if_enabled() -> bool:
+    """
+    Memuat snapshot saat startup jika SEARCH_BACKEND="memory". Mengembalikan True jika indeks siap.
+    """
+    if SEARCH_BACKEND != "memory":
+        return False
+    try:
+        memory_vector_index.load(MEMORY_INDEX_PATH)
+        return True
+    except FileNotFoundError:
+        print(f"PERINGATAN: Snapshot indeks in-memory tidak ditemukan di {MEMORY_INDEX_PATH}. Jalankan 'python -m app.memory_index export'.")
+    except Exception as e:
+        print(f"PERINGATAN: Gagal memuat indeks in-memory: {e}")
+    return False
+
+
+def _percentile_ms(samples: List[float], percentile: float) -> float:
+    return float(np.percentile(np.asarray(samples) * 1000, percentile)) if samples else 0.0
+
+
+def benchmark(
+    path: str,
+    num_queries: int = 200,
+    top_k: int = 10,
+    synthetic_rows: int = 0,
+    compare_pgvector: bool = True,
+    recall: str = "balanced"
+) -> Dict[str, Any]:
+    """
+    Mengukur latensi pencarian in-memory dan (opsional) pgvector dengan kueri yang sama.
+    Kueri diambil dari embedding yang ada di snapshot (ditambah noise kecil), sehingga tidak perlu model embedding.
+    Karena pencarian in-memory eksak, overlap hasil pgvector dengannya adalah recall@k indeks ANN.
+    """
+    index = MemoryVectorIndex()
+    if synthetic_rows:
+        path = f"{path}.synthetic"
+        _write_synthetic_snapshot(path, synthetic_rows)
+        compare_pgvector = False # ID sintetis tidak ada di database
+    load_started_at = time.perf_counter()
+    index.load(path)
+    load_seconds = time.perf_counter() - load_started_at
+
+    embeddings = index._snapshot["embeddings"]
+    contents = index._snapshot["contents"]
+    rng = np.random.default_rng(42)
+    query_rows = rng.integers(0, embeddings.shape[0], size=num_queries)
+    queries = [
+        (embeddings[row] + rng.normal(0, 0.05, EMBEDDING_DIMENSION)).astype(np.float32) for row in query_rows
+    ]
+
+    memory_latencies, memory_results = [], []
+    for query in queries:
+        started_at = time.perf_counter()
+        memory_results.append([contents[position]["id"] for position, _ in index.search_ids(query, top_k)])
+        memory_latencies.append(time.perf_counter() - started_at)
+
+    report: Dict[str, Any] = {
+        "rows": int(embeddings.shape[0]),
+        "queries": num_queries,
+        "top_k": top_k,
+        "memory_load_seconds": round(load_seconds, 3),
+        "memory_p50_ms": round(_percentile_ms(memory_latencies, 50), 3),
+        "memory_p95_ms": round(_percentile_ms(memory_latencies, 95), 3),
+        "memory_qps": round(num_queries / sum(memory_latencies), 1) if memory_latencies else 0,
+    }
+
+    if compare_pgvector:
+        from .database import SessionLocal
+        from .search import search_learning_content
+
+        pg_latencies, overlaps = [], []
+        db = SessionLocal()
+        try:
+            for query, expected_ids in zip(queries, memory_results):
+                started_at = time.perf_counter()
+                hits = search_learning_content(db, "", query.tolist(), top_k, mode="vector", recall=recall)
+                pg_latencies.append(time.perf_counter() - started_at)
+                db.rollback() # Akhiri transaksi agar SET LOCAL tidak terbawa dan snapshot MVCC baru
+                got_ids = {content.id for content, _, _ in hits}
+                overlaps.append(len(got_ids & set(expected_ids)) / max(1, len(expected_ids)))
+        finally:
+            db.close()
+        report.update({
+            "pgvector_recall_preset": recall,
+            "pgvector_p50_ms": round(_percentile_ms(pg_latencies, 50), 3),
+            "pgvector_p95_ms": round(_percentile_ms(pg_latencies, 95), 3),
+            "pgvector_qps": round(num_queries / sum(pg_latencies), 1) if pg_latencies else 0,
+            "pgvector_recall_at_k": round(float(np.mean(overlaps)), 4) if overlaps else None,
+        })
+    return report
+
+
+def _write_synthetic_snapshot(path: str, rows: int) -> None:
+    """
+    Snapshot acak untuk benchmark tanpa database.
+    """
+    os.makedirs(path, exist_ok=True)
+    rng = np.random.default_rng(0)
+    embeddings = np.lib.format.open_memmap(
+        os.path.join(path, _EMBEDDINGS_FILE), mode="w+", dtype=np.float32, shape=(rows, EMBEDDING_DIMENSION)
+    )
+    for start in range(0, rows, MEMORY_INDEX_BLOCK_ROWS):
+        end = min(start + MEMORY_INDEX_BLOCK_ROWS, rows)
+        embeddings[start:end] = _normalize_rows(rng.standard_normal((end - start, EMBEDDING_DIMENSION), dtype=np.float32))
+    embeddings.flush()
+    del embeddings
+    content_types = [content_type.value for content_type in ContentType]
+    with open(os.path.join(path, _CONTENT_FILE), "w", encoding="utf-8") as f:
+        for i in range(rows):
+            f.write(json.dumps({
+                "id": i + 1, "title": f"Sintetis {i}", "source_url": None, "source_domain": None,
+                "content_type": content_types[i % len(content_types)], "text_chunk": "",
+            }) + "\n")
+    with open(os.path.join(path, _MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({"rows": rows, "dimension": EMBEDDING_DIMENSION, "embedding_model": embedding_model_name, "synthetic": True}, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot dan benchmark indeks vektor in-memory MentorAI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Ekspor embedding LearningContent dari database ke snapshot.")
+    export_parser.add_argument("--path", default=MEMORY_INDEX_PATH)
+    export_parser.add_argument("--batch-size", type=int, default=MEMORY_INDEX_EXPORT_BATCH_SIZE)
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Bandingkan latensi in-memory dengan pgvector.")
+    benchmark_parser.add_argument("--path", default=MEMORY_INDEX_PATH)
+    benchmark_parser.add_argument("--queries", type=int, default=200)
+    benchmark_parser.add_argument("--top-k", type=int, default=10)
+    benchmark_parser.add_argument("--recall", default="balanced", choices=["fast", "balanced", "accurate"])
+    benchmark_parser.add_argument("--synthetic-rows", type=int, default=0, help="Gunakan snapshot acak (tanpa database).")
+    benchmark_parser.add_argument("--no-pgvector", action="store_true", help="Hanya ukur indeks in-memory.")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from .database import SessionLocal
+        db = SessionLocal()
+        try:
+            print(json.dumps(export_snapshot(db, args.path, args.batch_size), indent=2))
+        finally:
+            db.close()
+    else:
+        report = benchmark(
+            args.path, args.queries, args.top_k, args.synthetic_rows,
+            compare_pgvector=not args.no_pgvector, recall=args.recall
+        )
+        for key, value in report.items():
+            print(f"{key:<24} {value}")
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func, Boolean
+import enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func, Boolean, Enum, Index, literal_column, UniqueConstraint, CheckConstraint
 from sqlalchemy.orm import relationship
+from pgvector.sqlalchemy import Vector # Tipe kolom vektor untuk embedding
 from .database import Base # Impor Base dari database.py
 # Enum ContentType mungkin tidak diperlukan di sini kecuali User memiliki preferensi konten
 
@@ -88,6 +90,11 @@ class ForumPost(Base):
     replies = relationship("ForumReply", back_populates="post", cascade="all, delete-orphan", order_by="ForumReply.created_at")
     # category = relationship("ForumCategory", back_populates="posts")
 
+    __table_args__ = (
+        # Indeks komposit untuk paginasi keyset GET /forum/posts (ORDER BY created_at DESC, id DESC)
+        Index("ix_forum_posts_created_at_id", created_at, id),
+    )
+
     def __repr__(self):
         return f"<ForumPost(id={self.id}, title='{self.title}', author_id={self.author_id})>"
 
@@ -115,9 +122,204 @@ class ForumReply(Base):
     parent_reply = relationship("ForumReply", remote_side=[id], back_populates="child_replies")
     child_replies = relationship("ForumReply", back_populates="parent_reply", cascade="all, delete-orphan", order_by="ForumReply.created_at")
 
+    __table_args__ = (
+        # Indeks komposit untuk paginasi keyset balasan per postingan (WHERE post_id = ? ORDER BY created_at, id)
+        Index("ix_forum_replies_post_created_at_id", post_id, created_at, id),
+        # Indeks parsial untuk halaman balasan tingkat atas pada thread berulir
+        Index("ix_forum_replies_top_level", post_id, created_at, id, postgresql_where=parent_reply_id.is_(None)),
+    )
+
     def __repr__(self):
         return f"<ForumReply(id={self.id}, post_id={self.post_id}, author_id={self.author_id}, parent_id={self.parent_reply_id})>"
 
+# Model Vote Forum (ForumVotes)
+# Satu baris per (pengguna, target) yang di-upvote; target adalah tepat satu dari post_id/reply_id.
+# Kolom upvotes pada ForumPost/ForumReply adalah hitungan turunan dari ledger ini dan diubah secara atomik
+# (`upvotes = upvotes + 1`) dalam transaksi yang sama dengan insert/delete baris vote (lihat forum_votes.py).
+class ForumVote(Base):
+    __tablename__ = "forum_votes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # RESTRICT, bukan CASCADE: cascade menghapus vote tanpa mengurangi upvotes/XP sehingga hitungan menyimpang
+    # dari ledger. Tarik vote pengguna dengan forum_votes.retract_user_votes sebelum menghapus akunnya.
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="RESTRICT"), nullable=False)
+    post_id = Column(Integer, ForeignKey("forum_posts.id", ondelete="CASCADE"), nullable=True, index=True)
+    reply_id = Column(Integer, ForeignKey("forum_replies.id", ondelete="CASCADE"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # NULL dianggap berbeda oleh constraint UNIQUE, sehingga vote postingan dan vote balasan
+        # masing-masing unik per pengguna tanpa saling bentrok
+        UniqueConstraint("user_id", "post_id", name="uq_forum_votes_user_post"),
+        UniqueConstraint("user_id", "reply_id", name="uq_forum_votes_user_reply"),
+        CheckConstraint("(post_id IS NULL) <> (reply_id IS NULL)", name="ck_forum_votes_single_target"),
+    )
+
+    def __repr__(self):
+        return f"<ForumVote(user_id={self.user_id}, post_id={self.post_id}, reply_id={self.reply_id})>"
+
+# Konfigurasi full-text search Postgres untuk pencarian leksikal.
+# 'simple' dipilih karena konten bercampur bahasa Indonesia dan Inggris (tanpa stemming khusus bahasa).
+# Harus sama persis dengan ekspresi di kueri agar indeks GIN digunakan.
+TEXT_SEARCH_CONFIG = "simple"
+
+# Enum Jenis Konten Pembelajaran
+class ContentType(str, enum.Enum):
+    ARTICLE = "article"
+    YOUTUBE_TRANSCRIPT = "youtube_transcript"
+
+# Model Konten Pembelajaran (LearningContent)
+# Setiap baris adalah satu potongan (chunk) teks dari sumber konten beserta embedding-nya untuk pencarian semantik.
+class LearningContent(Base):
+    __tablename__ = "learning_content"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    title = Column(String(512), nullable=True)
+    source_url = Column(String(2048), nullable=True, index=True)
+    # Domain sumber ternormalisasi (huruf kecil, tanpa "www."), untuk filter `source_domain` di /search
+    source_domain = Column(String(255), nullable=True, index=True)
+    content_type = Column(Enum(ContentType, values_callable=lambda enum_cls: [e.value for e in enum_cls]), nullable=False, index=True)
+    text_chunk = Column(Text, nullable=False)
+    # SHA-256 (hex) dari text_chunk: re-indexing hanya meng-embed potongan yang berubah,
+    # dan potongan identik dari sumber lain memakai ulang embedding yang sudah tersimpan
+    content_hash = Column(String(64), nullable=True, index=True)
+    chunk_index = Column(Integer, nullable=True) # Urutan potongan di dalam dokumen sumber
+    document_version = Column(Integer, nullable=True) # SourceDocument.version saat potongan ini terakhir ditulis
+    embedding = Column(Vector(384), nullable=False) # 384 dimensi untuk 'all-MiniLM-L6-v2'
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Indeks GIN untuk pencarian full-text (mode hybrid di /search)
+        Index(
+            "ix_learning_content_text_chunk_tsv",
+            func.to_tsvector(literal_column(f"'{TEXT_SEARCH_CONFIG}'"), text_chunk),
+            postgresql_using="gin"
+        ),
+        # Indeks B-tree dengan text_pattern_ops agar filter `title LIKE 'prefix%'` dapat memakai indeks
+        Index("ix_learning_content_title_prefix", title, postgresql_ops={"title": "text_pattern_ops"}),
+    )
+
+    def __repr__(self):
+        return f"<LearningContent(id={self.id}, title='{self.title}', content_type='{self.content_type}')>"
+
+# Model Dokumen Sumber (SourceDocument)
+# Satu baris per URL yang diindeks. Versi dinaikkan setiap kali isi dokumen berubah;
+# potongan-potongannya ada di learning_content dengan source_url yang sama.
+class SourceDocument(Base):
+    __tablename__ = "source_documents"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    source_url = Column(String(2048), nullable=False, unique=True, index=True)
+    title = Column(String(512), nullable=True)
+    content_type = Column(Enum(ContentType, values_callable=lambda enum_cls: [e.value for e in enum_cls]), nullable=False)
+    content_hash = Column(String(64), nullable=True) # SHA-256 dari seluruh teks dokumen
+    version = Column(Integer, default=0, nullable=False)
+    chunk_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    indexed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<SourceDocument(id={self.id}, source_url='{self.source_url}', version={self.version})>"
+
+# Model Cache Kurikulum (CurriculumCache)
+# Menyimpan kurikulum hasil generasi AI agar tujuan yang sama (setelah dinormalisasi) tidak perlu
+# memanggil Gemini lagi. Tabel ini adalah tier persisten dari cache di curriculum_cache.py.
+class CurriculumCacheEntry(Base):
+    __tablename__ = "curriculum_cache"
+
+    # SHA-256 dari (tujuan ternormalisasi, nama model, versi prompt)
+    cache_key = Column(String(64), primary_key=True)
+    normalized_goal = Column(Text, nullable=False)
+    model_name = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    curriculum_json = Column(Text, nullable=False) # Curriculum yang diserialisasi dengan model_dump_json()
+    # Embedding tujuan ternormalisasi (384 dimensi, all-MiniLM-L6-v2) untuk pencarian tujuan yang mirip secara semantik
+    goal_embedding = Column(Vector(384), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True) # Untuk eviction LRU
+    hit_count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<CurriculumCacheEntry(cache_key='{self.cache_key[:12]}...', goal='{self.normalized_goal[:30]}')>"
+
+# Model Cache HTTP Halaman (FetchCacheEntry)
+# Validator HTTP (ETag/Last-Modified) dan hasil ekstraksi terakhir per URL. Saat crawl ulang, fetcher mengirim
+# If-None-Match/If-Modified-Since; respons 304 memakai judul dan teks yang tersimpan tanpa mengunduh/mem-parse ulang.
+class FetchCacheEntry(Base):
+    __tablename__ = "fetch_cache"
+
+    url = Column(String(2048), primary_key=True)
+    final_url = Column(String(2048), nullable=True) # URL setelah redirect
+    etag = Column(String(512), nullable=True)
+    last_modified = Column(String(100), nullable=True) # Nilai header apa adanya (format HTTP-date)
+    title = Column(String(512), nullable=True)
+    text_content = Column(Text, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False) # Unduhan penuh terakhir
+    checked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False) # Validasi terakhir (200/304)
+
+# Status job ingestion konten
+class IngestionJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+# Model Job Ingestion (IngestionJob)
+# Antrean job untuk /index-content: endpoint hanya menyisipkan baris, dan worker di ingestion_jobs.py
+# mengambil job dengan SELECT ... FOR UPDATE SKIP LOCKED (aman untuk banyak worker/proses).
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String(36), primary_key=True) # UUID4
+    batch_id = Column(String(36), nullable=True, index=True) # Diisi untuk job dari bulk submit
+    url = Column(String(2048), nullable=False)
+    title = Column(String(512), nullable=True)
+    content_type = Column(Enum(ContentType, values_callable=lambda enum_cls: [e.value for e in enum_cls]), nullable=False)
+    status = Column(Enum(IngestionJobStatus, values_callable=lambda enum_cls: [e.value for e in enum_cls]), nullable=False, default=IngestionJobStatus.QUEUED)
+    stage = Column(String(50), nullable=True) # Tahap saat ini, misalnya "fetching", "indexing"
+    progress = Column(Integer, default=0, nullable=False) # 0-100
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    error = Column(Text, nullable=True) # Pesan error terakhir
+    result_json = Column(Text, nullable=True) # Ringkasan hasil index_document (JSON)
+    worker_id = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False) # Untuk backoff retry
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True) # Job "running" tanpa heartbeat dianggap macet
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Indeks untuk kueri klaim worker: job berstatus queued yang sudah waktunya dijalankan
+        Index("ix_ingestion_jobs_status_next_attempt_at", status, next_attempt_at),
+    )
+
+    def __repr__(self):
+        return f"<IngestionJob(id='{self.id}', url='{self.url}', status='{self.status}')>"
+
+# Kolom hitungan yang diperbarui secara write-behind (lihat counter_buffer.py)
+class CounterTarget(str, enum.Enum):
+    POST_UPVOTES = "post_upvotes" # forum_posts.upvotes
+    REPLY_UPVOTES = "reply_upvotes" # forum_replies.upvotes
+    USER_XP = "user_xp" # users.xp_points
+
+# Model Jurnal Delta Hitungan (CounterDelta)
+# Delta yang sudah di-commit tetapi belum diterapkan ke kolom hitungan. Baris disisipkan dalam transaksi yang
+# sama dengan perubahan ledger (misalnya forum_votes), lalu dihapus saat delta-nya diterapkan oleh flush.
+# Insert tidak mengunci baris postingan/pengguna yang "panas", dan baris yang tersisa setelah crash diterapkan ulang.
+class CounterDelta(Base):
+    __tablename__ = "counter_deltas"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    target = Column(Enum(CounterTarget, values_callable=lambda enum_cls: [e.value for e in enum_cls]), nullable=False)
+    target_id = Column(Integer, nullable=False)
+    delta = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CounterDelta(target='{self.target}', target_id={self.target_id}, delta={self.delta})>"
+
 # Anda mungkin ingin menambahkan tabel lain seperti ForumCategory, UserVotes (untuk melacak siapa yang vote apa), dll.
 # tergantung pada kedalaman fitur yang diinginkan.
 ```
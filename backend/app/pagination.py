@@ -0,0 +1,75 @@
+"""
+Paginasi keyset (cursor) pada pasangan (created_at, id).
+
+Halaman berikutnya dimulai tepat setelah baris terakhir halaman sebelumnya:
+`WHERE (created_at, id) < (:c, :i) ORDER BY created_at DESC, id DESC LIMIT n` (atau > untuk urutan naik).
+Biayanya konstan berapa pun dalamnya halaman (dilayani indeks komposit), dan baris baru yang masuk di antara
+dua permintaan tidak menyebabkan item terduplikasi atau terlewat seperti pada OFFSET.
+
+Cursor bersifat opak bagi klien: base64url dari JSON {"c": created_at ISO-8601, "i": id}.
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+T = TypeVar("T")
+
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """
+    Cursor tidak dapat didekode (dimodifikasi klien atau dari versi lain). Endpoint mengembalikan HTTP 400.
+    """
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps({"c": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeError) as e:
+        raise InvalidCursorError(f"Cursor tidak valid: {cursor}") from e
+
+
+def apply_keyset(
+    query: Query,
+    created_column: Any,
+    id_column: Any,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True
+) -> Query:
+    """
+    Menerapkan filter cursor, urutan (created_at, id), dan LIMIT limit+1 (baris ekstra menandai adanya halaman
+    berikutnya, lihat split_page). Arah ORDER BY sama untuk kedua kolom agar indeks komposit dapat dipakai.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        key = tuple_(created_column, id_column)
+        query = query.filter(key < tuple_(created_at, row_id) if descending else key > tuple_(created_at, row_id))
+    if descending:
+        query = query.order_by(created_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_column.asc(), id_column.asc())
+    return query.limit(limit + 1)
+
+
+def split_page(rows: Sequence[T], limit: int, key: Callable[[T], Tuple[datetime, int]]) -> Tuple[List[T], Optional[str]]:
+    """
+    Memotong hasil apply_keyset menjadi (item halaman ini, cursor halaman berikutnya atau None).
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit or not items:
+        return items, None
+    return items, encode_cursor(*key(items[-1]))
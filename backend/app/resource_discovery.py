@@ -0,0 +1,385 @@
+"""
+Tahap penemuan sumber belajar: mencari video YouTube untuk setiap modul kurikulum.
+
+- Satu klien YouTube Data API (googleapiclient) dibangun sekali per proses dan dipakai ulang. Objek layanan
+  dapat dibagi antar thread, tetapi koneksi httplib2 tidak, jadi setiap thread memakai Http miliknya sendiri.
+- Pencarian modul berjalan bersamaan (dibatasi YOUTUBE_SEARCH_CONCURRENCY) di thread pool.
+- Hasil di-cache per set kata kunci ternormalisasi (huruf kecil, spasi dirapikan, duplikat dibuang, diurutkan)
+  dengan TTL, sehingga modul dengan kata kunci sama tidak menghabiskan kuota search (100 unit per panggilan).
+  Pencarian identik yang sedang berjalan digabung menjadi satu panggilan API.
+- Error API (misalnya kuota habis) tidak di-cache; modul tersebut mendapat daftar video kosong.
+
+Uji mandiri dengan klien YouTube palsu (tanpa jaringan dan kunci API), dari direktori backend:
+
+    python -m app.resource_discovery --selftest
+"""
+import os
+import re
+import time
+import asyncio
+import argparse
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .schemas import Curriculum, Video
+
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+YOUTUBE_API_SERVICE_NAME = "youtube"
+YOUTUBE_API_VERSION = "v3"
+YOUTUBE_MAX_RESULTS_PER_MODULE = int(os.getenv("YOUTUBE_MAX_RESULTS_PER_MODULE", "5"))
+YOUTUBE_SEARCH_CONCURRENCY = int(os.getenv("YOUTUBE_SEARCH_CONCURRENCY", "4"))
+YOUTUBE_SEARCH_TIMEOUT_SECONDS = float(os.getenv("YOUTUBE_SEARCH_TIMEOUT_SECONDS", "10"))
+YOUTUBE_CACHE_TTL_SECONDS = int(os.getenv("YOUTUBE_CACHE_TTL_SECONDS", str(24 * 3600))) # Default 1 hari
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "2048"))
+# Lampirkan video ke modul pada respons /curriculum
+CURRICULUM_ATTACH_VIDEOS = os.getenv("CURRICULUM_ATTACH_VIDEOS", "1") == "1"
+
+KeywordKey = Tuple[str, ...]
+SearchKey = Tuple[KeywordKey, int] # (kata kunci ternormalisasi, maxResults)
+
+
+def normalize_keywords(keywords: Sequence[str]) -> KeywordKey:
+    """
+    Menormalisasi set kata kunci menjadi kunci cache: NFKC + huruf kecil, spasi dirapikan, kosong/duplikat
+    dibuang, lalu diurutkan. Contoh: ["Python ", "pemrograman", "python"] -> ("pemrograman", "python")
+    """
+    normalized = set()
+    for keyword in keywords or []:
+        text = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", keyword or "").casefold()).strip()
+        if text:
+            normalized.add(text)
+    return tuple(sorted(normalized))
+
+
+def parse_search_response(search_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Mengubah respons search().list() menjadi daftar dict video (format schemas.Video).
+    """
+    videos = []
+    for item in search_response.get("items", []):
+        if item["id"]["kind"] == "youtube#video":
+            video_id = item["id"]["videoId"]
+            videos.append({
+                "videoId": video_id,
+                "title": item["snippet"]["title"],
+                "description": item["snippet"]["description"],
+                "channelTitle": item["snippet"]["channelTitle"],
+                "videoUrl": f"https://www.youtube.com/watch?v={video_id}",
+                "thumbnailUrl": item["snippet"]["thumbnails"]["default"]["url"] # Atau 'medium' atau 'high'
+            })
+    return videos
+
+
+def build_youtube_client(api_key: Optional[str] = YOUTUBE_API_KEY) -> Optional[Any]:
+    """
+    Membangun klien YouTube Data API (dokumen discovery statis, tanpa permintaan jaringan).
+    """
+    if not api_key:
+        return None
+    from googleapiclient.discovery import build # Impor berat, ditunda sampai dibutuhkan
+    return build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=api_key, cache_discovery=False)
+
+
+class _TTLCache:
+    """
+    Cache LRU in-process dengan TTL, aman dipakai dari beberapa thread.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[SearchKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: SearchKey) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            stored_at, videos = item
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return videos
+
+    def set(self, key: SearchKey, videos: List[Dict[str, Any]]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), videos)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class YouTubeDiscovery:
+    """
+    Pencarian video YouTube per set kata kunci dengan klien bersama, cache TTL, dan penggabungan
+    pencarian identik yang sedang berjalan. `client_factory` dapat diganti dengan klien palsu untuk pengujian.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Optional[Any]] = build_youtube_client,
+        max_results: int = YOUTUBE_MAX_RESULTS_PER_MODULE,
+        concurrency: int = YOUTUBE_SEARCH_CONCURRENCY,
+        ttl_seconds: int = YOUTUBE_CACHE_TTL_SECONDS,
+        cache_max_entries: int = YOUTUBE_CACHE_MAX_ENTRIES,
+        http_factory: Optional[Callable[[], Any]] = None
+    ):
+        self.client_factory = client_factory
+        self.max_results = max_results
+        self.concurrency = max(1, concurrency)
+        self.http_factory = http_factory
+        self._cache = _TTLCache(cache_max_entries, ttl_seconds)
+        self._client: Optional[Any] = None
+        self._client_built = False
+        self._client_lock = threading.Lock()
+        self._thread_local = threading.local()
+        self._in_flight: Dict[SearchKey, Future] = {}
+        self._in_flight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.searches = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _count(self, counter: str) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _get_client(self) -> Optional[Any]:
+        if not self._client_built:
+            with self._client_lock:
+                if not self._client_built:
+                    self._client = self.client_factory()
+                    self._client_built = True
+                    if self._client is None:
+                        print("Peringatan: YOUTUBE_API_KEY tidak disetel. Video YouTube tidak akan dicari.")
+        return self._client
+
+    def _thread_http(self) -> Optional[Any]:
+        # httplib2.Http tidak thread-safe; setiap thread worker memakai koneksinya sendiri (keep-alive per thread)
+        http = getattr(self._thread_local, "http", None)
+        if http is None:
+            if self.http_factory is not None:
+                http = self.http_factory()
+            else:
+                import httplib2 # Dependensi google-api-python-client
+                http = httplib2.Http(timeout=YOUTUBE_SEARCH_TIMEOUT_SECONDS)
+            self._thread_local.http = http
+        return http
+
+    def _execute_search(self, client: Any, key: SearchKey) -> List[Dict[str, Any]]:
+        self._count("searches")
+        keywords, max_results = key
+        request = client.search().list(
+            q=" ".join(keywords),
+            part="snippet", # Hanya mengambil snippet untuk efisiensi
+            type="video",   # Hanya cari video
+            maxResults=max_results,
+            relevanceLanguage="id", # Opsional: prioritaskan bahasa tertentu
+        )
+        return parse_search_response(request.execute(http=self._thread_http()))
+
+    def search_videos(self, keywords: Sequence[str], max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Mencari video untuk satu set kata kunci (sinkron). Mengembalikan daftar kosong jika kata kunci kosong,
+        klien tidak tersedia, atau terjadi error API.
+        """
+        normalized = normalize_keywords(keywords)
+        if not normalized:
+            return []
+        key = (normalized, max_results or self.max_results)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._count("cache_hits")
+            return cached
+        client = self._get_client()
+        if client is None:
+            return []
+
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            self._count("coalesced")
+            return future.result()
+
+        try:
+            videos = self._execute_search(client, key)
+            self._cache.set(key, videos)
+        except Exception as e:
+            self._count("errors")
+            print(f"Terjadi error saat mencari video YouTube untuk kata kunci {list(normalized)}: {e}")
+            videos = [] # Tidak di-cache: coba lagi pada permintaan berikutnya
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+        future.set_result(videos)
+        return videos
+
+    async def search_many(self, keyword_sets: Sequence[Sequence[str]]) -> List[List[Dict[str, Any]]]:
+        """
+        Mencari video untuk banyak set kata kunci secara bersamaan. Urutan hasil sama dengan input.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def search(keywords: Sequence[str]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await asyncio.to_thread(self.search_videos, keywords)
+
+        return list(await asyncio.gather(*(search(keywords) for keywords in keyword_sets)))
+
+    async def attach_videos(self, curriculum: Curriculum) -> Curriculum:
+        """
+        Mengembalikan salinan kurikulum dengan `videos` setiap modul terisi. Kurikulum asli (yang mungkin
+        tersimpan di cache kurikulum) tidak diubah.
+        """
+        if not curriculum.modules:
+            return curriculum
+        results = await self.search_many([module.keywords for module in curriculum.modules])
+        modules = [
+            module.model_copy(update={"videos": [Video(**video) for video in videos]})
+            for module, videos in zip(curriculum.modules, results)
+        ]
+        return curriculum.model_copy(update={"modules": modules})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "searches": self.searches,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "cache_entries": len(self._cache),
+            "ttl_seconds": self._cache.ttl_seconds,
+        }
+
+
+youtube_discovery = YouTubeDiscovery()
+
+
+class FakeYouTubeClient:
+    """
+    Pengganti lokal klien YouTube Data API (search().list().execute()) untuk pengujian: latensi tetap,
+    hasil deterministik per kueri, dan penghitung panggilan serta konkurensi maksimum.
+    """
+
+    def __init__(self, latency_seconds: float = 0.05, fail_queries: Sequence[str] = ()):
+        self.latency_seconds = latency_seconds
+        self.fail_queries = set(fail_queries)
+        self.calls: List[str] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def search(self) -> "FakeYouTubeClient":
+        return self
+
+    def list(self, q: str, maxResults: int = 5, **kwargs) -> "_FakeRequest":
+        return _FakeRequest(self, q, maxResults)
+
+
+class _FakeRequest:
+    def __init__(self, client: FakeYouTubeClient, query: str, max_results: int):
+        self.client = client
+        self.query = query
+        self.max_results = max_results
+
+    def execute(self, http: Any = None) -> Dict[str, Any]:
+        client = self.client
+        with client._lock:
+            client.calls.append(self.query)
+            client.active += 1
+            client.max_active = max(client.max_active, client.active)
+        try:
+            time.sleep(client.latency_seconds)
+            if self.query in client.fail_queries:
+                raise RuntimeError("quotaExceeded")
+            slug = re.sub(r"\W+", "-", self.query)
+            return {"items": [
+                {
+                    "id": {"kind": "youtube#video", "videoId": f"{slug}-{i}"},
+                    "snippet": {
+                        "title": f"Video {i}: {self.query}", "description": f"Tutorial tentang {self.query}",
+                        "channelTitle": "Kanal Uji", "thumbnails": {"default": {"url": f"https://img.example.com/{slug}-{i}.jpg"}},
+                    },
+                }
+                for i in range(self.max_results)
+            ]}
+        finally:
+            with client._lock:
+                client.active -= 1
+
+
+def _run_selftest() -> None:
+    from .schemas import Module
+
+    fake = FakeYouTubeClient(latency_seconds=0.1, fail_queries=["kuota habis"])
+    discovery = YouTubeDiscovery(client_factory=lambda: fake, max_results=3, concurrency=4, ttl_seconds=1, http_factory=lambda: None)
+    keyword_sets = [
+        ["Python", "Variabel"],
+        ["variabel", " python "], # Sama dengan modul pertama setelah normalisasi
+        ["FastAPI", "Routing"],
+        ["SQL", "JOIN"],
+        ["Docker", "Container"],
+        ["Git", "Branch"],
+        ["Kuota Habis"],
+        [],
+    ]
+    curriculum = Curriculum(
+        goal="Belajar backend Python", title="Kurikulum Uji",
+        modules=[Module(title=f"Modul {i}", keywords=keywords) for i, keywords in enumerate(keyword_sets)]
+    )
+
+    started_at = time.perf_counter()
+    result = asyncio.run(discovery.attach_videos(curriculum))
+    first_seconds = time.perf_counter() - started_at
+    unique_sets = 6 # 8 modul - 1 duplikat - 1 tanpa kata kunci
+    assert len(fake.calls) == unique_sets, fake.calls
+    assert fake.max_active <= 4, fake.max_active
+    assert [len(module.videos) for module in result.modules] == [3, 3, 3, 3, 3, 3, 0, 0]
+    assert result.modules[0].videos == result.modules[1].videos
+    assert all(not module.videos for module in curriculum.modules), "Kurikulum asli tidak boleh diubah"
+    assert first_seconds < unique_sets * fake.latency_seconds, "Pencarian seharusnya berjalan bersamaan"
+    print(f"Putaran 1: {len(fake.calls)} panggilan API untuk {len(keyword_sets)} modul dalam {first_seconds:.2f} detik (maks {fake.max_active} bersamaan)")
+
+    asyncio.run(discovery.attach_videos(curriculum))
+    assert len(fake.calls) == unique_sets + 1, "Hanya set yang gagal (tidak di-cache) yang dicari ulang"
+    print(f"Putaran 2: {discovery.cache_hits} cache hit, panggilan API tambahan: 1 (set yang sebelumnya gagal)")
+
+    time.sleep(1.1) # Melewati TTL
+    asyncio.run(discovery.attach_videos(curriculum))
+    assert len(fake.calls) == 2 * unique_sets + 1, "Setelah TTL habis semua set dicari ulang"
+    print("Putaran 3 (setelah TTL): semua set dicari ulang")
+
+    # Pencarian identik yang bersamaan digabung menjadi satu panggilan
+    coalescing = YouTubeDiscovery(client_factory=lambda: FakeYouTubeClient(latency_seconds=0.2), concurrency=8, http_factory=lambda: None)
+    asyncio.run(coalescing.search_many([["React", "Hooks"]] * 8))
+    assert coalescing.searches == 1 and coalescing.coalesced + coalescing.cache_hits == 7, coalescing.stats()
+    print(f"Penggabungan: 8 pencarian identik bersamaan -> {coalescing.searches} panggilan API")
+    print(f"Statistik: {discovery.stats()}")
+    print("Uji mandiri penemuan video: OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Penemuan video YouTube untuk modul kurikulum.")
+    parser.add_argument("--selftest", action="store_true", help="Uji dengan klien YouTube palsu.")
+    parser.add_argument("--keywords", nargs="*", help="Cari video untuk kata kunci ini (memerlukan YOUTUBE_API_KEY).")
+    args = parser.parse_args()
+
+    if args.selftest:
+        _run_selftest()
+    elif args.keywords:
+        for video in youtube_discovery.search_videos(args.keywords):
+            print(f"{video['title']} - {video['videoUrl']}")
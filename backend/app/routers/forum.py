@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Response
 from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List, Optional
 
-from .. import schemas, models, gamification_service
+from .. import schemas, models, gamification_service, forum_service, forum_votes
+from ..pagination import InvalidCursorError, MAX_PAGE_SIZE
 from ..database import get_db
 from ..dependencies import require_active_user # Impor dependensi otentikasi
 
@@ -26,6 +27,27 @@ def get_reply_or_404(db: Session, reply_id: int) -> models.ForumReply:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Balasan dengan ID {reply_id} tidak ditemukan.")
     return reply
 
+def _upvote_from_value(vote_value: int) -> bool:
+    if vote_value not in (0, 1):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nilai vote tidak valid. Gunakan 1 untuk upvote atau 0 untuk membatalkan.")
+    return vote_value == 1
+
+def _apply_vote(db: Session, user: models.User, target, upvote: Optional[bool], read_schema):
+    """
+    Mengubah vote di ledger beserta hitungan upvotes dan XP penulis (atau jurnal deltanya) dalam satu transaksi.
+    upvote=None berarti toggle.
+    """
+    if upvote is None:
+        result = forum_votes.toggle_vote(db, user.id, target)
+    else:
+        result = forum_votes.set_vote(db, user.id, target, upvote=upvote)
+    db.commit()
+    # Gamifikasi: XP penulis mungkin melewati ambang lencana
+    forum_votes.award_badges_after_vote(db, result)
+    db.refresh(target)
+    # Pada mode write-behind, hitungan di database belum termasuk delta yang masih di-buffer
+    return read_schema.model_validate(target, from_attributes=True).model_copy(update={"upvotes": forum_votes.current_upvotes(target)})
+
 # --- Endpoints untuk Postingan Forum ---
 
 @router.post("/posts", response_model=schemas.PostRead, status_code=status.HTTP_201_CREATED)
@@ -63,28 +85,40 @@ def create_forum_post(
 # Endpoint ini bisa publik
 @router.get("/posts", response_model=List[schemas.PostRead])
 def read_forum_posts(
-    skip: int = 0,
-    limit: int = 20,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor dari header X-Next-Cursor respons sebelumnya."),
+    skip: int = Query(0, ge=0, deprecated=True, description="Paginasi OFFSET lama; gunakan cursor."),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
     # Tambahkan filter lain jika perlu, misal: category: Optional[str] = None
     db: Session = Depends(get_db)
 ):
     """
-    Mengambil daftar postingan forum dengan paginasi.
-    Secara default diurutkan berdasarkan tanggal pembuatan terbaru.
+    Mengambil daftar postingan forum dengan paginasi keyset, beserta penulis dan jumlah balasan.
+    Diurutkan berdasarkan tanggal pembuatan terbaru. Jika masih ada halaman berikutnya,
+    cursor-nya dikirim di header `X-Next-Cursor`.
     """
-    posts = db.query(models.ForumPost)\
-              .order_by(models.ForumPost.created_at.desc())\
-              .offset(skip)\
-              .limit(limit)\
-              .all()
-    return [schemas.PostRead.from_orm(post) for post in posts]
+    if skip:
+        if cursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Gunakan cursor atau skip, tidak keduanya.")
+        # Kompatibilitas untuk klien lama; OFFSET besar tetap memindai semua baris yang dilewati
+        return forum_service.list_posts_by_offset(db, skip=skip, limit=limit)
+
+    # Postingan sudah berupa dict PostRead (penulis dan jumlah balasan dimuat dalam 2 kueri per halaman)
+    try:
+        posts, next_cursor = forum_service.list_posts(db, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return posts
 
 
 @router.get("/posts/{post_id}", response_model=schemas.PostReadWithReplies)
 def read_single_forum_post(post_id: int, db: Session = Depends(get_db)):
     """
     Mengambil satu postingan forum berdasarkan ID, beserta semua balasannya.
-    Balasan di-load menggunakan eager loading.
+    Balasan di-load menggunakan eager loading. Untuk diskusi besar, gunakan GET /forum/posts/{post_id}/thread
+    yang memuat pohon balasan per halaman dengan batas kedalaman.
     """
     # Menggunakan joinedload atau selectinload untuk efisiensi pengambilan relasi
     post = db.query(models.ForumPost)\
@@ -145,30 +179,29 @@ def delete_forum_post(
 @router.post("/posts/{post_id}/vote", response_model=schemas.PostRead)
 def vote_on_post(
     post_id: int,
-    vote_value: int = Body(..., embed=True, description="Nilai vote: 1 untuk upvote."),
+    vote_value: int = Body(..., embed=True, description="Nilai vote: 1 untuk upvote, 0 untuk membatalkan upvote."),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_active_user) # Memerlukan pengguna aktif
 ):
     """
-    Memberikan suara (upvote) pada postingan forum.
-    Pengguna yang terotentikasi diperlukan untuk memberikan suara.
+    Memberikan (1) atau membatalkan (0) upvote pada postingan forum.
+    Idempoten: setiap pengguna paling banyak satu upvote per postingan (tercatat di ledger forum_votes).
     """
     db_post = get_post_or_404(db, post_id)
-    # Di sini Anda bisa menambahkan logika untuk mencegah pengguna yang sama melakukan vote berkali-kali
-    # atau menyimpan catatan siapa yang melakukan vote.
-    if vote_value == 1:
-        db_post.upvotes = (db_post.upvotes or 0) + 1
-        # Gamifikasi: Penulis postingan mendapatkan XP untuk upvote
-        if db_post.author_id:
-             gamification_service.add_xp(db=db, user_id=db_post.author_id, points=5) # Misal 5 XP per upvote
-    # elif vote_value == -1: # Logika downvote
-    #     db_post.downvotes = (db_post.downvotes or 0) + 1
-    else:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nilai vote tidak valid. Gunakan 1 untuk upvote.")
+    return _apply_vote(db, current_user, db_post, _upvote_from_value(vote_value), schemas.PostRead)
 
-    db.commit()
-    db.refresh(db_post)
-    return schemas.PostRead.from_orm(db_post)
+
+@router.post("/posts/{post_id}/vote/toggle", response_model=schemas.PostRead)
+def toggle_vote_on_post(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_active_user)
+):
+    """
+    Membalik status upvote pengguna pada postingan (upvote jika belum, batalkan jika sudah).
+    """
+    db_post = get_post_or_404(db, post_id)
+    return _apply_vote(db, current_user, db_post, None, schemas.PostRead)
 
 
 # --- Endpoints untuk Balasan Forum ---
@@ -219,6 +252,66 @@ def create_forum_reply(
     return schemas.ReplyRead.from_orm(db_reply)
 
 
+@router.get("/posts/{post_id}/replies", response_model=List[schemas.ReplyRead])
+def read_forum_replies(
+    post_id: int,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor dari header X-Next-Cursor respons sebelumnya."),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    Mengambil balasan sebuah postingan secara bertahap (terlama lebih dulu) dengan paginasi keyset.
+    Cursor halaman berikutnya dikirim di header `X-Next-Cursor`.
+    """
+    get_post_or_404(db, post_id)
+    try:
+        replies, next_cursor = forum_service.list_replies(db, post_id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [schemas.ReplyRead.model_validate(reply, from_attributes=True) for reply in replies]
+
+
+@router.get("/posts/{post_id}/thread", response_model=List[schemas.ThreadedReplyRead])
+def read_forum_thread(
+    post_id: int,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor dari header X-Next-Cursor respons sebelumnya."),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Jumlah balasan tingkat atas per halaman."),
+    max_depth: int = Query(forum_service.FORUM_THREAD_DEFAULT_DEPTH, ge=0, le=forum_service.FORUM_THREAD_MAX_DEPTH),
+    db: Session = Depends(get_db)
+):
+    """
+    Mengambil balasan berulir sebuah postingan, dipaginasi per balasan tingkat atas (terlama lebih dulu).
+    Setiap akar dikembalikan bersama turunannya sampai `max_depth` dalam `child_replies`; node di batas
+    kedalaman yang masih memiliki balasan ditandai `has_more_replies` (lanjutkan dengan
+    GET /forum/replies/{reply_id}/thread). Cursor halaman berikutnya dikirim di header `X-Next-Cursor`.
+    """
+    get_post_or_404(db, post_id)
+    try:
+        thread, next_cursor = forum_service.load_thread_page(db, post_id, limit=limit, cursor=cursor, max_depth=max_depth)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return thread
+
+
+@router.get("/replies/{reply_id}/thread", response_model=schemas.ThreadedReplyRead)
+def read_reply_thread(
+    reply_id: int,
+    max_depth: int = Query(forum_service.FORUM_THREAD_DEFAULT_DEPTH, ge=0, le=forum_service.FORUM_THREAD_MAX_DEPTH),
+    db: Session = Depends(get_db)
+):
+    """
+    Mengambil subtree sebuah balasan (balasan itu sendiri di kedalaman 0) sampai `max_depth`.
+    """
+    reply = get_reply_or_404(db, reply_id)
+    return forum_service.load_reply_subtree(db, reply, max_depth=max_depth)
+
+
 @router.get("/replies/{reply_id}", response_model=schemas.ReplyRead) # Biasanya balasan diambil bersama postingan
 def read_single_forum_reply(reply_id: int, db: Session = Depends(get_db)):
     """
@@ -275,27 +368,29 @@ def delete_forum_reply(
 @router.post("/replies/{reply_id}/vote", response_model=schemas.ReplyRead)
 def vote_on_reply(
     reply_id: int,
-    vote_value: int = Body(..., embed=True, description="Nilai vote: 1 untuk upvote."),
+    vote_value: int = Body(..., embed=True, description="Nilai vote: 1 untuk upvote, 0 untuk membatalkan upvote."),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_active_user) # Memerlukan pengguna aktif
 ):
     """
-    Memberikan suara (upvote) pada balasan forum.
-    Pengguna yang terotentikasi diperlukan untuk memberikan suara.
+    Memberikan (1) atau membatalkan (0) upvote pada balasan forum.
+    Idempoten: setiap pengguna paling banyak satu upvote per balasan (tercatat di ledger forum_votes).
     """
     db_reply = get_reply_or_404(db, reply_id)
-    # Tambahkan logika untuk mencegah vote ganda jika perlu
-    if vote_value == 1:
-        db_reply.upvotes = (db_reply.upvotes or 0) + 1
-        # Gamifikasi: Penulis balasan mendapatkan XP untuk upvote
-        if db_reply.author_id:
-             gamification_service.add_xp(db=db, user_id=db_reply.author_id, points=2) # Misal 2 XP per upvote balasan
-    else:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nilai vote tidak valid. Gunakan 1 untuk upvote.")
+    return _apply_vote(db, current_user, db_reply, _upvote_from_value(vote_value), schemas.ReplyRead)
 
-    db.commit()
-    db.refresh(db_reply)
-    return schemas.ReplyRead.from_orm(db_reply)
+
+@router.post("/replies/{reply_id}/vote/toggle", response_model=schemas.ReplyRead)
+def toggle_vote_on_reply(
+    reply_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_active_user)
+):
+    """
+    Membalik status upvote pengguna pada balasan (upvote jika belum, batalkan jika sudah).
+    """
+    db_reply = get_reply_or_404(db, reply_id)
+    return _apply_vote(db, current_user, db_reply, None, schemas.ReplyRead)
 ```
 
 Catatan penting:
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, HttpUrl
 from typing import List, Optional
 from datetime import datetime # Ditambahkan untuk field tanggal
 
+from .models import ContentType
+
 class Topic(BaseModel):
     """
     Mewakili satu topik pembelajaran dalam sebuah modul.
@@ -10,6 +12,17 @@ class Topic(BaseModel):
     description: Optional[str] = Field(None, description="Deskripsi singkat tentang topik.", example="Memahami apa itu variabel, bagaimana mendeklarasikannya, dan jenis data dasar.")
     # Anda dapat menambahkan bidang lain seperti 'estimated_duration_minutes', 'sub_topics', dll.
 
+class Video(BaseModel):
+    """
+    Video YouTube yang relevan dengan sebuah modul (hasil pencarian berdasarkan kata kunci modul).
+    """
+    videoId: str
+    title: str
+    description: Optional[str] = None
+    channelTitle: Optional[str] = None
+    videoUrl: str
+    thumbnailUrl: Optional[str] = None
+
 class Module(BaseModel):
     """
     Mewakili satu modul dalam kurikulum pembelajaran.
@@ -19,6 +32,7 @@ class Module(BaseModel):
     learning_objectives: List[str] = Field(default_factory=list, description="Daftar tujuan pembelajaran untuk modul ini.", example=["Memahami sintaks dasar Python.", "Mampu menulis skrip Python sederhana."])
     topics: List[Topic] = Field(default_factory=list, description="Daftar topik yang dibahas dalam modul ini.")
     keywords: List[str] = Field(default_factory=list, description="Kata kunci yang relevan dengan modul ini.", example=["Python", "Pemrograman", "Variabel", "Loop", "Fungsi"])
+    videos: List[Video] = Field(default_factory=list, description="Video YouTube yang ditemukan berdasarkan kata kunci modul.")
 
 class Curriculum(BaseModel):
     """
@@ -46,8 +60,8 @@ class SearchResultItem(BaseModel):
     source_url: Optional[str] = None
     content_type: str # Akan menjadi nilai dari enum ContentType
     text_chunk: str
-    # Anda bisa menambahkan 'similarity_score' jika dihitung dan ingin ditampilkan
-    # similarity_score: Optional[float] = None
+    similarity_score: Optional[float] = Field(None, description="Kesamaan kosinus antara kueri dan potongan konten (0-1, lebih tinggi lebih mirip).")
+    score: Optional[float] = Field(None, description="Skor peringkat akhir: kesamaan kosinus pada mode 'vector', skor RRF pada mode 'hybrid'.")
 
     class Config:
         orm_mode = True # Untuk kompatibilitas dengan objek SQLAlchemy
@@ -58,8 +72,61 @@ class SearchResponse(BaseModel):
     Model respons untuk hasil pencarian.
     """
     query: str
+    mode: str = "vector"
     results: List[SearchResultItem]
 
+# --- Skema untuk Job Ingestion Konten ---
+class IndexUrlRequest(BaseModel):
+    url: HttpUrl
+    title: Optional[str] = None # Judul bisa opsional, mungkin diambil dari artikel
+    content_type: ContentType = ContentType.ARTICLE # Default ke artikel
+
+class BulkIndexRequest(BaseModel):
+    """
+    Model permintaan untuk mengantrekan banyak URL sekaligus.
+    """
+    urls: List[HttpUrl] = Field(..., min_items=1, max_items=10000, description="Daftar URL yang akan diindeks.")
+    content_type: ContentType = ContentType.ARTICLE
+
+class IngestionJobRead(BaseModel):
+    """
+    Status satu job ingestion.
+    """
+    id: str
+    batch_id: Optional[str] = None
+    url: str
+    title: Optional[str] = None
+    content_type: str
+    status: str
+    stage: Optional[str] = None
+    progress: int
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class IngestionJobSubmitted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class IngestionBatchSubmitted(BaseModel):
+    batch_id: str
+    job_count: int
+    status_url: str
+
+class IngestionBatchRead(BaseModel):
+    """
+    Ringkasan status job dalam satu bulk submit.
+    """
+    batch_id: str
+    total: int
+    counts: dict # Jumlah job per status
+    progress: float # Rata-rata progress semua job (0-100)
+
 # --- Skema untuk User ---
 class UserBase(BaseModel):
     email: str = Field(..., example="user@example.com")
@@ -153,7 +220,7 @@ class PostRead(PostBase):
     created_at: datetime # Impor datetime
     updated_at: Optional[datetime] = None # Impor datetime
     upvotes: int = 0
-    # reply_count: int = 0 # Bisa ditambahkan jika dihitung di query
+    reply_count: int = 0 # Diisi oleh daftar postingan (GET /forum/posts)
 
     class Config:
         orm_mode = True
@@ -200,6 +267,15 @@ class SimpleReplyRead(ReplyBase): # Versi sederhana untuk menghindari rekursi da
 class PostReadWithReplies(PostRead):
     replies: List[SimpleReplyRead] = [] # Menggunakan SimpleReplyRead
 
+class ThreadedReplyRead(SimpleReplyRead): # Node pohon balasan berulir (GET /forum/posts/{post_id}/thread)
+    depth: int = 0 # 0 = balasan yang menjadi akar halaman/subtree
+    # True jika node berada di batas kedalaman dan masih memiliki balasan yang belum dimuat
+    # (lanjutkan dengan GET /forum/replies/{id}/thread)
+    has_more_replies: bool = False
+    child_replies: List['ThreadedReplyRead'] = []
+
+ThreadedReplyRead.model_rebuild()
+
 # Memperbarui forward references untuk ReplyRead jika menggunakan self-referencing type hint secara langsung
 # ReplyRead.update_forward_refs() # Panggil ini di akhir file jika 'ReplyRead' digunakan di List['ReplyRead']
 
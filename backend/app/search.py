@@ -0,0 +1,192 @@
+import os
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from sqlalchemy import func, literal, literal_column
+from sqlalchemy.orm import Query, Session, defer
+
+from .models import LearningContent, ContentType, TEXT_SEARCH_CONFIG
+from .vector_index import apply_search_recall
+
+# Konstanta k pada Reciprocal Rank Fusion: skor = sum(1 / (k + rank)). Nilai 60 adalah default yang umum.
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# Jumlah kandidat yang diambil dari masing-masing sumber (vektor dan leksikal) sebelum digabung,
+# sebagai kelipatan top_k.
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "4"))
+
+# Satu hasil pencarian: (konten, kesamaan kosinus 0-1, skor peringkat akhir).
+# Kolom embedding tidak dimuat (defer) karena tidak dikembalikan ke klien.
+SearchHit = Tuple[LearningContent, float, float]
+
+
+class SearchFilters:
+    """
+    Filter metadata untuk /search. Filter diterapkan di klausa WHERE kueri pgvector itu sendiri
+    (bukan setelah LIMIT), sehingga top_k hasil selalu terisi jika ada cukup konten yang cocok.
+    - content_type: memakai indeks ANN parsial per ContentType (lihat vector_index.py).
+    - source_domain: kecocokan persis pada kolom source_domain ternormalisasi ("www." diabaikan).
+    - title_prefix: `title LIKE 'prefix%'`, didukung indeks text_pattern_ops.
+    """
+
+    def __init__(
+        self,
+        content_type: Optional[ContentType] = None,
+        source_domain: Optional[str] = None,
+        title_prefix: Optional[str] = None
+    ):
+        self.content_type = content_type
+        self.source_domain = normalize_source_domain(source_domain) if source_domain else None
+        self.title_prefix = title_prefix or None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.content_type is None and self.source_domain is None and self.title_prefix is None
+
+    @property
+    def needs_iterative_scan(self) -> bool:
+        # Filter content_type saja sudah dilayani penuh oleh indeks parsial
+        return self.source_domain is not None or self.title_prefix is not None
+
+    def apply(self, query: Query) -> Query:
+        if self.content_type is not None:
+            query = query.filter(LearningContent.content_type == self.content_type)
+        if self.source_domain is not None:
+            query = query.filter(LearningContent.source_domain == self.source_domain)
+        if self.title_prefix is not None:
+            query = query.filter(LearningContent.title.like(_escape_like(self.title_prefix) + "%"))
+        return query
+
+
+def normalize_source_domain(value: Optional[str]) -> Optional[str]:
+    """
+    Menormalisasi URL atau nama host menjadi domain: huruf kecil, tanpa port dan tanpa awalan "www.".
+    Contoh: "https://WWW.Example.com:8080/a" -> "example.com", "docs.python.org" -> "docs.python.org"
+    """
+    if not value or not value.strip():
+        return None
+    value = value.strip()
+    host = urlparse(value if "://" in value else f"//{value}").hostname
+    if not host:
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def _escape_like(value: str) -> str:
+    # Escape wildcard LIKE dengan escape character default Postgres (backslash)
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def vector_search(
+    db: Session,
+    query_embedding: Sequence[float],
+    top_k: int,
+    filters: Optional[SearchFilters] = None
+) -> List[SearchHit]:
+    """
+    Pencarian semantik murni: mengurutkan berdasarkan jarak kosinus pgvector (<=>).
+    Skor peringkat sama dengan kesamaan kosinus (1 - jarak).
+    """
+    distance = LearningContent.embedding.cosine_distance(query_embedding)
+    if filters is None or filters.is_empty:
+        rows = db.query(LearningContent, (1 - distance).label("similarity_score"))\
+                 .options(defer(LearningContent.embedding))\
+                 .order_by(distance)\
+                 .limit(top_k)\
+                 .all()
+        return [(content, float(similarity), float(similarity)) for content, similarity in rows]
+
+    # Dengan iterative scan relaxed_order (IVFFlat), indeks dapat mengembalikan baris sedikit tidak berurutan;
+    # top_k kandidat diambil di subkueri lalu diurutkan ulang berdasarkan kesamaan.
+    candidates = filters.apply(db.query(LearningContent.id.label("id"), (1 - distance).label("similarity_score")))\
+                        .order_by(distance)\
+                        .limit(top_k)\
+                        .subquery("filtered_candidates")
+    rows = db.query(LearningContent, candidates.c.similarity_score)\
+             .options(defer(LearningContent.embedding))\
+             .join(candidates, LearningContent.id == candidates.c.id)\
+             .order_by(candidates.c.similarity_score.desc())\
+             .all()
+    return [(content, float(similarity), float(similarity)) for content, similarity in rows]
+
+
+def hybrid_search(
+    db: Session,
+    query: str,
+    query_embedding: Sequence[float],
+    top_k: int,
+    rrf_k: int = HYBRID_RRF_K,
+    candidate_multiplier: int = HYBRID_CANDIDATE_MULTIPLIER,
+    filters: Optional[SearchFilters] = None
+) -> List[SearchHit]:
+    """
+    Pencarian hybrid: menggabungkan kandidat ANN pgvector dan kandidat full-text Postgres (tsvector, indeks GIN)
+    dengan Reciprocal Rank Fusion. Kueri kata kunci pendek (misalnya nama API) yang kurang terwakili
+    oleh embedding tetap dapat muncul melalui kandidat leksikal.
+
+    Kedua set kandidat dihitung sebagai CTE dalam satu pernyataan SQL, sehingga hanya ada satu round trip ke database.
+    Skor akhir adalah skor RRF; kesamaan kosinus tetap dihitung untuk setiap hasil.
+    `filters` diterapkan di kedua CTE kandidat.
+    """
+    filters = filters or SearchFilters()
+    candidate_limit = max(top_k, top_k * candidate_multiplier)
+    distance = LearningContent.embedding.cosine_distance(query_embedding)
+
+    # Kandidat 1: tetangga terdekat berdasarkan embedding
+    vector_candidates = filters.apply(db.query(
+        LearningContent.id.label("id"),
+        func.row_number().over(order_by=distance).label("rank")
+    )).order_by(distance).limit(candidate_limit).cte("vector_candidates")
+
+    # Kandidat 2: kecocokan full-text, diurutkan dengan ts_rank_cd
+    text_search_config = literal_column(f"'{TEXT_SEARCH_CONFIG}'")
+    document = func.to_tsvector(text_search_config, LearningContent.text_chunk) # Sama dengan ekspresi indeks GIN
+    ts_query = func.websearch_to_tsquery(text_search_config, query)
+    lexical_score = func.ts_rank_cd(document, ts_query)
+    lexical_candidates = filters.apply(db.query(
+        LearningContent.id.label("id"),
+        func.row_number().over(order_by=lexical_score.desc()).label("rank")
+    )).filter(document.op("@@")(ts_query))\
+     .order_by(lexical_score.desc())\
+     .limit(candidate_limit)\
+     .cte("lexical_candidates")
+
+    candidate_id = func.coalesce(vector_candidates.c.id, lexical_candidates.c.id)
+    rrf_score = (
+        func.coalesce(literal(1.0) / (rrf_k + vector_candidates.c.rank), 0.0) +
+        func.coalesce(literal(1.0) / (rrf_k + lexical_candidates.c.rank), 0.0)
+    )
+
+    rows = db.query(LearningContent, (1 - distance).label("similarity_score"), rrf_score.label("rrf_score"))\
+             .options(defer(LearningContent.embedding))\
+             .select_from(vector_candidates)\
+             .join(lexical_candidates, vector_candidates.c.id == lexical_candidates.c.id, full=True)\
+             .join(LearningContent, LearningContent.id == candidate_id)\
+             .order_by(rrf_score.desc())\
+             .limit(top_k)\
+             .all()
+    return [(content, float(similarity), float(score)) for content, similarity, score in rows]
+
+
+def search_learning_content(
+    db: Session,
+    query: str,
+    query_embedding: Sequence[float],
+    top_k: int,
+    mode: str = "vector",
+    recall: str = "balanced",
+    filters: Optional[SearchFilters] = None
+) -> List[SearchHit]:
+    """
+    Titik masuk pencarian konten pembelajaran untuk endpoint /search.
+    `mode` adalah "vector" (default) atau "hybrid".
+    `recall` ("fast", "balanced", "accurate") menyetel ef_search/probes indeks ANN untuk kueri ini.
+    `filters` (opsional) membatasi hasil berdasarkan tipe konten, domain sumber, dan prefix judul.
+    """
+    filtered = filters is not None and filters.needs_iterative_scan
+    if mode == "hybrid":
+        apply_search_recall(db, recall, max(top_k, top_k * HYBRID_CANDIDATE_MULTIPLIER), filtered=filtered)
+        return hybrid_search(db, query, query_embedding, top_k, filters=filters)
+    if mode == "vector":
+        apply_search_recall(db, recall, top_k, filtered=filtered)
+        return vector_search(db, query_embedding, top_k, filters=filters)
+    raise ValueError(f"Mode pencarian tidak dikenal: '{mode}'. Gunakan 'vector' atau 'hybrid'.")
@@ -0,0 +1,445 @@
+import os
+import re
+import sys
+import argparse
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .models import LearningContent, ContentType
+from .index_maintenance import IndexMaintenanceBusyError, advisory_lock, drop_invalid_indexes, run_locked, start_in_background
+
+# Manajemen indeks ANN (approximate nearest neighbor) pgvector untuk LearningContent.embedding.
+# Tanpa indeks ini, `ORDER BY embedding <=> :q LIMIT k` di /search selalu menjadi sequential scan.
+VECTOR_INDEX_NAME = "ix_learning_content_embedding_ann"
+VECTOR_INDEX_TYPES = ("hnsw", "ivfflat")
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw")
+# Parameter build HNSW (lihat dokumentasi pgvector)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+# Jumlah list IVFFlat; 0 berarti otomatis (baris/1000 untuk <= 1 juta baris, sqrt(baris) di atasnya)
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "0"))
+# IVFFlat harus dibangun setelah tabel berisi data (centroid dihitung dari data yang ada)
+IVFFLAT_MIN_ROWS = int(os.getenv("IVFFLAT_MIN_ROWS", "1000"))
+# Opsional: memori untuk build indeks, misalnya "512MB". Build HNSW jauh lebih cepat jika graf muat di memori.
+VECTOR_INDEX_MAINTENANCE_WORK_MEM = os.getenv("VECTOR_INDEX_MAINTENANCE_WORK_MEM")
+# Build indeks saat startup berjalan di thread background di bawah advisory lock (satu worker saja).
+# Set "false" jika build dijalankan sebagai langkah deploy: `python -m app.vector_index --ensure`.
+VECTOR_INDEX_ENSURE_ON_STARTUP = os.getenv("VECTOR_INDEX_ENSURE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Advisory lock bersama untuk semua DDL indeks learning_content (ensure, rebuild, CLI)
+VECTOR_INDEX_LOCK_NAME = "learning_content_index_maintenance"
+
+# Indeks ANN parsial per ContentType (`... WHERE content_type = 'article'`). Kueri yang difilter per tipe konten
+# memakai indeks parsial ini, sehingga semua kandidat ANN sudah lolos filter dan tidak ada hasil yang terbuang.
+VECTOR_INDEX_PARTIAL_BY_CONTENT_TYPE = os.getenv("VECTOR_INDEX_PARTIAL_BY_CONTENT_TYPE", "true").lower() in ("1", "true", "yes")
+# Mode iterative scan pgvector (>= 0.8.0) untuk kueri yang difilter (domain, prefix judul): indeks terus dipindai
+# sampai top_k baris lolos filter, bukan berhenti setelah ef_search/probes kandidat. "off" untuk menonaktifkan.
+VECTOR_ITERATIVE_SCAN = os.getenv("VECTOR_ITERATIVE_SCAN", "strict_order")
+
+# Preset trade-off recall/latensi untuk parameter `recall` di /search.
+# ef_search (HNSW) dan probes (IVFFlat, sebagai fraksi dari jumlah list) lebih tinggi = recall lebih baik, lebih lambat.
+SEARCH_RECALL_PRESETS: Dict[str, Dict[str, float]] = {
+    "fast": {"ef_search": 20, "probes_fraction": 0.01},
+    "balanced": {"ef_search": 40, "probes_fraction": 0.05},
+    "accurate": {"ef_search": 200, "probes_fraction": 0.2},
+}
+
+# Informasi build terakhir di proses ini (untuk laporan)
+_last_build: Dict[str, Any] = {}
+# Jumlah list indeks IVFFlat yang aktif, untuk menghitung probes: dibaca dari pg_class.reloptions saat pertama
+# dipakai di setiap proses (lihat _ivfflat_lists_in_use), lalu di-cache selama VECTOR_INDEX_LISTS_TTL_SECONDS
+# agar rebuild oleh worker/proses lain juga terbaca. None di cache berarti tidak ada indeks IVFFlat valid.
+VECTOR_INDEX_LISTS_TTL_SECONDS = float(os.getenv("VECTOR_INDEX_LISTS_TTL_SECONDS", "300"))
+_ivfflat_lists_cache: Optional[Tuple[Optional[int], float]] = None # (jumlah list, waktu dibaca)
+# Versi ekstensi pgvector (di-cache setelah dibaca pertama kali)
+_pgvector_version: Optional[Tuple[int, ...]] = None
+
+
+def _count_rows(db: Session, content_type: Optional[ContentType] = None) -> int:
+    query = db.query(LearningContent.id)
+    if content_type is not None:
+        query = query.filter(LearningContent.content_type == content_type)
+    return query.count()
+
+
+def partial_index_name(content_type: ContentType) -> str:
+    return f"{VECTOR_INDEX_NAME}_{content_type.value}"
+
+
+def _ivfflat_lists(row_count: int) -> int:
+    if IVFFLAT_LISTS > 0:
+        return IVFFLAT_LISTS
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return max(1, int(math.sqrt(row_count)))
+
+
+def _index_ddl(index_type: str, row_count: int, content_type: Optional[ContentType] = None) -> str:
+    """
+    DDL indeks ANN. Jika `content_type` diberikan, indeks dibuat parsial untuk tipe konten tersebut.
+    """
+    table = LearningContent.__tablename__
+    index_name = partial_index_name(content_type) if content_type is not None else VECTOR_INDEX_NAME
+    # Nilai enum berasal dari ContentType (bukan input pengguna), aman disisipkan sebagai literal
+    where = f" WHERE content_type = '{content_type.value}'" if content_type is not None else ""
+    if index_type == "hnsw":
+        return (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table} "
+            f"USING hnsw (embedding vector_cosine_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION}){where}"
+        )
+    if index_type == "ivfflat":
+        return (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table} "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {_ivfflat_lists(row_count)}){where}"
+        )
+    raise ValueError(f"Tipe indeks vektor tidak dikenal: '{index_type}'. Pilih dari: {', '.join(VECTOR_INDEX_TYPES)}")
+
+
+def _run_autocommit(db: Session, statements) -> float:
+    """
+    Menjalankan DDL di koneksi AUTOCOMMIT (CREATE INDEX CONCURRENTLY tidak bisa di dalam transaksi).
+    Mengembalikan durasi eksekusi dalam detik.
+    """
+    started_at = time.perf_counter()
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if VECTOR_INDEX_MAINTENANCE_WORK_MEM:
+            conn.execute(text("SELECT set_config('maintenance_work_mem', :value, false)"), {"value": VECTOR_INDEX_MAINTENANCE_WORK_MEM})
+        for statement in statements:
+            conn.execute(text(statement))
+    return time.perf_counter() - started_at
+
+
+def _record_build(index_type: str, row_count: int, seconds: float, action: str) -> None:
+    _last_build.update({
+        "action": action,
+        "index_type": index_type,
+        "rows": row_count,
+        "build_seconds": round(seconds, 3),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    })
+    print(f"Indeks vektor {VECTOR_INDEX_NAME} ({index_type}, {action}) selesai untuk {row_count} baris dalam {seconds:.1f} detik.")
+
+
+def get_existing_index_type(db: Session) -> Optional[str]:
+    """
+    Mengembalikan tipe indeks ANN yang ada ("hnsw"/"ivfflat"), atau None jika belum ada.
+    Indeks INVALID (build CONCURRENTLY yang gagal) dianggap tidak ada.
+    """
+    indexdef = db.execute(
+        text(
+            "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND i.indisvalid"
+        ),
+        {"name": VECTOR_INDEX_NAME}
+    ).scalar()
+    if not indexdef:
+        return None
+    indexdef = indexdef.lower()
+    return next((index_type for index_type in VECTOR_INDEX_TYPES if f"using {index_type}" in indexdef), None)
+
+
+def invalidate_ivfflat_lists() -> None:
+    """
+    Membuang jumlah list yang di-cache; dipanggil setelah indeks dibuat atau dibangun ulang di proses ini.
+    """
+    global _ivfflat_lists_cache
+    _ivfflat_lists_cache = None
+
+
+def _ivfflat_lists_in_use(db: Session) -> Optional[int]:
+    """
+    Jumlah list indeks ANN utama jika indeks itu IVFFlat yang valid (dari pg_class.reloptions, misalnya
+    ['lists=1000']), atau None. Dibaca sekali per proses lalu di-cache (lihat VECTOR_INDEX_LISTS_TTL_SECONDS).
+    """
+    global _ivfflat_lists_cache
+    cached = _ivfflat_lists_cache
+    if cached is not None and time.monotonic() - cached[1] < VECTOR_INDEX_LISTS_TTL_SECONDS:
+        return cached[0]
+    row = db.execute(
+        text(
+            "SELECT am.amname, c.reloptions FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_am am ON am.oid = c.relam WHERE c.relname = :name AND i.indisvalid"
+        ),
+        {"name": VECTOR_INDEX_NAME}
+    ).first()
+    lists = None
+    if row is not None and row.amname == "ivfflat":
+        # Tanpa opsi eksplisit, pgvector memakai lists = 100
+        lists = next((int(option.split("=", 1)[1]) for option in row.reloptions or [] if option.startswith("lists=")), 100)
+    _ivfflat_lists_cache = (lists, time.monotonic())
+    return lists
+
+
+def _partial_index_ddls(db: Session, index_type: str, existing: Optional[List[str]] = None) -> List[str]:
+    """
+    DDL indeks ANN parsial per ContentType yang belum ada. Untuk IVFFlat, tipe konten dengan baris
+    kurang dari IVFFLAT_MIN_ROWS dilewati (centroid butuh data); kueri untuk tipe itu tetap memakai indeks utama.
+    """
+    if not VECTOR_INDEX_PARTIAL_BY_CONTENT_TYPE:
+        return []
+    existing = existing if existing is not None else list_partial_indexes(db)
+    statements = []
+    for content_type in ContentType:
+        if partial_index_name(content_type) in existing:
+            continue
+        row_count = _count_rows(db, content_type)
+        if index_type == "ivfflat" and row_count < IVFFLAT_MIN_ROWS:
+            continue
+        statements.append(_index_ddl(index_type, row_count, content_type))
+    return statements
+
+
+def list_partial_indexes(db: Session) -> List[str]:
+    """
+    Nama indeks ANN parsial per ContentType yang ada dan valid di database.
+    """
+    names = [partial_index_name(content_type) for content_type in ContentType]
+    rows = db.execute(
+        text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = ANY(:names) AND i.indisvalid"
+        ),
+        {"names": names}
+    ).all()
+    return [row.relname for row in rows]
+
+
+def _ann_index_names() -> List[str]:
+    return [VECTOR_INDEX_NAME] + [partial_index_name(content_type) for content_type in ContentType]
+
+
+def ensure_vector_index(db: Session, index_type: str = VECTOR_INDEX_TYPE) -> bool:
+    """
+    Membuat indeks ANN pada LearningContent.embedding (dan indeks parsial per ContentType) jika belum ada.
+    IVFFlat ditunda sampai tabel berisi minimal IVFFLAT_MIN_ROWS baris. Indeks INVALID dihapus lalu dibuat ulang.
+    Mengembalikan True jika indeks utama ada (atau baru dibuat).
+    Pemanggil memegang VECTOR_INDEX_LOCK_NAME (lihat run_index_maintenance).
+    """
+    drop_invalid_indexes(db, _ann_index_names())
+    existing_type = get_existing_index_type(db)
+    if existing_type is not None:
+        partial_ddls = _partial_index_ddls(db, existing_type)
+        if partial_ddls:
+            seconds = _run_autocommit(db, partial_ddls)
+            _record_build(existing_type, _count_rows(db), seconds, "create-partial")
+        return True
+
+    row_count = _count_rows(db)
+    if index_type == "ivfflat" and row_count < IVFFLAT_MIN_ROWS:
+        print(f"Indeks IVFFlat ditunda: hanya {row_count} baris (minimal {IVFFLAT_MIN_ROWS}). Gunakan rebuild setelah bulk load.")
+        return False
+
+    seconds = _run_autocommit(db, [_index_ddl(index_type, row_count)] + _partial_index_ddls(db, index_type))
+    _record_build(index_type, row_count, seconds, "create")
+    invalidate_ivfflat_lists()
+    return True
+
+
+def rebuild_vector_index(db: Session, index_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Membangun ulang indeks ANN (termasuk indeks parsial per ContentType), misalnya setelah bulk load.
+    - Jika tipe indeks sama dan HNSW: REINDEX CONCURRENTLY (graf dibangun ulang tanpa mengunci tulis).
+    - Jika IVFFlat atau tipe berubah: DROP lalu CREATE, agar jumlah list/centroid sesuai dengan data saat ini.
+    Raises IndexMaintenanceBusyError jika build lain (startup, CLI, rebuild) sedang berjalan.
+    """
+    with advisory_lock(db.get_bind(), VECTOR_INDEX_LOCK_NAME) as acquired:
+        if not acquired:
+            raise IndexMaintenanceBusyError("Build indeks vektor lain sedang berjalan. Coba lagi setelah selesai.")
+        return _rebuild_vector_index(db, index_type or VECTOR_INDEX_TYPE)
+
+
+def _rebuild_vector_index(db: Session, index_type: str) -> Dict[str, Any]:
+    drop_invalid_indexes(db, _ann_index_names())
+    existing_type = get_existing_index_type(db)
+    existing_partials = list_partial_indexes(db)
+    row_count = _count_rows(db)
+
+    if existing_type == index_type == "hnsw":
+        statements = [f"REINDEX INDEX CONCURRENTLY {name}" for name in [VECTOR_INDEX_NAME] + existing_partials]
+        statements += _partial_index_ddls(db, index_type, existing_partials)
+        action = "reindex"
+    else:
+        statements = [f"DROP INDEX CONCURRENTLY IF EXISTS {name}" for name in [VECTOR_INDEX_NAME] + existing_partials]
+        statements += [_index_ddl(index_type, row_count)] + _partial_index_ddls(db, index_type, existing=[])
+        action = "recreate"
+    seconds = _run_autocommit(db, statements)
+    _record_build(index_type, row_count, seconds, action)
+    invalidate_ivfflat_lists()
+    return vector_index_info(db)
+
+
+def ensure_learning_content_columns(db: Session) -> None:
+    """
+    Menambahkan kolom LearningContent yang lebih baru dari tabelnya (create_all tidak menambah kolom ke tabel
+    yang sudah ada): `source_domain` (filter domain di /search), `content_hash`, `chunk_index`, `document_version`
+    (re-indexing inkremental). Cepat (hanya metadata), jadi dijalankan langsung saat startup.
+    Indeks dan pengisian nilai untuk baris lama ada di ensure_learning_content_indexes.
+    """
+    table = LearningContent.__tablename__
+    _run_autocommit(db, [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS source_domain VARCHAR(255)",
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS chunk_index INTEGER",
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS document_version INTEGER",
+    ])
+
+
+def ensure_learning_content_indexes(db: Session) -> None:
+    """
+    Membuat indeks B-tree untuk kolom dari ensure_learning_content_columns lalu mengisi nilainya untuk baris lama:
+    - indeks `source_domain`, diisi dari `source_url`;
+    - indeks `text_pattern_ops` pada `title` (filter prefix judul di /search);
+    - indeks `content_hash`, diisi dari SHA-256 text_chunk agar baris lama juga dapat dipakai ulang.
+    Nama indeks sama dengan yang dideklarasikan di models.LearningContent. Indeks INVALID dihapus lalu dibuat ulang.
+    Pemanggil memegang VECTOR_INDEX_LOCK_NAME (lihat run_index_maintenance).
+    """
+    table = LearningContent.__tablename__
+    drop_invalid_indexes(db, [f"ix_{table}_source_domain", f"ix_{table}_title_prefix", f"ix_{table}_content_hash"])
+    _run_autocommit(db, [
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_source_domain ON {table} (source_domain)",
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_title_prefix ON {table} (title text_pattern_ops)",
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_content_hash ON {table} (content_hash)",
+        # Host dari URL, huruf kecil, tanpa "www." (sama dengan search.normalize_source_domain)
+        f"UPDATE {table} SET source_domain = regexp_replace("
+        f"lower(substring(source_url from '^[a-zA-Z][a-zA-Z0-9+.-]*://(?:[^@/]*@)?([^/:?#]+)')), '^www\\.', '') "
+        f"WHERE source_domain IS NULL AND source_url IS NOT NULL",
+        # Sama dengan indexing.chunk_content_hash (SHA-256 dari teks UTF-8, hex)
+        f"UPDATE {table} SET content_hash = encode(sha256(convert_to(text_chunk, 'UTF8')), 'hex') "
+        f"WHERE content_hash IS NULL",
+    ])
+
+
+def run_index_maintenance(db: Session) -> None:
+    """
+    Semua build indeks learning_content: indeks B-tree + backfill, lalu indeks ANN. Dipanggil di bawah advisory lock.
+    """
+    ensure_learning_content_indexes(db)
+    ensure_vector_index(db)
+
+
+def start_index_maintenance(session_factory) -> None:
+    """
+    Dipanggil saat startup: build indeks berjalan di thread background sehingga worker langsung melayani request.
+    Hanya worker yang mendapat advisory lock yang membangun; worker lain melewatinya.
+    """
+    if not VECTOR_INDEX_ENSURE_ON_STARTUP:
+        print("Build indeks vektor saat startup dinonaktifkan (VECTOR_INDEX_ENSURE_ON_STARTUP=false).")
+        return
+    start_in_background(session_factory, VECTOR_INDEX_LOCK_NAME, run_index_maintenance)
+
+
+def vector_index_info(db: Session) -> Dict[str, Any]:
+    """
+    Melaporkan status indeks ANN: tipe, definisi, ukuran di disk, jumlah baris, build terakhir,
+    serta indeks parsial per ContentType. `exists` hanya untuk indeks valid; `invalid_indexes` berisi sisa build
+    yang gagal (dibuat ulang oleh ensure/rebuild berikutnya).
+    """
+    index_names = _ann_index_names()
+    rows = {
+        row.indexname: row for row in db.execute(
+            text(
+                "SELECT c.relname AS indexname, pg_get_indexdef(i.indexrelid) AS indexdef, "
+                "pg_relation_size(i.indexrelid) AS size_bytes, i.indisvalid AS valid "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = ANY(:names)"
+            ),
+            {"names": index_names}
+        ).all()
+    }
+    row = rows.get(VECTOR_INDEX_NAME)
+    size_bytes = int(row.size_bytes) if row and row.size_bytes is not None else 0
+    partial_indexes = {}
+    for content_type in ContentType:
+        partial_row = rows.get(partial_index_name(content_type))
+        partial_size = int(partial_row.size_bytes) if partial_row and partial_row.size_bytes is not None else 0
+        partial_indexes[content_type.value] = {
+            "index_name": partial_index_name(content_type),
+            "exists": partial_row is not None and partial_row.valid,
+            "size_mb": round(partial_size / (1024 * 1024), 2),
+            "rows": _count_rows(db, content_type),
+        }
+    return {
+        "index_name": VECTOR_INDEX_NAME,
+        "exists": row is not None and row.valid,
+        "index_type": get_existing_index_type(db),
+        "definition": row.indexdef if row else None,
+        "size_bytes": size_bytes,
+        "size_mb": round(size_bytes / (1024 * 1024), 2),
+        "rows": _count_rows(db),
+        "partial_indexes": partial_indexes,
+        "invalid_indexes": sorted(name for name, index_row in rows.items() if not index_row.valid),
+        "iterative_scan": VECTOR_ITERATIVE_SCAN if _supports_iterative_scan(db) else "unsupported",
+        "last_build": dict(_last_build) or None,
+    }
+
+
+def _supports_iterative_scan(db: Session) -> bool:
+    """
+    Iterative index scan tersedia sejak pgvector 0.8.0. Di versi lama, `SET hnsw.iterative_scan` gagal
+    (prefiks "hnsw." dicadangkan oleh ekstensi) dan membatalkan transaksi, jadi versi diperiksa dulu.
+    """
+    global _pgvector_version
+    if _pgvector_version is None:
+        version = db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar() or "0"
+        _pgvector_version = tuple(int(part) for part in re.findall(r"\d+", version))
+    return _pgvector_version >= (0, 8, 0)
+
+
+def apply_search_recall(db: Session, recall: str, candidate_count: int, filtered: bool = False) -> None:
+    """
+    Menyetel parameter pencarian ANN untuk transaksi saat ini (SET LOCAL) berdasarkan preset recall.
+    `candidate_count` adalah jumlah tetangga yang dibutuhkan; ef_search tidak boleh lebih kecil darinya
+    agar HNSW tetap mengembalikan cukup hasil.
+    Jika `filtered`, iterative scan diaktifkan agar filter di klausa WHERE tidak mengurangi jumlah hasil
+    di bawah `candidate_count` (tanpa iterative scan, indeks hanya menghasilkan ef_search kandidat sebelum difilter).
+    """
+    preset = SEARCH_RECALL_PRESETS.get(recall)
+    if preset is None:
+        raise ValueError(f"Preset recall tidak dikenal: '{recall}'. Pilih dari: {', '.join(SEARCH_RECALL_PRESETS)}")
+
+    ef_search = max(int(preset["ef_search"]), candidate_count)
+    lists = _ivfflat_lists_in_use(db) or _ivfflat_lists(IVFFLAT_MIN_ROWS)
+    probes = max(1, int(math.ceil(lists * preset["probes_fraction"])))
+    # SET tidak mendukung bind parameter; nilai sudah divalidasi sebagai integer
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+    db.execute(text(f"SET LOCAL ivfflat.probes = {probes}"))
+
+    if filtered and VECTOR_ITERATIVE_SCAN in ("strict_order", "relaxed_order") and _supports_iterative_scan(db):
+        db.execute(text(f"SET LOCAL hnsw.iterative_scan = {VECTOR_ITERATIVE_SCAN}"))
+        # IVFFlat hanya mendukung relaxed_order; search.py mengurutkan ulang hasil yang difilter berdasarkan jarak
+        db.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+
+
+if __name__ == "__main__":
+    # Langkah deploy/migrasi: membangun indeks di luar proses web (set VECTOR_INDEX_ENSURE_ON_STARTUP=false).
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Build indeks learning_content (kolom, B-tree, ANN pgvector).")
+    parser.add_argument("--ensure", action="store_true", help="Buat kolom/indeks yang belum ada atau INVALID.")
+    parser.add_argument("--rebuild", action="store_true", help="Bangun ulang indeks ANN (misalnya setelah bulk load).")
+    parser.add_argument("--index-type", choices=VECTOR_INDEX_TYPES, help=f"Tipe indeks ANN (default: {VECTOR_INDEX_TYPE}).")
+    args = parser.parse_args()
+
+    if not (args.ensure or args.rebuild):
+        parser.print_help()
+        sys.exit(0)
+
+    def _ensure(db: Session) -> None:
+        ensure_learning_content_indexes(db)
+        ensure_vector_index(db, args.index_type or VECTOR_INDEX_TYPE)
+
+    session = SessionLocal()
+    try:
+        ensure_learning_content_columns(session)
+        if args.ensure and not run_locked(SessionLocal, VECTOR_INDEX_LOCK_NAME, _ensure):
+            sys.exit(1)
+        if args.rebuild:
+            print(rebuild_vector_index(session, args.index_type))
+    except IndexMaintenanceBusyError as e:
+        print(e)
+        sys.exit(1)
+    finally:
+        session.close()
@@ -0,0 +1,82 @@
+"""
+Fixture bersama untuk tes backend: database SQLite berisi tabel forum/gamifikasi dan penghitung kueri SQL.
+Jalankan dari direktori backend: `pip install -r requirements-dev.txt && python -m pytest`.
+"""
+import pytest
+from typing import List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+
+# Tabel yang dibutuhkan tes dan dapat dibuat di SQLite (learning_content memakai indeks ekspresi Postgres)
+SQLITE_TABLES = [
+    models.User.__table__, models.Badge.__table__, models.UserBadge.__table__,
+    models.ForumPost.__table__, models.ForumReply.__table__, models.ForumVote.__table__,
+    models.CounterDelta.__table__,
+]
+
+
+def create_test_engine(url: str = "sqlite://") -> Engine:
+    if url == "sqlite://":
+        # Satu koneksi in-memory yang dipakai bersama, agar semua sesi melihat data yang sama
+        engine = create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    elif url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"timeout": 30, "check_same_thread": False})
+    else:
+        engine = create_engine(url)
+    models.Base.metadata.create_all(engine, tables=SQLITE_TABLES)
+    return engine
+
+
+@pytest.fixture
+def engine():
+    engine = create_test_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+class QueryCounter:
+    """
+    Mencatat pernyataan SQL yang dikirim engine (untuk memastikan jumlah kueri per operasi).
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+    def close(self) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@pytest.fixture
+def query_counter(engine):
+    counter = QueryCounter(engine)
+    yield counter
+    counter.close()
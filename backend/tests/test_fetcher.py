@@ -0,0 +1,102 @@
+"""
+AsyncArticleFetcher terhadap server tiruan (httpx.MockTransport), tanpa internet: batas per host,
+satu permintaan per halaman (judul + teks), crawl ulang yang dijawab 304 dari cache, dan penanganan error.
+"""
+import asyncio
+from typing import Dict, List
+
+import httpx
+
+from app.fetcher import ARTICLE_REQUEST_HEADERS, AsyncArticleFetcher
+
+PARAGRAPH = "Ini adalah paragraf artikel uji yang cukup panjang untuk dianggap sebagai konten utama halaman. " * 3
+BASE_URL = "http://artikel.example.com"
+
+
+class ArticleServer:
+    """
+    Server artikel tiruan dengan ETag per path; mencatat permintaan dan jumlah permintaan bersamaan.
+    """
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.active = 0
+        self.max_active = 0
+        self.requests: List[httpx.Request] = []
+        self.not_modified = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            path = request.url.path
+            etag = f'"v1-{path}"'
+            if path == "/hilang":
+                return httpx.Response(404)
+            if path == "/data.json":
+                return httpx.Response(200, headers={"Content-Type": "application/json"}, content=b"{}")
+            if path == "/besar":
+                return httpx.Response(200, headers={"Content-Type": "text/html"}, content=b"x" * 4096)
+            if request.headers.get("If-None-Match") == etag:
+                self.not_modified += 1
+                return httpx.Response(304, headers={"ETag": etag})
+            body = (
+                f"<html><head><title>Halaman {path}</title></head><body><nav>menu</nav>"
+                f"<article><h1>Judul {path}</h1><p>{PARAGRAPH}</p></article></body></html>"
+            ).encode("utf-8")
+            return httpx.Response(200, headers={"Content-Type": "text/html; charset=utf-8", "ETag": etag}, content=body)
+        finally:
+            self.active -= 1
+
+
+def _fetcher(server: ArticleServer, **kwargs) -> AsyncArticleFetcher:
+    options: Dict = {"per_host_concurrency": 4, "per_host_min_interval": 0.0}
+    options.update(kwargs)
+    return AsyncArticleFetcher(transport=httpx.MockTransport(server.handle), **options)
+
+
+def _crawl_twice(fetcher: AsyncArticleFetcher, urls: List[str]):
+    async def crawl():
+        try:
+            return await fetcher.fetch_many(urls), await fetcher.fetch_many(urls)
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(crawl())
+
+
+def test_crawl_respects_per_host_limit_and_recrawl_uses_304():
+    server = ArticleServer()
+    urls = [f"{BASE_URL}/artikel/{i}" for i in range(20)]
+
+    first, second = _crawl_twice(_fetcher(server), urls)
+
+    assert all(result.ok and result.title == f"Halaman /artikel/{i}" for i, result in enumerate(first))
+    assert all(PARAGRAPH.strip()[:40] in result.text for result in first)
+    assert 1 < server.max_active <= 4
+    # Satu permintaan per halaman per crawl; crawl ulang dijawab 304 dan memakai judul/teks dari cache
+    assert len(server.requests) == 2 * len(urls)
+    assert server.not_modified == len(urls)
+    assert all(result.not_modified for result in second)
+    assert [result.text for result in second] == [result.text for result in first]
+    assert server.requests[0].headers["User-Agent"] == ARTICLE_REQUEST_HEADERS["User-Agent"]
+
+
+def test_fetch_errors_are_returned_not_raised():
+    server = ArticleServer(latency=0)
+    fetcher = _fetcher(server, max_bytes=1024)
+
+    async def fetch_all():
+        try:
+            return await fetcher.fetch_many([f"{BASE_URL}/hilang", f"{BASE_URL}/data.json", f"{BASE_URL}/besar", f"{BASE_URL}/ok"])
+        finally:
+            await fetcher.aclose()
+
+    missing, not_html, too_large, ok = asyncio.run(fetch_all())
+
+    assert not missing.ok and "404" in missing.error
+    assert not not_html.ok and "bukan HTML" in not_html.error
+    assert not too_large.ok and "terlalu besar" in too_large.error
+    assert ok.ok and ok.title == "Halaman /ok"
+    assert fetcher.stats()["errors"] == 3
@@ -0,0 +1,153 @@
+"""
+Jumlah kueri dan hasil kueri baca forum (daftar postingan, balasan, thread berulir) pada SQLite in-memory.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from app import forum_service, models, schemas
+
+POST_COUNT = 50
+PAGE_SIZE = 20
+STARTED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def forum_posts(db) -> List[int]:
+    """
+    POST_COUNT postingan dari penulis berbeda; postingan dengan id n memiliki n % 4 balasan.
+    """
+    users = [models.User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(POST_COUNT)]
+    db.add_all(users)
+    db.flush()
+    posts = [
+        models.ForumPost(author_id=users[i].id, title=f"Postingan {i}", content="Konten postingan forum uji.",
+                         created_at=STARTED + timedelta(minutes=i), upvotes=0)
+        for i in range(POST_COUNT)
+    ]
+    db.add_all(posts)
+    db.flush()
+    db.add_all(models.ForumReply(post_id=post.id, author_id=post.author_id, content="balasan",
+                                 created_at=STARTED, upvotes=0) for post in posts for _ in range(post.id % 4))
+    db.commit()
+    post_ids = [post.id for post in posts]
+    db.expunge_all()
+    return post_ids
+
+
+def test_list_posts_uses_two_queries_per_page(db, forum_posts, query_counter):
+    query_counter.reset()
+    legacy = db.query(models.ForumPost).order_by(models.ForumPost.created_at.desc()).limit(PAGE_SIZE).all()
+    [schemas.PostRead.model_validate(post, from_attributes=True) for post in legacy]
+    legacy_queries = query_counter.count
+    db.expunge_all()
+
+    query_counter.reset()
+    page, next_cursor = forum_service.list_posts(db, limit=PAGE_SIZE)
+    validated = [schemas.PostRead.model_validate(item) for item in page]
+
+    assert query_counter.count == 2
+    assert legacy_queries == 1 + PAGE_SIZE # Pola lama: lazy-load author per postingan
+    assert len(validated) == PAGE_SIZE and next_cursor
+    assert all(item.author.username == f"user{item.author_id - 1}" for item in validated)
+    assert all(item.reply_count == item.id % 4 for item in validated)
+
+
+def test_list_posts_cursor_walks_every_post_once(db, forum_posts):
+    seen: List[int] = []
+    cursor: Optional[str] = None
+    while True:
+        page, cursor = forum_service.list_posts(db, limit=PAGE_SIZE, cursor=cursor)
+        seen += [item["id"] for item in page]
+        if not cursor:
+            break
+    assert seen == sorted(forum_posts, reverse=True)
+
+
+def test_list_replies_loads_authors_in_the_same_query(db, forum_posts, query_counter):
+    post_id = next(post_id for post_id in forum_posts if post_id % 4 == 3)
+
+    query_counter.reset()
+    replies, next_cursor = forum_service.list_replies(db, post_id, limit=2)
+    validated = [schemas.ReplyRead.model_validate(reply, from_attributes=True) for reply in replies]
+
+    assert query_counter.count == 1
+    assert len(validated) == 2 and next_cursor
+    assert all(reply.author.username == f"user{post_id - 1}" for reply in validated)
+
+
+@pytest.fixture
+def reply_tree(db, forum_posts):
+    """
+    Pohon balasan sintetis pada postingan pertama: 30 akar, setiap node punya 3 anak, 5 tingkat.
+    Mengembalikan (post_id, peta parent_reply_id -> id anak).
+    """
+    post = db.get(models.ForumPost, forum_posts[0])
+    started = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    counter = 0
+
+    def add(parent_id: Optional[int]) -> models.ForumReply:
+        nonlocal counter
+        counter += 1
+        reply = models.ForumReply(post_id=post.id, author_id=post.author_id, content=f"balasan {counter}",
+                                  parent_reply_id=parent_id, created_at=started + timedelta(seconds=counter % 17), upvotes=0)
+        db.add(reply)
+        return reply
+
+    frontier = [add(None) for _ in range(30)]
+    db.flush()
+    for _ in range(4):
+        frontier = [add(parent.id) for parent in frontier for _ in range(3)]
+        db.flush()
+    db.commit()
+
+    children: Dict[Optional[int], List[int]] = defaultdict(list)
+    for reply_id, parent_id in db.query(models.ForumReply.id, models.ForumReply.parent_reply_id)\
+                                 .filter(models.ForumReply.post_id == post.id).all():
+        children[parent_id].append(reply_id)
+    return post.id, children
+
+
+def _check_node(node: Dict[str, Any], depth: int, max_depth: int, children) -> None:
+    assert node["depth"] == depth
+    expected_children = children[node["id"]]
+    if depth < max_depth:
+        assert sorted(child["id"] for child in node["child_replies"]) == sorted(expected_children)
+        assert not node["has_more_replies"]
+        for child in node["child_replies"]:
+            _check_node(child, depth + 1, max_depth, children)
+    else:
+        assert node["child_replies"] == []
+        assert node["has_more_replies"] == bool(expected_children)
+
+
+def test_thread_pages_use_one_query_and_respect_max_depth(db, reply_tree, query_counter):
+    post_id, children = reply_tree
+    max_depth, page_size = 2, 7
+    seen_roots: List[int] = []
+    cursor: Optional[str] = None
+    while True:
+        query_counter.reset()
+        page, cursor = forum_service.load_thread_page(db, post_id, limit=page_size, cursor=cursor, max_depth=max_depth)
+        assert query_counter.count == 1
+        for root in page:
+            _check_node(root, 0, max_depth, children)
+            schemas.ThreadedReplyRead.model_validate(root)
+        seen_roots += [root["id"] for root in page]
+        if not cursor:
+            break
+    assert sorted(seen_roots) == sorted(children[None])
+    assert len(set(seen_roots)) == len(seen_roots)
+
+
+def test_load_reply_subtree_continues_below_the_depth_limit(db, reply_tree):
+    _, children = reply_tree
+    deep_node = next(
+        node for node in db.query(models.ForumReply).filter(models.ForumReply.parent_reply_id.isnot(None))
+        if children[node.id]
+    )
+    subtree = forum_service.load_reply_subtree(db, deep_node, max_depth=forum_service.FORUM_THREAD_MAX_DEPTH)
+    assert subtree["id"] == deep_node.id and subtree["depth"] == 0
+    assert sorted(child["id"] for child in subtree["child_replies"]) == sorted(children[deep_node.id])
@@ -0,0 +1,146 @@
+"""
+Uji beban vote forum: vote/unvote/toggle bersamaan dari banyak thread, lalu hitungan upvotes dan XP penulis
+harus sama dengan ledger forum_votes. Memakai SQLite berbasis file (beberapa koneksi); set TEST_DATABASE_URL
+untuk menjalankannya terhadap Postgres.
+"""
+import os
+import random
+import threading
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import forum_votes
+from app.counter_buffer import CounterBuffer, counter_buffer
+from app.models import CounterDelta, ForumPost, ForumReply, ForumVote, User
+from conftest import create_test_engine
+
+VOTERS = 40
+THREADS = 8
+OPERATIONS = 400
+
+
+@pytest.fixture
+def stress_session_factory(tmp_path):
+    engine = create_test_engine(os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tmp_path / 'votes.db'}")
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def vote_targets(stress_session_factory):
+    db = stress_session_factory()
+    author = User(username="stress-author", email="stress-author@example.com", hashed_password="x", xp_points=0)
+    users = [User(username=f"stress-{i}", email=f"stress-{i}@example.com", hashed_password="x") for i in range(VOTERS)]
+    db.add_all([author] + users)
+    db.flush()
+    post = ForumPost(author_id=author.id, title="Uji beban vote", content="Postingan untuk uji beban vote.", upvotes=0)
+    db.add(post)
+    db.flush()
+    reply = ForumReply(post_id=post.id, author_id=author.id, content="Balasan uji beban.", upvotes=0)
+    db.add(reply)
+    db.commit()
+    targets = {"post_id": post.id, "reply_id": reply.id, "author_id": author.id, "user_ids": [user.id for user in users]}
+    db.close()
+    return targets
+
+
+def _vote_concurrently(session_factory, targets, write_behind: bool) -> list:
+    errors = []
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        session = session_factory()
+        try:
+            for _ in range(OPERATIONS // THREADS):
+                if rng.random() < 0.5:
+                    target = session.get(ForumPost, targets["post_id"])
+                else:
+                    target = session.get(ForumReply, targets["reply_id"])
+                user_id = rng.choice(targets["user_ids"])
+                action = rng.choice(("up", "up", "down", "toggle"))
+                if action == "toggle":
+                    forum_votes.toggle_vote(session, user_id, target, write_behind=write_behind)
+                else:
+                    forum_votes.set_vote(session, user_id, target, upvote=(action == "up"), write_behind=write_behind)
+                session.commit()
+                session.expire_all()
+        except Exception as e:
+            session.rollback()
+            errors.append(e)
+        finally:
+            session.close()
+
+    pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return errors
+
+
+def _assert_counts_match_ledger(db, targets) -> None:
+    post_votes = db.scalar(select(func.count()).where(ForumVote.post_id == targets["post_id"]))
+    reply_votes = db.scalar(select(func.count()).where(ForumVote.reply_id == targets["reply_id"]))
+    assert db.scalar(select(ForumPost.upvotes).where(ForumPost.id == targets["post_id"])) == post_votes
+    assert db.scalar(select(ForumReply.upvotes).where(ForumReply.id == targets["reply_id"])) == reply_votes
+    assert db.scalar(select(User.xp_points).where(User.id == targets["author_id"])) == \
+        post_votes * forum_votes.POST_UPVOTE_XP + reply_votes * forum_votes.REPLY_UPVOTE_XP
+
+
+def test_concurrent_votes_sync_counters_match_ledger(stress_session_factory, vote_targets):
+    errors = _vote_concurrently(stress_session_factory, vote_targets, write_behind=False)
+    assert not errors, f"Error pada worker: {errors[0]!r}"
+    db = stress_session_factory()
+    try:
+        _assert_counts_match_ledger(db, vote_targets)
+    finally:
+        db.close()
+
+
+def test_concurrent_votes_write_behind_survive_crash_recovery(stress_session_factory, vote_targets, monkeypatch):
+    monkeypatch.setattr(counter_buffer, "session_factory", stress_session_factory)
+    counter_buffer.start()
+    try:
+        errors = _vote_concurrently(stress_session_factory, vote_targets, write_behind=True)
+        # "Crash": buffer proses ini belum di-flush; proses baru menerapkan jurnal yang tertinggal,
+        # lalu flush buffer lama tidak boleh menerapkan ulang delta yang sama
+        CounterBuffer(session_factory=stress_session_factory).recover_pending()
+    finally:
+        counter_buffer.stop()
+    assert not errors, f"Error pada worker: {errors[0]!r}"
+    assert counter_buffer.stats()["buffered_journal_rows"] == 0
+
+    db = stress_session_factory()
+    try:
+        assert db.scalar(select(func.count()).select_from(CounterDelta)) == 0
+        _assert_counts_match_ledger(db, vote_targets)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_retract_user_votes_keeps_counters_in_sync(stress_session_factory, vote_targets, monkeypatch, write_behind):
+    monkeypatch.setattr(counter_buffer, "session_factory", stress_session_factory)
+    db = stress_session_factory()
+    try:
+        post = db.get(ForumPost, vote_targets["post_id"])
+        reply = db.get(ForumReply, vote_targets["reply_id"])
+        for user_id in vote_targets["user_ids"][:5]:
+            forum_votes.set_vote(db, user_id, post, upvote=True, write_behind=write_behind)
+            forum_votes.set_vote(db, user_id, reply, upvote=True, write_behind=write_behind)
+        db.commit()
+
+        leaving_user = vote_targets["user_ids"][0]
+        assert forum_votes.retract_user_votes(db, leaving_user, write_behind=write_behind) == 2
+        db.delete(db.get(User, leaving_user))
+        db.commit()
+        while counter_buffer.flush():
+            pass
+
+        db.expire_all()
+        assert db.scalar(select(ForumPost.upvotes).where(ForumPost.id == vote_targets["post_id"])) == 4
+        _assert_counts_match_ledger(db, vote_targets)
+    finally:
+        db.close()